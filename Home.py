@@ -1,4 +1,5 @@
 import streamlit as st
+from resources import start_preload
 
 st.set_page_config(page_title="Timesheet Calculator", page_icon="🗓️", layout="wide")
 
@@ -12,3 +13,6 @@ Welcome! Use the sidebar to navigate:
 
 💡 Tip: On iPhone, open in Safari → Share → *Add to Home Screen* for an app-like feel.
 """)
+
+# Page is drawn; warm up Review Calculations in the background
+start_preload()
@@ -0,0 +1,111 @@
+# benchmarks/bench_memory.py
+"""Memory per session and per million rows: entry dicts and row tuples vs records.py.
+
+    python benchmarks/bench_memory.py                  # 1000 sessions, 200k bulk rows
+    python benchmarks/bench_memory.py --sessions 5000 --rows 1000000 --output mem.json
+
+Each layout is built the way the app builds it (fresh strings per cell, as
+widgets and csv.DictReader hand them over) and measured with tracemalloc as
+the growth in traced memory while it is alive, divided by the count (the
+memoised field readers are warmed first, as they are in a running app).
+
+    session/entries       session_state["entries"]: 14 entry dicts vs a Fortnight
+    session/review_rows   the Review page's 14 computed days: row tuples vs DayResults
+    bulk/input            a chunk of bulk input rows: dicts vs an EntryBlock
+    bulk/task_pickle      the same chunk as pickled for a pool worker
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import pickle
+import sys
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import synthetic  # noqa: E402
+from records import DayResult, EntryBlock, Fortnight  # noqa: E402
+from result_cache import day_key, day_row  # noqa: E402
+
+
+def measure(build):
+    """(bytes, object) traced while build()'s result is alive."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, obj
+
+
+def _fresh(e):
+    """An entry dict whose strings are new objects, as widget values are."""
+    return {k: "".join(list(v)) if isinstance(v, str) else v for k, v in e.items()}
+
+
+def _day_result(i):
+    """A plausible computed day (the numbers only need to look like real ones)."""
+    return DayResult(0.25 * (i % 8), [37.36, 12.5, 5.69, 0.0, 0.0, 398.55, 454.1], i % 4, i % 5 == 0,
+                     i % 13 == 0, (i % 3, 0, 0, 0, 8.0))
+
+
+def bench_sessions(n):
+    fortnights = [synthetic.fortnight_entries(seed=1, employee=i) for i in range(n)]
+    out = {}
+    [Fortnight(synthetic.DEFAULT_START, f) for f in fortnights]  # warm the field caches first
+    dict_bytes, _ = measure(lambda: [[_fresh(e) for e in f] for f in fortnights])
+    record_bytes, _ = measure(lambda: [Fortnight(synthetic.DEFAULT_START, f) for f in fortnights])
+    out["session/entries/dicts"] = dict_bytes / n
+    out["session/entries/fortnight"] = record_bytes / n
+
+    keys = [[day_key(_fresh(e), "v") for e in f] for f in fortnights]
+    results = [[_day_result(i) for i in range(14)] for _ in range(n)]
+
+    def tuples():  # the layout before records.DayResult: (cells, amounts, any_ado, quantities)
+        return [tuple((tuple(day_row(k, r)), r.amounts, r.any_ado, r.quantities) for k, r in zip(ks, rs))
+                for ks, rs in zip(keys, results)]
+
+    tuple_bytes, _ = measure(tuples)
+    record_bytes, _ = measure(lambda: [tuple(_day_result(i) for i in range(14)) for _ in range(n)])
+    out["session/review_rows/tuples"] = tuple_bytes / n
+    out["session/review_rows/day_results"] = record_bytes / n
+    return out
+
+
+def bench_bulk(n):
+    text = io.StringIO()
+    synthetic.write(synthetic.iter_rows(n), text)
+    data = text.getvalue()
+    per_million = 1_000_000 / n
+    dict_bytes, rows = measure(lambda: list(csv.DictReader(io.StringIO(data))))
+    EntryBlock.from_rows(rows)  # warm the field caches first
+    block_bytes, block = measure(lambda: EntryBlock.from_rows(rows))
+    return {"bulk/input/dicts": dict_bytes * per_million,
+            "bulk/input/entry_block": block_bytes * per_million,
+            "bulk/task_pickle/dicts": len(pickle.dumps(rows, 5)) * per_million,
+            "bulk/task_pickle/entry_block": len(pickle.dumps(block, 5)) * per_million}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sessions", type=int, default=1000)
+    p.add_argument("--rows", type=int, default=200_000, help="bulk rows built (results are scaled per million)")
+    p.add_argument("--output", help="also write the results as JSON here")
+    args = p.parse_args(argv)
+
+    results = {**bench_sessions(args.sessions), **bench_bulk(args.rows)}
+    for name, value in results.items():
+        if name.startswith("session/"):
+            print(f"{name:36s} {value / 1024:>10,.1f} KiB per session")
+        else:
+            print(f"{name:36s} {value / 1024 ** 2:>10,.1f} MiB per million rows")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
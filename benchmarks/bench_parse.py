@@ -0,0 +1,68 @@
+# benchmarks/bench_parse.py
+"""Parser throughput: strptime-based parse_time vs the memoised fast path.
+
+    python benchmarks/bench_parse.py [n]
+"""
+import os
+import random
+import sys
+import time as _time
+from datetime import datetime, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from utils import parse_duration, parse_minutes, parse_time  # noqa: E402
+
+
+def legacy_parse_time(text):
+    """parse_time as it was before the fast path (for comparison)."""
+    text = (text or "").strip()
+    if not text: return None
+    try:
+        if ":" in text:
+            return datetime.strptime(text, "%H:%M").time()
+        if text.isdigit() and len(text) in [3,4]:
+            h, m = int(text[:-2]), int(text[-2:])
+            return time(h, m)
+    except:  # noqa: E722
+        return None
+    return None
+
+
+def roster_strings(n, distinct=200, seed=0):
+    """n strings drawn from a small pool of roster times, mixed HH:MM / HHMM."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        h, m = rng.randrange(24), rng.choice([0, 15, 30, 45, rng.randrange(60)])
+        pool.append(f"{h:02d}:{m:02d}" if rng.random() < 0.5 else f"{h:02d}{m:02d}")
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def bench(fn, data):
+    t0 = _time.perf_counter()
+    for s in data:
+        fn(s)
+    return _time.perf_counter() - t0
+
+
+def run(n=200_000):
+    data = roster_strings(n)
+    parse_minutes.cache_clear()
+    parse_duration.cache_clear()
+    results = {
+        "legacy parse_time": bench(legacy_parse_time, data),
+        "parse_time (cold cache)": bench(parse_time, data),
+        "parse_time (warm cache)": bench(parse_time, data),
+        "parse_minutes (warm cache)": bench(parse_minutes, data),
+    }
+    parse_minutes.cache_clear()
+    results["parse_minutes (no cache hits)"] = bench(parse_minutes.__wrapped__, data)
+    return {k: n / v for k, v in results.items()}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rates = run(n)
+    base = rates["legacy parse_time"]
+    for name, rate in rates.items():
+        print(f"{name:32s} {rate:>14,.0f} /s  x{rate / base:5.1f}")
@@ -0,0 +1,136 @@
+# benchmarks/bench_service.py
+"""Load test for service.py on one machine.
+
+    python benchmarks/bench_service.py                                  # starts a local service itself
+    python benchmarks/bench_service.py --clients 256 --requests 50 --workers 4
+    python benchmarks/bench_service.py --url http://127.0.0.1:8765 --bulk-rows 5000
+
+Each client holds one keep-alive connection and sends its requests back to
+back: synthetic fortnights (synthetic.fortnight_entries), or bulk requests
+of --bulk-rows rows.  Reports throughput, client-side latency percentiles,
+503s (backpressure) and, from the service's /metrics, how many requests
+each batch coalesced.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import synthetic  # noqa: E402
+
+START = date(2025, 4, 14)
+
+
+def payloads(n, bulk_rows, seed=0):
+    """n distinct request bodies (path, bytes)."""
+    out = []
+    for i in range(n):
+        if bulk_rows:
+            rows = synthetic.iter_rows(bulk_rows, 1, seed + i, START)
+            body = {"anchor": START.isoformat(), "rows": [dict(zip(synthetic.COLUMNS, r)) for r in rows]}
+            out.append(("/bulk", json.dumps(body).encode()))
+        else:
+            body = {"start_date": START.isoformat(), "employee": f"E{i}",
+                    "entries": synthetic.fortnight_entries(seed, i, START)}
+            out.append(("/fortnight", json.dumps(body).encode()))
+    return out
+
+
+async def request(reader, writer, host, method, path, body=b""):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        k, _, v = line.decode("latin-1").partition(":")
+        if k.lower() == "content-length":
+            length = int(v)
+    return status, await reader.readexactly(length)
+
+
+async def client(url, bodies, latencies, statuses):
+    u = urlsplit(url)
+    reader, writer = await asyncio.open_connection(u.hostname, u.port, limit=1 << 24)
+    try:
+        for path, body in bodies:
+            t0 = time.perf_counter()
+            status, _ = await request(reader, writer, u.netloc, "POST", path, body)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def load(url, clients, requests, bulk_rows):
+    bodies = payloads(min(clients * requests, 1000), bulk_rows)
+    latencies, statuses = [], {}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(url, [bodies[(c * requests + k) % len(bodies)] for k in range(requests)],
+                                  latencies, statuses) for c in range(clients)))
+    wall = time.perf_counter() - t0
+    u = urlsplit(url)
+    reader, writer = await asyncio.open_connection(u.hostname, u.port, limit=1 << 24)
+    _, raw = await request(reader, writer, u.netloc, "GET", "/metrics?format=json")
+    writer.close()
+    return wall, sorted(latencies), statuses, json.loads(raw)
+
+
+def pct(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))] if sorted_values else 0.0
+
+
+def report(wall, latencies, statuses, metrics, rows_per_request):
+    n = len(latencies)
+    ok = statuses.get(200, 0)
+    c = metrics["counters"]
+    lines = [f"requests {n} in {wall:.2f}s: {n / wall:,.0f} req/s, {ok * rows_per_request / wall:,.0f} days/s",
+             "status   " + "  ".join(f"{k}: {v}" for k, v in sorted(statuses.items())),
+             "latency  " + "  ".join(f"p{int(q * 100)} {pct(latencies, q) * 1000:.1f}ms" for q in (0.5, 0.9, 0.99))
+             + f"  max {latencies[-1] * 1000 if latencies else 0:.1f}ms"]
+    if c.get("batches"):
+        lines.append(f"batches  {c['batches']}, {c['batched_requests'] / c['batches']:.1f} requests/batch")
+    s = metrics["stages"]
+    for name in ("queue_wait", "batch", "worker", "request_fortnight", "request_bulk"):
+        if name in s and s[name]["calls"]:
+            lines.append(f"{name:<18} mean {s[name]['seconds'] / s[name]['calls'] * 1000:.2f}ms "
+                         f"max {s[name]['max_seconds'] * 1000:.1f}ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Load-test the calculation service.")
+    p.add_argument("--url", help="a running service (default: start one on a free port)")
+    p.add_argument("--clients", type=int, default=32, help="concurrent connections")
+    p.add_argument("--requests", type=int, default=50, help="requests per client")
+    p.add_argument("--bulk-rows", type=int, default=0, help="send /bulk requests of this many rows instead")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="for the service started here")
+    p.add_argument("--service-args", default="", help="extra service.py arguments, e.g. '--batch-ms 5'")
+    args = p.parse_args(argv)
+
+    proc = None
+    url = args.url
+    if not url:
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "service.py"), "--port", "0",
+                                 "--workers", str(args.workers), *args.service_args.split()],
+                                stdout=subprocess.PIPE, text=True)
+        url = proc.stdout.readline().split()[-1]
+    try:
+        wall, latencies, statuses, metrics = asyncio.run(load(url, args.clients, args.requests, args.bulk_rows))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    print(report(wall, latencies, statuses, metrics, args.bulk_rows or 14))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+"""Cold-start and warm-rerun times of the Streamlit pages.
+
+    python benchmarks/bench_startup.py            # all scenarios, printed in ms
+    python benchmarks/bench_startup.py --probe Home.py pages/2_Review_Calculations.py
+
+Each scenario runs in a fresh interpreter (nothing app-side imported yet),
+the way a container scaled to zero serves its first request.  streamlit
+itself and AppTest's one-off setup are paid before the clock starts, so
+"cold" is the first script run only.  With several pages the earlier ones
+run first (with a pause for the background preload), and the last page is
+the one timed.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = {
+    "home": ["Home.py"],
+    "enter": ["pages/1_Enter_Timesheet.py"],
+    "review": ["pages/2_Review_Calculations.py"],
+    "review_after_home": ["Home.py", "pages/2_Review_Calculations.py"],
+    "legacy_app": ["timesheet_app.py"],
+}
+
+
+def sample_entries():
+    """A fixed fortnight with a day off, an ADO and a sick day (no numpy/pandas needed)."""
+    from datetime import date, timedelta
+    out = []
+    for i in range(14):
+        d = date(2025, 4, 14) + timedelta(days=i)
+        e = {"weekday": d.strftime("%A"), "date_str": d.isoformat(), "rs_on": "0700", "as_on": "0630",
+             "rs_off": "1500", "as_off": "1500", "worked": "", "extra": "", "sick": i == 3, "off": i == 5, "ado": i == 9}
+        out.append(e)
+    return out
+
+
+def _app(path, entries):
+    from datetime import date
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT, path), default_timeout=60)
+    at.session_state["start_date"] = date(2025, 4, 14)
+    at.session_state["entries"] = [dict(e) for e in entries]
+    return at
+
+
+def probe(paths, reruns=10):
+    """Run in a fresh process: cold/warm seconds for paths[-1] and the heavy modules loaded after its first run."""
+    import logging
+    import tempfile
+    import threading
+    from streamlit.testing.v1 import AppTest
+    logging.disable(logging.WARNING)
+    sys.path.insert(0, ROOT)
+
+    entries = sample_entries()
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write("import streamlit as st\nst.write('warm-up')\n")
+    AppTest.from_file(f.name).run()
+    os.unlink(f.name)
+
+    for path in paths[:-1]:
+        _app(path, entries).run()
+        time.sleep(2)
+
+    at = _app(paths[-1], entries)
+    t0 = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t0
+    loaded = sorted(m for m in ("numpy", "pandas", "jinja2") if m in sys.modules)
+    for t in threading.enumerate():
+        if t.name == "preload":
+            t.join()
+    warm = float("inf")
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        warm = min(warm, time.perf_counter() - t0)
+    return {"cold": cold, "warm": warm, "error": bool(at.exception),
+            "modules": loaded}
+
+
+def run(repeat=3):
+    """Best of `repeat` fresh processes per scenario."""
+    out = {}
+    for name, paths in SCENARIOS.items():
+        runs = []
+        for _ in range(repeat):
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--probe", *paths],
+                                  capture_output=True, text=True, cwd=ROOT)
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        out[name] = {"cold": min(r["cold"] for r in runs), "warm": min(r["warm"] for r in runs),
+                     "error": any(r["error"] for r in runs), "modules": runs[0]["modules"]}
+    return out
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--probe"]:
+        print(json.dumps(probe(sys.argv[2:])))
+    else:
+        for name, r in run().items():
+            print(f"{name:20s} cold {r['cold'] * 1000:7.1f} ms   warm {r['warm'] * 1000:6.1f} ms   "
+                  f"loaded: {', '.join(r['modules']) or '-'}{'   ERROR' if r['error'] else ''}")
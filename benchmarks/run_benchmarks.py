@@ -0,0 +1,378 @@
+# benchmarks/run_benchmarks.py
+"""Reproducible benchmark suite for the calculation pipeline.
+
+    python benchmarks/run_benchmarks.py                       # full run, writes benchmarks/results/latest.json
+    python benchmarks/run_benchmarks.py --quick               # small sizes, for a quick check
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --fail-on-regression
+
+Every case reports the best of --repeat runs (seeded inputs, so runs are
+comparable).  Results are written as JSON; with --baseline each case is
+compared against a saved run and slowdowns beyond --threshold are flagged.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from bench_parse import legacy_parse_time, roster_strings  # noqa: E402
+import bench_startup  # noqa: E402
+import synthetic  # noqa: E402
+import simulate  # noqa: E402
+import result_frame  # noqa: E402
+from bulk import compute_stream  # noqa: E402
+from engine import calculate_batch, calculate_cents, quantities, rerate  # noqa: E402
+from rate_tables import default_schedule  # noqa: E402
+from utils import apply_flags, calculate_row, classify_day, parse_duration, parse_minutes, parse_time  # noqa: E402
+from validation import validate_rows  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+# ---------- Inputs ----------
+def sample_day(rng, d):
+    """One entry dict in the session_state["entries"] shape."""
+    e = {"weekday": d.strftime("%A"), "date_str": d.isoformat(),
+         "rs_on": "", "as_on": "", "rs_off": "", "as_off": "", "worked": "", "extra": "",
+         "sick": False, "off": False, "ado": False}
+    x = rng.random()
+    if x < 0.05:
+        e["sick"] = True
+    elif x < 0.15:
+        e["off"] = True
+    elif x < 0.2:
+        e["ado"] = True
+    else:
+        start = rng.randrange(0, 1440, 15)
+        shift = rng.choice([-60, -30, 0, 0, 0, 30, 60])
+        fmt = "{:02d}{:02d}" if rng.random() < 0.5 else "{:02d}:{:02d}"
+        hm = lambda m: fmt.format(m % 1440 // 60, m % 60)  # noqa: E731
+        e.update(rs_on=hm(start), rs_off=hm(start + 480), as_on=hm(start + shift), as_off=hm(start + shift + 480),
+                 worked=rng.choice(["", "", "0800", "07:45", "0830"]), extra=rng.choice(["", "", "0015"]))
+    return e
+
+
+def sample_fortnight(rng, start=date(2025, 4, 14)):
+    return [sample_day(rng, start + timedelta(days=i)) for i in range(14)]
+
+
+def sample_bulk_rows(n, seed=0):
+    """n bulk-CLI input dicts: employees with consecutive fortnights."""
+    rng = random.Random(seed)
+    start = date(2025, 1, 6)
+    for i in range(n):
+        e = sample_day(rng, start + timedelta(days=i % 364))
+        e["employee"] = f"E{i // 364:07d}"
+        e["date"] = e.pop("date_str")
+        yield e
+
+
+def classified_inputs(entries):
+    """(weekday, effective_values, sick, DayClass) per entry, as the Review page builds them."""
+    out = []
+    for r in entries:
+        values = [r["rs_on"], r["as_on"], r["rs_off"], r["as_off"], r["worked"], r["extra"]]
+        effective_values, _ = apply_flags(values, r["sick"], r["off"], r["ado"])
+        out.append((r["weekday"], effective_values, r["sick"], classify_day(r["weekday"], effective_values, r["sick"])))
+    return out
+
+
+# ---------- Timing ----------
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def result(n, seconds, unit="rows"):
+    return {"n": n, "seconds": seconds, "per_second": n / seconds if seconds else None, "unit": unit}
+
+
+# ---------- Cases ----------
+def bench_parsing(n, repeat):
+    data = roster_strings(n)
+    durations = [random.Random(1).choice(["", "0800", "07:45", "0830", "0015"]) for _ in range(n)]
+
+    def cold(fn, cache):
+        def run():
+            cache.cache_clear()
+            for s in data:
+                fn(s)
+        return run
+
+    def warm(fn, items):
+        return lambda: [fn(s) for s in items]
+
+    return {
+        "parse/legacy_parse_time": result(n, best_of(warm(legacy_parse_time, data), repeat), "strings"),
+        "parse/parse_time_cold": result(n, best_of(cold(parse_time, parse_minutes), repeat), "strings"),
+        "parse/parse_time_warm": result(n, best_of(warm(parse_time, data), repeat), "strings"),
+        "parse/parse_minutes_warm": result(n, best_of(warm(parse_minutes, data), repeat), "strings"),
+        "parse/parse_duration_warm": result(n, best_of(warm(parse_duration, durations), repeat), "strings"),
+    }
+
+
+def bench_calculate_row(n, repeat):
+    rng = random.Random(2)
+    days = classified_inputs([sample_day(rng, date(2025, 4, 14) + timedelta(days=i % 14)) for i in range(n)])
+
+    def run():
+        for weekday, ev, sick, c in days:
+            calculate_row(weekday, ev, sick, c.penalty, c.special, c.unit)
+
+    def run_batch():
+        calculate_batch([d[0] for d in days], [d[1][0] for d in days], [d[2] for d in days],
+                        [d[3].penalty for d in days], [d[3].special for d in days],
+                        [d[3].unit for d in days], [d[3].worked for d in days], [d[3].any_ado for d in days])
+
+    return {"calculate_row/scalar": result(n, best_of(run, repeat)),
+            "calculate_row/batch_from_lists": result(n, best_of(run_batch, repeat))}
+
+
+def bench_fortnight(n_fortnights, repeat):
+    rng = random.Random(3)
+    fortnights = [sample_fortnight(rng) for _ in range(n_fortnights)]
+
+    def run():
+        for entries in fortnights:
+            days = classified_inputs(entries)
+            calculate_batch([d[0] for d in days], [d[1][0] for d in days], [d[2] for d in days],
+                            [d[3].penalty for d in days], [d[3].special for d in days],
+                            [d[3].unit for d in days], [d[3].worked for d in days], [d[3].any_ado for d in days])
+
+    return {"fortnight/classify_and_rate": result(n_fortnights, best_of(run, repeat), "fortnights")}
+
+
+def bench_review_table(n_fortnights, repeat):
+    """result_frame build, totals and Styler render as the Review page does them."""
+    rng = random.Random(4)
+    tables = []
+    for _ in range(n_fortnights):
+        rows = []
+        for r in sample_fortnight(rng):
+            amounts = [round(rng.uniform(0, 500), 2) for _ in range(7)]
+            rows.append([r["weekday"], r["date_str"], r["rs_on"], r["as_on"], r["rs_off"], r["as_off"],
+                         r["worked"], r["extra"], r["sick"], 0.0, "No", False, False, *amounts])
+        tables.append(rows)
+
+    def build(render):
+        def run():
+            for rows in tables:
+                df = result_frame.build(rows)
+                totals = result_frame.totals(df)
+                if render:
+                    result_frame.render(df, totals).to_html()
+        return run
+
+    return {"review/table_and_totals": result(n_fortnights, best_of(build(False), repeat), "fortnights"),
+            "review/table_totals_styler": result(n_fortnights, best_of(build(True), repeat), "fortnights")}
+
+
+def bench_review_page(repeat):
+    """Real page reruns through streamlit's AppTest (first run, then unchanged reruns)."""
+    try:
+        import streamlit as st
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {}
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    entries = sample_fortnight(random.Random(5))
+    page = os.path.join(ROOT, "pages", "2_Review_Calculations.py")
+
+    def fresh():
+        at = AppTest.from_file(page, default_timeout=60)
+        at.session_state["entries"] = [dict(e) for e in entries]
+        at.session_state["start_date"] = date(2025, 4, 14)
+        return at
+
+    def cold():
+        st.cache_resource.clear()  # drop the cross-session result cache
+        fresh().run()
+
+    first = best_of(cold, repeat)
+    shared = best_of(lambda: fresh().run(), repeat)  # new session, roster already cached
+    at = fresh()
+    at.run()
+    rerun = best_of(at.run, repeat)
+    return {"review_page/first_run": result(1, first, "runs"),
+            "review_page/first_run_shared_roster": result(1, shared, "runs"),
+            "review_page/rerun_unchanged": result(1, rerun, "runs")}
+
+
+def bench_startup_times(repeat):
+    """Cold first run (fresh process) and warm rerun of each page; see bench_startup.py."""
+    out = {}
+    for name, r in bench_startup.run(min(repeat, 3)).items():
+        out[f"startup/{name}/cold"] = result(1, r["cold"], "runs")
+        out[f"startup/{name}/warm"] = result(1, r["warm"], "runs")
+    return out
+
+
+def bench_scaling(sizes, pipeline_max, repeat):
+    """Rows/s against input size: vectorised engine (float and cents) and re-rating (1M-row blocks),
+    full bulk pipeline on the built-in sample and on synthetic.py rosters, the validation pass,
+    the generator itself and what-if simulation (per variant-day)."""
+    out = {}
+    rng = np.random.default_rng(6)
+    block = 1_000_000
+    for n in sizes:
+        def engine_run():
+            done = 0
+            while done < n:
+                m = min(block, n - done)
+                calculate_batch(rng.integers(0, 3, m), rng.integers(0, 3, m), rng.random(m) < 0.05,
+                                rng.integers(0, 4, m), rng.random(m) < 0.05,
+                                np.round(rng.uniform(-2, 4, m), 2), rng.choice([0.0, 8.0, 7.75], m))
+                done += m
+        out[f"scaling/engine/{n}"] = result(n, best_of(engine_run, 1 if n >= block else repeat))
+
+        def cents_run():
+            done = total = 0
+            while done < n:
+                m = min(block, n - done)
+                c = calculate_cents(rng.integers(0, 3, m), rng.integers(0, 3, m), rng.random(m) < 0.05,
+                                    rng.integers(0, 4, m), rng.random(m) < 0.05,
+                                    np.round(rng.uniform(-2, 4, m), 2), rng.choice([0.0, 8.0, 7.75], m))
+                total += int(c["daily_count"].sum())
+                done += m
+        out[f"scaling/engine_cents/{n}"] = result(n, best_of(cents_run, 1 if n >= block else repeat))
+
+        schedule = default_schedule()
+        def rerate_run():
+            done = 0
+            while done < n:
+                m = min(block, n - done)
+                q = quantities(rng.integers(0, 3, m), rng.integers(0, 3, m), rng.random(m) < 0.05,
+                               rng.integers(0, 4, m), rng.random(m) < 0.05,
+                               np.round(rng.uniform(-2, 4, m), 2), rng.choice([0.0, 8.0, 7.75], m))
+                rerate(q, schedule.names, schedule.matrix)
+                done += m
+        out[f"scaling/rerate/{n}"] = result(n, best_of(rerate_run, 1 if n >= block else repeat))
+
+        if n <= pipeline_max:
+            def pipeline_run():
+                for _ in compute_stream(sample_bulk_rows(n)):
+                    pass
+            out[f"scaling/pipeline/{n}"] = result(n, best_of(pipeline_run, 1 if n >= 100_000 else repeat))
+
+            def synthetic_rows():
+                for r in synthetic.iter_rows(n):
+                    yield dict(zip(synthetic.COLUMNS, r))
+
+            def synthetic_run():
+                for _ in compute_stream(synthetic_rows()):
+                    pass
+            out[f"scaling/pipeline_synthetic/{n}"] = result(n, best_of(synthetic_run, 1 if n >= 100_000 else repeat))
+
+            rows = list(synthetic_rows())
+
+            def validate_run():
+                for i in range(0, n, 10_000):
+                    validate_rows(rows[i:i + 10_000])
+            out[f"scaling/validate/{n}"] = result(n, best_of(validate_run, repeat))
+
+            def generate_run():
+                for _ in synthetic.iter_rows(n):
+                    pass
+            out[f"scaling/generate/{n}"] = result(n, best_of(generate_run, 1 if n >= 100_000 else repeat))
+
+            entries = synthetic.fortnight_entries(1, 1)
+            variants = simulate.sample(entries, max(1, n // 14), seed=1)
+
+            def simulate_run():
+                simulate.simulate(entries, synthetic.DEFAULT_START, variants)
+            out[f"scaling/simulate/{n}"] = result(n, best_of(simulate_run, repeat))  # per variant-day
+    return out
+
+
+# ---------- Reporting ----------
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, threshold):
+    """Print each case against the baseline; returns names slower by more than threshold."""
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if not b or not b.get("per_second") or not r["per_second"]:
+            print(f"{name:40s} {r['per_second']:>14,.0f} /s   (no baseline)")
+            continue
+        ratio = r["per_second"] / b["per_second"]
+        flag = "  REGRESSION" if ratio < 1 - threshold else ""
+        print(f"{name:40s} {r['per_second']:>14,.0f} /s   x{ratio:5.2f} vs baseline{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--quick", action="store_true", help="small sizes (scaling 1k/10k/100k)")
+    p.add_argument("--sizes", default="1000,100000,10000000", help="scaling sizes, comma separated")
+    p.add_argument("--pipeline-max", type=int, default=100_000,
+                   help="largest size run through the full (per-row Python) bulk pipeline")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--only", help="comma separated groups: parse,calculate_row,fortnight,review,page,startup,scaling")
+    p.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    p.add_argument("--baseline", help="JSON from a previous run to compare against")
+    p.add_argument("--threshold", type=float, default=0.10, help="slowdown fraction counted as a regression")
+    p.add_argument("--fail-on-regression", action="store_true")
+    args = p.parse_args(argv)
+
+    sizes = [1000, 10_000, 100_000] if args.quick else [int(s) for s in args.sizes.split(",")]
+    n = 20_000 if args.quick else 200_000
+    groups = {
+        "parse": lambda: bench_parsing(n, args.repeat),
+        "calculate_row": lambda: bench_calculate_row(n // 4, args.repeat),
+        "fortnight": lambda: bench_fortnight(n // 200, args.repeat),
+        "review": lambda: bench_review_table(20, args.repeat),
+        "page": lambda: bench_review_page(args.repeat),
+        "startup": lambda: bench_startup_times(args.repeat),
+        "scaling": lambda: bench_scaling(sizes, args.pipeline_max, args.repeat),
+    }
+    only = args.only.split(",") if args.only else list(groups)
+
+    results = {}
+    for g in only:
+        t0 = time.perf_counter()
+        results.update(groups[g]())
+        print(f"[{g}] {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    print(f"wrote {args.output}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+# bulk.py
+"""Headless bulk payroll: stream per-day entries from CSV/JSON-lines, write results.
+
+    python bulk.py entries.csv -o results.csv --totals totals.csv --anchor 2025-01-06
+    python bulk.py entries.csv -o results.csv --anchor 2025-01-06 --workers 8
+    python bulk.py entries.csv -o results.csv --anchor 2025-01-06 --store timesheet.db
+    python bulk.py entries.csv -o results.parquet --totals totals.xlsx --anchor 2025-01-06
+
+Input rows are keyed by employee and date (YYYY-MM-DD) and carry the same
+fields as the Enter Timesheet page: rs_on, as_on, rs_off, as_off, worked,
+extra, sick, off, ado, plus an optional state for the public-holiday
+calendar (default NSW).  Rows must be grouped by employee and in date order
+(e.g. sorted by employee, date) so each employee-fortnight is contiguous;
+that is what keeps memory flat regardless of input size.
+
+Outputs are written a chunk at a time in the format of their extension:
+.csv (default), .parquet, .arrow/.feather or .xlsx (with a TOTAL row); see
+export.py.
+
+Every chunk is validated column-at-a-time before it is computed (see
+validation.py): rows with a bad time, duration, date, state code or
+unpaired sign-on/off are rejected, listed in the --errors index (employee,
+date, field, value, reason) and, with --quarantine, written out as input
+rows to fix and rerun.  --keep-invalid computes them anyway, as before.  A
+well-formed state with no holiday calendar is not an error: it has no
+public holidays.
+
+With --store every day is also saved, with its rating quantities, to the
+SQLite store, so a later rate change can be applied with rerate.py.
+
+With --run-dir the run is split into employee/period shards, each written
+to the run directory as it completes, and a rerun after a crash computes
+only the shards that are missing or whose input or rates changed (see
+runs.py).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import islice
+
+import numpy as np
+
+from utils import apply_flags, classify_day, long_fortnight_deduction, parse_duration, parse_minutes
+from engine import (FLAG_ADO, FLAG_LABELS, FLAG_NONE, FLAG_OFF, PEN_NO, PENALTY_LABELS, SATURDAY, SUNDAY, WEEKDAY,
+                    calculate_batch, classify_batch, quantities)
+from holiday_calendar import default_calendar, DEFAULT_STATE
+from rate_tables import default_schedule
+from metrics import METRICS, Metrics, count_cache
+from export import open_sink
+from store import TimesheetStore
+from validation import ERROR_COLS, validate_rows
+from records import ADO, DATE, N_TIMES, OFF, PENALTIES, SICK, STYLE_SHIFT, EntryBlock, decode
+
+FIELDS = ["rs_on", "as_on", "rs_off", "as_off", "worked", "extra"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+RATE_COLS = ["OT Rate", "Penalty Rate", "Special Ldg", "Sick Rate", "Loading", "Daily Rate", "Daily Count"]
+DAY_COLS = ["Employee", "Date", "Weekday", "R Sign-on", "A Sign-on", "R Sign-off", "A Sign-off",
+            "Worked", "Extra", "Sick", "Unit", "Penalty", "Special", "Holiday"] + RATE_COLS
+TOTAL_COLS = ["Employee", "Period Start", "Period End", "Days"] + RATE_COLS + ["Deduction", "Total"]
+DAY_TYPES = {"Unit": "float", **{c: "float" for c in RATE_COLS}}
+TOTAL_TYPES = {"Days": "int", **{c: "float" for c in RATE_COLS + ["Deduction", "Total"]}}
+
+INPUT_COLS = ["employee", "date", "state", *FIELDS, "sick", "off", "ado"]
+
+
+# ---------- Reading ----------
+def input_format(path, fmt=None):
+    return fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv")
+
+
+def iter_entries(path, fmt=None):
+    """Yield one dict per input row; '-' reads stdin.  fmt: 'csv' or 'jsonl' (default: by extension)."""
+    fmt = input_format(path, fmt)
+    fh = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "jsonl":
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def iter_raw(path, fmt=None):
+    """The input for compute_parallel, before any dicts are built.
+
+    Yields the CSV header first (None for JSON lines), then each row as read:
+    a list in the header's column order (a dict for JSON lines).
+    """
+    if input_format(path, fmt) == "jsonl":
+        yield None
+        yield from iter_entries(path, "jsonl")
+        return
+    fh = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        reader = csv.reader(fh)
+        yield next(reader, [])
+        yield from (r for r in reader if r)  # csv.DictReader skips blank lines too
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------- Validating ----------
+class Rejects:
+    """Where validation failures go: an error index sink and an optional quarantine sink."""
+
+    def __init__(self, errors_sink=None, quarantine_sink=None):
+        self.errors_sink, self.quarantine_sink = errors_sink, quarantine_sink
+        self.rows = self.errors = 0
+        self.sample = []  # the first few errors, for the summary
+
+    def add(self, chunk, bad, errors):
+        self.extend(*self.describe(chunk, bad, errors))
+
+    @staticmethod
+    def describe(chunk, bad, errors):
+        """(bad rows, error index rows, quarantine rows) for a validated chunk; what a pool worker sends back."""
+        index = [[str(chunk[i].get("employee") or ""), str(chunk[i].get("date") or ""), field,
+                  str(chunk[i].get(field) or ""), reason] for i, field, reason in errors]
+        quarantine = [[v if isinstance(v, bool) else str(v or "") for v in map(r.get, INPUT_COLS)]
+                      for r, b in zip(chunk, bad.tolist()) if b]
+        return int(bad.sum()), index, quarantine
+
+    def extend(self, n_bad, index, quarantine):
+        self.rows += n_bad
+        self.errors += len(index)
+        self.sample.extend(index[:5 - len(self.sample)])
+        if self.errors_sink is not None:
+            self.errors_sink.write(index)
+        if self.quarantine_sink is not None:
+            self.quarantine_sink.write(quarantine)
+
+    def summary(self, kept):
+        lines = [f"{self.rows} invalid rows ({self.errors} errors), {'computed anyway where they have an employee and date' if kept else 'rejected'}"]
+        lines += [f"  {e[0]} {e[1]} {e[2]}: {e[4]}" for e in self.sample]
+        return "\n".join(lines)
+
+
+def validated(entries, rejects, chunk_size=10_000, keep_invalid=False, metrics=METRICS):
+    """Validate the entry stream a chunk at a time and yield the rows to compute.
+
+    Invalid rows go to rejects (a Rejects) and are dropped; with keep_invalid
+    only those with a bad employee or date are.
+    """
+    for chunk in chunked(entries, chunk_size):
+        rows, bad, errors = validate_chunk(chunk, keep_invalid, metrics)
+        if errors:
+            rejects.add(chunk, bad, errors)
+        yield from rows
+
+
+def validate_chunk(chunk, keep_invalid=False, metrics=METRICS):
+    """(rows to compute, bad, errors) for one chunk of entry dicts."""
+    with metrics.timer("validate"):
+        bad, errors = validate_rows(chunk)
+    if not errors:
+        return chunk, bad, errors
+    metrics.count("invalid_rows", int(bad.sum()))
+    if keep_invalid:  # a row without a usable employee or date still cannot be computed
+        drop = {i for i, field, _ in errors if field in ("employee", "date")}
+        return [r for i, r in enumerate(chunk) if i not in drop], bad, errors
+    return [r for r, b in zip(chunk, bad.tolist()) if not b], bad, errors
+
+
+# ---------- Computing ----------
+def compute_chunk(rows, metrics=METRICS):
+    """Classify and rate a chunk (an EntryBlock, or a list of entry dicts); one list per day in DAY_COLS order.
+
+    Each output row also carries a trailing any_ado bool (not written) for the
+    long-fortnight deduction.  Days whose fields all read as plain times are
+    classified a column at a time (engine.classify_batch); the rare day with
+    OFF/ADO or unreadable text in a field goes through classify_day.
+    """
+    with metrics.timer("classify"):
+        block = rows if isinstance(rows, EntryBlock) else EntryBlock.from_rows(rows, DEFAULT_STATE)
+        n = len(block)
+        if not n:
+            return []
+        codes = np.frombuffer(block.codes, dtype=np.int16).reshape(n, len(FIELDS)).astype(np.int64)
+        bits = np.frombuffer(block.bits, dtype=np.uint16)
+        ordinals = np.frombuffer(block.dates, dtype=np.int32)
+        weekday = (ordinals + 6) % 7  # date.weekday() of a proleptic ordinal
+        day = np.select([weekday == 5, weekday == 6], [SATURDAY, SUNDAY], WEEKDAY)
+        sick, off, ado = (bits & SICK) > 0, (bits & OFF) > 0, (bits & ADO) > 0
+        flag = np.select([ado, sick | off], [FLAG_ADO, FLAG_OFF], FLAG_NONE)
+        hours = np.where(codes[:, N_TIMES:] >= 0, codes[:, N_TIMES:] // 60 + codes[:, N_TIMES:] % 60 / 60, 0.0)
+        worked = hours[:, 0]
+        any_ado = ado.copy()
+        unit, penalty, special = classify_batch(day, *codes[:, :N_TIMES].T, worked, hours[:, 1], sick | off | ado)
+
+        texts = [[decode(c, s) for c, s in zip(codes[:, k].tolist(), (bits >> (STYLE_SHIFT + 2 * k) & 3).tolist())]
+                 for k in range(len(FIELDS))]
+        for i in sorted({i for i, k in block.text if k != DATE}):
+            values = block.values(i)
+            for k, v in enumerate(values):
+                texts[k][i] = v
+            effective_values, _ = apply_flags(values, sick[i], off[i], ado[i])
+            c = classify_day(WEEKDAYS[weekday[i]], effective_values, sick[i])
+            unit[i], penalty[i], special[i] = c.unit, PENALTY_LABELS.get(c.penalty, PEN_NO), c.special == "Yes"
+            flag[i] = FLAG_LABELS.get(effective_values[0].upper(), FLAG_NONE)
+            worked[i], any_ado[i] = c.worked, c.any_ado
+
+        dates = block.date_strs()
+        chosen = np.select([ado, sick | off], ["ADO", "OFF"], "").tolist()  # apply_flags' chosen_flag
+        first = [c or t for c, t in zip(chosen, texts[0])]
+        out = [[block.employees[e], d, WEEKDAYS[w], on, *values, "Yes" if s else "No", u, PENALTIES[p],
+                "Yes" if x else "No", "No"]
+               for e, d, w, on, *values, s, u, p, x in zip(
+                   block.employee.tolist(), dates, weekday.tolist(), first, *texts[1:], sick.tolist(),
+                   unit.tolist(), penalty.tolist(), special.tolist())]
+    metrics.count("rows", n)
+    metrics.count("chunks")
+
+    # Holiday column: one vectorised calendar lookup per state present in the chunk
+    with metrics.timer("holidays"):
+        state = np.frombuffer(block.state, dtype=np.uint8)
+        for code, name in enumerate(block.states):
+            idx = np.flatnonzero(state == code)
+            holidays = default_calendar().is_holiday_array([dates[i] for i in idx.tolist()], name)
+            for i in idx[holidays].tolist():
+                out[i][13] = "Yes"
+
+    with metrics.timer("rate"):
+        # one vectorised lookup picks each day's rate table, so a chunk may span a rate change
+        rates = calculate_batch(day, flag, sick, penalty, special, unit, worked, any_ado,
+                                rates=default_schedule().columns(dates))
+        cols = [rates[k].tolist() for k in ("ot_rate", "penalty_rate", "special_loading", "sick_rate",
+                                            "loading", "daily_rate", "daily_count")]
+        for row, *amounts, a in zip(out, *cols, any_ado.tolist()):
+            row.extend(amounts)
+            row.append(a)
+    return out
+
+
+def fortnight_start(date_str, anchor):
+    d = date.fromisoformat(date_str)
+    return anchor + timedelta(days=(d - anchor).days // 14 * 14)
+
+
+class FortnightTotals:
+    """Running per employee-fortnight totals over a grouped stream of day rows.
+
+    Sums are kept in integer cents of the amounts as written (2dp), so every
+    total is exactly the sum of its displayed days, however many there are.
+    """
+
+    def __init__(self, anchor):
+        self.anchor = anchor
+        self.key = None
+
+    def _reset(self, key):
+        self.key = key
+        self.cents = [0] * len(RATE_COLS)
+        self.days = 0
+        self.any_ado = False
+
+    def _result(self):
+        employee, start = self.key
+        deduction = 0 if self.any_ado else round(long_fortnight_deduction(default_schedule().for_date(start)) * 100)
+        return [employee, start.isoformat(), (start + timedelta(days=13)).isoformat(), self.days,
+                *(c / 100 for c in self.cents), deduction / 100, (self.cents[-1] - deduction) / 100]
+
+    def add(self, row):
+        """Add one computed day; returns the finished previous fortnight's totals, if any."""
+        key = (row[0], fortnight_start(row[1], self.anchor))
+        done = None
+        if key != self.key:
+            done = self.flush()
+            self._reset(key)
+        for i, v in enumerate(row[len(DAY_COLS) - len(RATE_COLS):len(DAY_COLS)]):
+            self.cents[i] += round(v * 100)
+        self.days += 1
+        self.any_ado = self.any_ado or row[-1]
+        return done
+
+    def flush(self):
+        return self._result() if self.key is not None else None
+
+
+def compute_stream(entries, chunk_size=10_000):
+    for chunk in chunked(entries, chunk_size):
+        yield from compute_chunk(chunk)
+
+
+# ---------- Parallel ----------
+def iter_partitions(entries, anchor, fields=None):
+    """Group the (grouped) entry stream into one list per employee-fortnight.
+
+    entries are dicts, or lists in the column order fields (iter_raw).  They
+    are not validated yet: a row without a usable employee or date stays
+    with the partition around it (validation drops it in the worker).
+    """
+    if fields:  # a column the header lacks reads past the end of each row (IndexError)
+        e, d = (fields.index(c) if c in fields else len(fields) for c in ("employee", "date"))
+    else:
+        e, d = "employee", "date"
+    key, part = None, []
+    for r in entries:
+        try:
+            k = (str(r[e]), fortnight_start(str(r[d]).strip(), anchor)) if str(r[e] or "").strip() else key
+        except (KeyError, IndexError, ValueError):
+            k = key
+        if k != key and part:
+            yield part
+            part = []
+        key = k
+        part.append(r)
+    if part:
+        yield part
+
+
+def iter_tasks(partitions, chunk_size):
+    """Pack whole partitions into tasks of roughly chunk_size rows (never splitting one)."""
+    task = []
+    for part in partitions:
+        task.extend(part)
+        if len(task) >= chunk_size:
+            yield task
+            task = []
+    if task:
+        yield task
+
+
+def _work(task, fields=None, keep_invalid=False, collect_metrics=False):
+    t0 = time.perf_counter()
+    metrics = Metrics(enabled=collect_metrics)
+    since = parse_minutes.cache_info()
+    chunk = [dict(zip(fields, r)) for r in task] if fields else task
+    rows, bad, errors = validate_chunk(chunk, keep_invalid, metrics)
+    rows = compute_chunk(rows, metrics)
+    count_cache(metrics, parse_minutes, since)
+    return (os.getpid(), time.perf_counter() - t0, rows, Rejects.describe(chunk, bad, errors) if errors else None,
+            metrics.snapshot() if collect_metrics else None)
+
+
+def compute_parallel(entries, anchor, workers, chunk_size=10_000, stats=None, fields=None, rejects=None,
+                     keep_invalid=False):
+    """validated() and compute_stream across a process pool; output order matches input order.
+
+    entries are raw input rows (iter_raw: lists in the column order fields,
+    or dicts).  Workers build the dicts, validate and compute, so the main
+    process only reads, partitions and writes; invalid rows come back to
+    rejects (a Rejects) in input order.  At most 2 * workers tasks are in
+    flight, so memory stays bounded.  stats (optional dict) collects
+    pid -> [tasks, rows, busy seconds].
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def drain():
+            pid, elapsed, rows, rejected, snapshot = pending.popleft().result()
+            if rejected and rejects is not None:
+                rejects.extend(*rejected)
+            if snapshot:
+                METRICS.merge(snapshot)
+            if stats is not None:
+                s = stats.setdefault(pid, [0, 0, 0.0])
+                s[0] += 1; s[1] += len(rows); s[2] += elapsed
+            return rows
+
+        for task in iter_tasks(iter_partitions(entries, anchor, fields), chunk_size):
+            pending.append(pool.submit(_work, task, fields, keep_invalid, METRICS.enabled))
+            if len(pending) >= 2 * workers:
+                yield from drain()
+        while pending:
+            yield from drain()
+
+
+def worker_report(stats, wall):
+    lines = [f"{'worker':>8} {'tasks':>7} {'rows':>10} {'busy s':>8} {'rows/s':>10}"]
+    for pid, (tasks, rows, busy) in sorted(stats.items()):
+        lines.append(f"{pid:>8} {tasks:>7} {rows:>10} {busy:>8.2f} {rows / busy if busy else 0:>10.0f}")
+    total = sum(s[1] for s in stats.values())
+    lines.append(f"{'all':>8} {sum(s[0] for s in stats.values()):>7} {total:>10} {wall:>8.2f} "
+                 f"{total / wall if wall else 0:>10.0f}")
+    return "\n".join(lines)
+
+
+# ---------- Writing ----------
+def store_rows(store, rows, anchor):
+    """Save computed day rows, with their rating quantities, in one transaction."""
+    q = quantities(day=[r[2] for r in rows], flag=[r[3] for r in rows], sick=[r[9] for r in rows],
+                   penalty=[r[11] for r in rows], special=[r[12] for r in rows], unit=[r[10] for r in rows],
+                   worked=[parse_duration(r[7]) for r in rows], any_ado=[r[-1] for r in rows])
+    qty = zip(*(q[k].tolist() for k in ("day", "flag", "sick", "any_ado", "penalty_hours")))
+    store.save_day_results([
+        (r[0], r[1], fortnight_start(r[1], anchor).isoformat(), *r[10:len(DAY_COLS)], *extra)
+        for r, extra in zip(rows, qty)
+    ])
+
+
+def run(entries, day_sink, totals_sink=None, anchor=None, chunk_size=10_000, rows=None, store=None):
+    """Drive the pipeline; rows defaults to compute_stream(entries). Returns (days, fortnights).
+
+    day_sink/totals_sink are export sinks (export.open_sink); each gets
+    chunk_size rows per write, and store (a TimesheetStore) every day,
+    chunk_size days per transaction.
+    """
+    totals = FortnightTotals(anchor) if totals_sink is not None else None
+    n_days = n_fortnights = 0
+    pending, done_totals = [], []
+    for row in (compute_stream(entries, chunk_size) if rows is None else rows):
+        pending.append(row)
+        if totals is not None:
+            done = totals.add(row)
+            if done:
+                done_totals.append(done)
+        if len(pending) >= chunk_size:
+            n_days += _flush(pending, day_sink, store, anchor)
+            pending = []
+        if len(done_totals) >= chunk_size:
+            totals_sink.write(done_totals)
+            n_fortnights += len(done_totals)
+            done_totals = []
+    if pending:
+        n_days += _flush(pending, day_sink, store, anchor)
+    done = totals.flush() if totals is not None else None
+    if done:
+        done_totals.append(done)
+    if done_totals:
+        totals_sink.write(done_totals)
+        n_fortnights += len(done_totals)
+    return n_days, n_fortnights
+
+
+def _flush(rows, day_sink, store, anchor):
+    day_sink.write(row[:-1] for row in rows)
+    if store is not None:
+        store_rows(store, rows, anchor)
+    return len(rows)
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Bulk timesheet import and payroll computation.")
+    p.add_argument("input", help="CSV or JSON-lines file of per-day entries ('-' for stdin)")
+    p.add_argument("-o", "--output",
+                   help="per-day results: .csv, .parquet, .arrow or .xlsx (default: CSV on stdout)")
+    p.add_argument("--totals", help="per employee-fortnight totals (.csv, .parquet, .arrow or .xlsx)")
+    p.add_argument("--anchor", type=date.fromisoformat,
+                   help="any fortnight start date (YYYY-MM-DD); required with --totals")
+    p.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: by extension)")
+    p.add_argument("--chunk-size", type=int, default=10_000, help="rows per processing chunk")
+    p.add_argument("--workers", type=int, default=1,
+                   help="worker processes; >1 partitions by employee-fortnight and validates and computes in "
+                        "the workers, while reading and writing stay in this process (requires --anchor)")
+    p.add_argument("--store", help="also save every day, with its rating quantities, to this SQLite store "
+                                   "(requires --anchor)")
+    p.add_argument("--errors", help="write the validation error index (employee, date, field, value, reason) "
+                                    "here: .csv, .parquet, .arrow or .xlsx")
+    p.add_argument("--quarantine", help="write invalid input rows here as CSV (or .parquet/.arrow/.xlsx), "
+                                        "to fix and rerun")
+    p.add_argument("--keep-invalid", action="store_true",
+                   help="compute invalid rows anyway (bad cells read as blank/0) instead of rejecting them; "
+                        "rows with a bad employee or date are still rejected")
+    p.add_argument("--run-dir", help="checkpointed, resumable run: write each employee/period shard here and "
+                                     "skip shards already complete (see runs.py; requires --anchor)")
+    p.add_argument("--period-fortnights", type=int, default=26, help="fortnights per shard period (--run-dir)")
+    p.add_argument("--shard-employees", type=int, default=200,
+                   help="average employees per shard (--run-dir); bounds memory on average")
+    p.add_argument("--shard-format", choices=["csv", "parquet", "arrow", "xlsx"], default="csv",
+                   help="shard file format (--run-dir)")
+    p.add_argument("--metrics", help="write stage timings/counters to this file (.json, else Prometheus text)")
+    return p
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.totals or args.workers > 1 or args.store or args.run_dir) and not args.anchor:
+        parser.error("--anchor is required with --totals, --workers, --store or --run-dir")
+    if args.run_dir:
+        if args.output or args.totals or args.store or args.errors or args.quarantine:
+            parser.error("--run-dir writes its own shard files; drop -o, --totals, --store, --errors and --quarantine")
+        return main_run_dir(args)
+
+    day_sink = open_sink(args.output or "-", DAY_COLS, DAY_TYPES, totals=RATE_COLS)
+    totals_sink = open_sink(args.totals, TOTAL_COLS, TOTAL_TYPES, totals=TOTAL_COLS[4:]) if args.totals else None
+    if args.metrics:
+        METRICS.enabled = True
+    since = parse_minutes.cache_info()
+    rejects = Rejects(open_sink(args.errors, ERROR_COLS) if args.errors else None,
+                      open_sink(args.quarantine, INPUT_COLS) if args.quarantine else None)
+    stats, entries, rows = {}, None, None
+    if args.workers > 1:
+        raw = iter_raw(args.input, args.format)
+        rows = compute_parallel(raw, args.anchor, args.workers, args.chunk_size, stats, next(raw), rejects,
+                                args.keep_invalid)
+    else:
+        entries = validated(iter_entries(args.input, args.format), rejects, args.chunk_size, args.keep_invalid)
+    t0 = time.perf_counter()
+    try:
+        with METRICS.timer("run"):
+            n_days, n_fortnights = run(entries, day_sink, totals_sink, args.anchor, args.chunk_size, rows,
+                                       TimesheetStore(args.store) if args.store else None)
+    finally:
+        for sink in (day_sink, totals_sink, rejects.errors_sink, rejects.quarantine_sink):
+            if sink is not None:
+                sink.close()
+    print(f"{n_days} days, {n_fortnights} fortnights", file=sys.stderr)
+    if rejects.rows:
+        print(rejects.summary(args.keep_invalid), file=sys.stderr)
+    if stats:
+        print(worker_report(stats, time.perf_counter() - t0), file=sys.stderr)
+    if args.metrics:
+        count_cache(METRICS, parse_minutes, since)
+        METRICS.write(args.metrics)
+
+
+def main_run_dir(args):
+    from runs import run_sharded
+    if args.metrics:
+        METRICS.enabled = True
+    t0 = time.perf_counter()
+    with METRICS.timer("run"):
+        m = run_sharded(iter_entries(args.input, args.format), args.run_dir, args.anchor, args.period_fortnights,
+                        args.shard_employees, args.shard_format, args.workers, args.chunk_size, args.keep_invalid)
+    print(f"{len(m['shards'])} shards: {m['computed']} computed, {m['skipped']} already complete; "
+          f"{m['days']} days, {m['fortnights']} fortnights, {m['invalid_rows']} invalid rows "
+          f"in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    if args.metrics:
+        METRICS.write(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
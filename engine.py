@@ -0,0 +1,290 @@
+# engine.py
+"""Columnar (NumPy) version of utils.calculate_row for whole fortnights or workforces."""
+import numpy as np
+
+from utils import current_rates
+
+# Day types / first-field flags / penalty classes as small integer codes
+WEEKDAY, SATURDAY, SUNDAY = 0, 1, 2
+FLAG_NONE, FLAG_OFF, FLAG_ADO = 0, 1, 2
+PEN_NO, PEN_AFTERNOON, PEN_NIGHT, PEN_MORNING = 0, 1, 2, 3
+
+DAY_LABELS = {"Saturday": SATURDAY, "Sunday": SUNDAY}
+FLAG_LABELS = {"OFF": FLAG_OFF, "ADO": FLAG_ADO}
+PENALTY_LABELS = {"Afternoon": PEN_AFTERNOON, "Night": PEN_NIGHT, "Morning": PEN_MORNING}
+
+COMPONENTS = ["ot_rate", "penalty_rate", "special_loading", "sick_rate", "daily_rate", "loading", "daily_count"]
+
+
+# ---------- Helpers ----------
+def _codes(arr, labels, default=0, upper=False):
+    """Accept integer codes as-is; map string labels (anything unknown -> default)."""
+    arr = np.asarray(arr)
+    if arr.dtype.kind in "iub":
+        return arr.astype(np.int8)
+    out = np.full(arr.shape, default, dtype=np.int8)
+    text = np.char.upper(arr.astype(str)) if upper else arr.astype(str)
+    for label, code in labels.items():
+        out[text == label] = code
+    return out
+
+
+def _bools(arr):
+    arr = np.asarray(arr)
+    if arr.dtype.kind in "US" or arr.dtype == object:
+        return np.isin(arr.astype(str), ["Yes", "True", "true", "1"])
+    return arr.astype(bool)
+
+
+def round_cents(x):
+    """Vectorised round(x, 2) * 100 as exact int64 cents, matching Python's correctly-rounded builtin.
+
+    np.round scales by 100 first, which can land exactly on .5 through
+    floating error; the exact error of that product (Dekker two-product)
+    decides those ties the same way the builtin does.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    p = x * 100.0
+    c = x * 134217729.0
+    hi = c - (c - x)
+    lo = x - hi
+    err = (hi * 100.0 - p) + lo * 100.0
+    r = np.rint(p)
+    tie = (p - np.floor(p)) == 0.5
+    r = np.where(tie & (err > 0), np.ceil(p), r)
+    r = np.where(tie & (err < 0), np.floor(p), r)
+    return r.astype(np.int64)
+
+
+def round2(x):
+    """Vectorised round(x, 2) that matches Python's correctly-rounded builtin."""
+    return round_cents(x) / 100.0
+
+
+# ---------- Batch API ----------
+def calculate_batch(day, flag, sick, penalty, special, unit, worked, any_ado=None, rates=None):
+    """Array form of calculate_row.
+
+    day      weekday name or WEEKDAY/SATURDAY/SUNDAY code
+    flag     effective first field ("ADO"/"OFF"/anything) or FLAG_* code
+    sick     bool
+    penalty  "No"/"Afternoon"/"Night"/"Morning" or PEN_* code
+    special  "Yes"/"No" or bool
+    unit     float hours (already rounded to 2dp, as the pages do)
+    worked   float hours from parse_duration (0 -> 8h default)
+    any_ado  any field is "ADO"; defaults to flag == ADO
+    rates    rate table: a dict of amounts (one table for every row, e.g. the
+             period's) or of per-row arrays (rate_tables.RateSchedule.columns);
+             defaults to utils.current_rates()
+
+    Returns a dict of float arrays keyed by COMPONENTS, in calculate_row order.
+    """
+    day = _codes(day, DAY_LABELS)
+    flag = _codes(flag, FLAG_LABELS, upper=True)
+    penalty = _codes(penalty, PENALTY_LABELS)
+    sick = _bools(sick)
+    special = _bools(special)
+    unit = np.asarray(unit, dtype=np.float64)
+    worked = np.asarray(worked, dtype=np.float64)
+    any_ado = flag == FLAG_ADO if any_ado is None else _bools(any_ado)
+
+    rc = current_rates() if rates is None else rates
+    sat, sun = day == SATURDAY, day == SUNDAY
+    weekend = sat | sun
+    is_ado = flag == FLAG_ADO
+    off_or_ado = flag != FLAG_NONE
+    nonneg = unit >= 0
+
+    ot_mult = np.select(
+        [is_ado & nonneg, ~off_or_ado & nonneg, sat, sun,
+         (penalty == PEN_AFTERNOON) | (penalty == PEN_MORNING), penalty == PEN_NIGHT],
+        [rc["ADO Adjustment"], np.where(weekend, rc["OT 200%"], rc["OT 150%"]),
+         rc["Sat Loading 50%"] + rc["Ordinary Hours"], rc["Sun Loading 100%"] + rc["Ordinary Hours"],
+         rc["Afternoon Shift"] + rc["Ordinary Hours"], rc["Night Shift"] + rc["Ordinary Hours"]],
+        default=rc["Ordinary Hours"],
+    )
+    ot_rate = round2(unit * ot_mult)
+
+    penalty_hours = np.floor(np.where(worked == 0, 8.0, worked))
+    pen_mult = np.select(
+        [penalty == PEN_AFTERNOON, penalty == PEN_NIGHT, penalty == PEN_MORNING],
+        [rc["Afternoon Shift"], rc["Night Shift"], rc["Early Morning"]],
+        default=0.0,
+    )
+    penalty_rate = np.where(penalty == PEN_NO, 0.0, round2(penalty_hours * pen_mult))
+
+    special_loading = np.where(special, round2(rc["Special Loading"]), 0.0)
+    sick_rate = np.where(sick, round2(8 * rc["Sick With MC"]), 0.0)
+    daily_rate = np.where(off_or_ado, 0.0, round2(8 * rc["Ordinary Hours"]))
+    daily_rate = daily_rate + np.where(any_ado, round2(4 * rc["Ordinary Hours"]), 0.0)
+
+    loading = np.select(
+        [~off_or_ado & sat, ~off_or_ado & sun],
+        [round2(8 * rc["Sat Loading 50%"]), round2(8 * rc["Sun Loading 100%"])],
+        default=0.0,
+    )
+
+    daily_count = ot_rate + penalty_rate + special_loading + sick_rate + daily_rate + loading
+    return dict(zip(COMPONENTS, (ot_rate, penalty_rate, special_loading, sick_rate,
+                                 daily_rate, loading, daily_count)))
+
+
+# ---------- Classification ----------
+def classify_batch(day, rs_on, as_on, rs_off, as_off, worked, extra, blocked):
+    """Array form of utils.classify_day over parsed times (same results).
+
+    day       WEEKDAY/SATURDAY/SUNDAY code (or weekday name)
+    rs_on..   minutes since midnight, -1 where blank or unreadable
+    worked    hours from parse_duration (0 when blank), likewise extra
+    blocked   the day is ADO, OFF or sick (no unit, penalty or special)
+
+    Returns (unit, penalty, special): unit rounded to 2dp, penalty PEN_*
+    codes and special bools, ready for calculate_batch.
+    """
+    day = _codes(day, DAY_LABELS)
+    rs_on, as_on, rs_off, as_off = (np.asarray(a, dtype=np.int64) for a in (rs_on, as_on, rs_off, as_off))
+    worked = np.asarray(worked, dtype=np.float64)
+    extra = np.asarray(extra, dtype=np.float64)
+    blocked = np.asarray(blocked, dtype=bool)
+    weekday = day == WEEKDAY
+
+    rs_end = np.where(rs_off < rs_on, rs_off + 1440, rs_off)
+    as_end = np.where(as_off < as_on, as_off + 1440, as_off)
+    have = (rs_on >= 0) & (rs_off >= 0) & (as_on >= 0) & (as_off >= 0)
+    lift_up = as_on < rs_on
+    lay_back = ~lift_up & (as_end > rs_end)
+    built_up = ~lift_up & ~lay_back & (as_end - as_on < rs_end - rs_on)
+    delta = np.select([lift_up, lay_back, built_up],
+                      [(rs_end - as_end) / 60, np.abs((as_on - rs_on) / 60), np.abs((rs_end - rs_on) / 60) - 8],
+                      default=0.0)
+    worked_use = np.where((worked != 0) & ~built_up, worked, 8)
+    unit = round2(np.where(have & ~blocked, delta + (worked_use - 8) + extra, 0.0))
+
+    timed = ~blocked & weekday & (as_on >= 0) & (as_off >= 0)
+    penalty = np.select(
+        [timed & ((as_on >= 1080) | (as_on <= 239)), timed & (as_on >= 240) & (as_on <= 330),
+         timed & (as_on <= 1080) & (as_end >= 1080)],
+        [PEN_NIGHT, PEN_MORNING, PEN_AFTERNOON], default=PEN_NO).astype(np.int8)
+    special = ~blocked & weekday & (((as_on >= 61) & (as_on <= 239)) | ((as_off >= 61) & (as_off <= 239)))
+    return unit, penalty, special
+
+
+# ---------- Re-rating from stored quantities ----------
+# Every component is round(quantity * rate, 2) where the rate is one table
+# entry or a sum of two, so a day reduces to a few small codes and hours, and
+# a rate table reduces to DERIVED = COEFFICIENTS @ table: one row per OT class,
+# penalty class and fixed amount.  Re-rating is that product plus a gather.
+QUANTITY_COLS = ["day", "flag", "sick", "penalty", "special", "unit", "penalty_hours", "any_ado"]
+
+OT_MIX = [("ADO Adjustment",), ("OT 150%",), ("OT 200%",),
+          ("Sat Loading 50%", "Ordinary Hours"), ("Sun Loading 100%", "Ordinary Hours"),
+          ("Afternoon Shift", "Ordinary Hours"), ("Night Shift", "Ordinary Hours"), ("Ordinary Hours",)]
+PENALTY_MIX = [(), ("Afternoon Shift",), ("Night Shift",), ("Early Morning",)]  # by PEN_* code
+FIXED_AMOUNTS = [("Special Loading", 1), ("Sick With MC", 8), ("Ordinary Hours", 8), ("Ordinary Hours", 4),
+                 ("Sat Loading 50%", 8), ("Sun Loading 100%", 8)]
+
+
+def quantities(day, flag, sick, penalty, special, unit, worked, any_ado=None):
+    """calculate_batch's inputs reduced to the per-day record kept for re-rating (QUANTITY_COLS)."""
+    flag = _codes(flag, FLAG_LABELS, upper=True)
+    worked = np.asarray(worked, dtype=np.float64)
+    return {
+        "day": _codes(day, DAY_LABELS),
+        "flag": flag,
+        "sick": _bools(sick),
+        "penalty": _codes(penalty, PENALTY_LABELS),
+        "special": _bools(special),
+        "unit": np.asarray(unit, dtype=np.float64),
+        "penalty_hours": np.floor(np.where(worked == 0, 8.0, worked)),
+        "any_ado": flag == FLAG_ADO if any_ado is None else _bools(any_ado),
+    }
+
+
+def coefficients(names):
+    """(OT classes + penalty classes + fixed amounts) x rate names; names orders the table columns."""
+    col = {n: j for j, n in enumerate(names)}
+    rows = [[(n, 1.0) for n in mix] for mix in OT_MIX + PENALTY_MIX] + [[(n, float(k))] for n, k in FIXED_AMOUNTS]
+    c = np.zeros((len(rows), len(names)))
+    for i, terms in enumerate(rows):
+        for n, k in terms:
+            c[i, col[n]] = k
+    return c
+
+
+_PRODUCTS = {}
+
+
+def rate_products(names, table):
+    """Per-table products, computed once per rate table and reused by every block.
+
+    Returns (ot, penalty, fixed): the OT_MIX and PENALTY_MIX multipliers as
+    (classes, V) floats, and the FIXED_AMOUNTS (8 x Ordinary Hours, Sat/Sun
+    loadings, sick rate, ...) already rounded to int64 cents, (amounts, V).
+    """
+    table = np.atleast_2d(np.asarray(table, dtype=np.float64))
+    key = (tuple(names), table.shape, table.tobytes())
+    products = _PRODUCTS.get(key)
+    if products is None:
+        derived = coefficients(names) @ table.T
+        n_ot, n_pen = len(OT_MIX), len(PENALTY_MIX)
+        products = (derived[:n_ot], derived[n_ot:n_ot + n_pen], round_cents(derived[n_ot + n_pen:]))
+        if len(_PRODUCTS) >= 32:
+            _PRODUCTS.clear()
+        _PRODUCTS[key] = products
+    return products
+
+
+def rerate(q, names, table, version=None, cents=False):
+    """Dollars from a quantities() record against a rate table, same results as calculate_batch.
+
+    table    amounts in `names` order: one table (R,) or several (V, R), e.g.
+             RateSchedule.matrix
+    version  per-row index into the V tables (RateSchedule.index_array); None
+             rates every row at table 0
+    cents    return int64 cents instead of float dollars; daily_count is then
+             the exact sum of the displayed components
+    """
+    ot_mult, pen_mult, fixed = rate_products(names, table)
+    v = 0 if version is None else np.asarray(version)
+
+    sat, sun = q["day"] == SATURDAY, q["day"] == SUNDAY
+    off_or_ado = q["flag"] != FLAG_NONE
+    nonneg = q["unit"] >= 0
+    ot_class = np.select(
+        [(q["flag"] == FLAG_ADO) & nonneg, ~off_or_ado & nonneg & ~(sat | sun), ~off_or_ado & nonneg,
+         sat, sun, (q["penalty"] == PEN_AFTERNOON) | (q["penalty"] == PEN_MORNING), q["penalty"] == PEN_NIGHT],
+        [0, 1, 2, 3, 4, 5, 6], default=7,
+    )
+    ot_rate = round_cents(q["unit"] * ot_mult[ot_class, v])
+    penalty_rate = round_cents(q["penalty_hours"] * pen_mult[q["penalty"], v])
+
+    special_loading = np.where(q["special"], fixed[0, v], 0)
+    sick_rate = np.where(q["sick"], fixed[1, v], 0)
+    daily_rate = np.where(off_or_ado, 0, fixed[2, v]) + np.where(q["any_ado"], fixed[3, v], 0)
+    loading = np.where(~off_or_ado & sat, fixed[4, v], np.where(~off_or_ado & sun, fixed[5, v], 0))
+
+    parts = [ot_rate, penalty_rate, special_loading, sick_rate, daily_rate, loading]
+    if not cents:
+        parts = [p / 100.0 for p in parts]
+    return dict(zip(COMPONENTS, (*parts, sum(parts))))
+
+
+# ---------- Fixed-point mode ----------
+def calculate_cents(day, flag, sick, penalty, special, unit, worked, any_ado=None, rates=None, dates=None):
+    """calculate_batch in exact int64 cents (same inputs; the components match it to the cent).
+
+    rates    one rate table dict (default utils.current_rates()) or a
+             rate_tables.RateSchedule, with dates picking each row's table
+
+    Every product of hours and a rate is rounded to cents once, and the fixed
+    amounts come precomputed per table (rate_products), so totals over any
+    number of rows are plain integer sums: period.sum() equals the sum of the
+    displayed rows exactly.
+    """
+    q = quantities(day, flag, sick, penalty, special, unit, worked, any_ado)
+    if hasattr(rates, "matrix"):
+        version = None if dates is None else rates.index_array(dates)
+        return rerate(q, rates.names, rates.matrix, version, cents=True)
+    rc = current_rates() if rates is None else rates
+    return rerate(q, list(rc), [rc[n] for n in rc], cents=True)
+
@@ -0,0 +1,186 @@
+# export.py
+"""Streaming writers for computed payroll rows: CSV, Parquet/Arrow and Excel.
+
+    with open_sink("results.parquet", columns, types) as sink:
+        for chunk in computed_chunks:
+            sink.write(chunk)
+
+Rows are written a chunk at a time as the pipeline produces them, so an
+export never holds more than one chunk (and never a styled DataFrame).
+The format follows the file extension: .csv (default), .parquet,
+.arrow/.feather (Arrow IPC file) or .xlsx.  types maps column names to
+"float", "int" or "bool"; anything else is text.  CSV formats floats to
+2dp and bools as Yes/No, like the pages; Parquet/Arrow keep them typed.
+Excel keeps numbers numeric (shown to 2dp) and ends with a TOTAL row.
+
+pyarrow (installed with streamlit) and XlsxWriter are imported only when
+their format is used.
+"""
+import csv
+import os
+import sys
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".xlsx": "xlsx"}
+MIME = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet",
+        "arrow": "application/vnd.apache.arrow.file",
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
+TOTAL_FILL = "D0FFD0"  # same green as the on-screen TOTAL row
+
+
+def format_of(path):
+    return FORMATS.get(os.path.splitext(str(path))[1].lower(), "csv")
+
+
+def _text(v):
+    if isinstance(v, bool):
+        return "Yes" if v else "No"
+    if isinstance(v, float):
+        return f"{v:.2f}"
+    return "" if v is None else v
+
+
+class Sink:
+    """Base writer: write(rows) per chunk, close() once; usable as a context manager."""
+
+    def __init__(self, columns, types=None):
+        self.columns = list(columns)
+        self.types = types or {}
+        self.rows = 0
+
+    def write(self, rows):
+        raise NotImplementedError
+
+    def close(self, total_row=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(Sink):
+    def __init__(self, target, columns, types=None):
+        super().__init__(columns, types)
+        self._own = isinstance(target, (str, os.PathLike)) and target != "-"
+        if target == "-":
+            self._fh = sys.stdout
+        elif self._own:
+            self._fh = open(target, "w", newline="", encoding="utf-8")
+        else:
+            self._fh = target
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(self.columns)
+
+    def write(self, rows):
+        rows = [[_text(v) for v in r] for r in rows]
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self, total_row=None):
+        if self._own:
+            self._fh.close()
+        else:
+            self._fh.flush()
+
+
+class ArrowSink(Sink):
+    """Parquet (one row group per chunk) or an Arrow IPC file (one record batch per chunk)."""
+
+    def __init__(self, target, columns, types=None, fmt="parquet"):
+        super().__init__(columns, types)
+        import pyarrow as pa
+        kinds = {"float": pa.float64(), "int": pa.int64(), "bool": pa.bool_()}
+        self._pa = pa
+        self.schema = pa.schema([(c, kinds.get(self.types.get(c), pa.string())) for c in self.columns])
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(target, self.schema)
+            self._write = self._writer.write_batch
+        else:
+            self._writer = pa.ipc.new_file(target, self.schema)
+            self._write = self._writer.write_batch
+
+    def write(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        arrays = [self._pa.array([r[j] for r in rows], type=f.type) for j, f in enumerate(self.schema)]
+        self._write(self._pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self, total_row=None):
+        self._writer.close()
+
+
+class ExcelSink(Sink):
+    """A constant-memory .xlsx (each row is flushed as it is written) ending in a TOTAL row.
+
+    The TOTAL row sums the `totals` columns in integer cents as rows stream
+    past, unless close() is given the row to write (e.g. with a deduction).
+    """
+    MAX_ROWS = 1_048_574  # a worksheet's limit, less the header and TOTAL rows
+
+    def __init__(self, target, columns, types=None, totals=(), sheet="Payroll"):
+        super().__init__(columns, types)
+        import xlsxwriter
+        file_target = isinstance(target, (str, os.PathLike))
+        self._wb = xlsxwriter.Workbook(target, {"constant_memory": True} if file_target else {"in_memory": True})
+        self._ws = self._wb.add_worksheet(sheet)
+        self._money = self._wb.add_format({"num_format": "0.00"})
+        self._total = self._wb.add_format({"bold": True, "bg_color": "#" + TOTAL_FILL, "num_format": "0.00"})
+        self._floats = [j for j, c in enumerate(self.columns) if self.types.get(c) == "float"]
+        self._summed = [self.columns.index(c) for c in totals]
+        self._cents = [0] * len(self._summed)
+        self._ws.write_row(0, 0, self.columns, self._wb.add_format({"bold": True}))
+        for j in self._floats:
+            self._ws.set_column(j, j, None, self._money)
+
+    def write(self, rows):
+        ws, summed, cents = self._ws, self._summed, self._cents
+        for r in rows:
+            if self.rows >= self.MAX_ROWS:
+                raise ValueError(f"more than {self.MAX_ROWS} rows do not fit in one worksheet; "
+                                 f"export to .parquet or .csv instead")
+            for k, j in enumerate(summed):
+                cents[k] += round(r[j] * 100)
+            self.rows += 1
+            ws.write_row(self.rows, 0, [("Yes" if v else "No") if isinstance(v, bool) else v for v in r])
+
+    def close(self, total_row=None):
+        if total_row is None:
+            total_row = [""] * len(self.columns)
+            total_row[0] = "TOTAL"
+            for k, j in enumerate(self._summed):
+                total_row[j] = self._cents[k] / 100
+        self._ws.write_row(self.rows + 1, 0, ["" if v is None else v for v in total_row], self._total)
+        self._wb.close()
+
+
+def open_sink(target, columns, types=None, fmt=None, totals=()):
+    """Sink for target (path, '-' for stdout, or a file object: text for CSV, binary otherwise).
+
+    fmt defaults to the extension; totals names the columns summed into the
+    Excel TOTAL row.
+    """
+    fmt = fmt or format_of(target)
+    if fmt == "xlsx":
+        return ExcelSink(target, columns, types, totals)
+    if fmt in ("parquet", "arrow"):
+        return ArrowSink(target, columns, types, fmt)
+    return CsvSink(target, columns, types)
+
+
+def to_bytes(rows, columns, types=None, fmt="csv", totals=(), total_row=None, chunk_size=10_000):
+    """Export rows (any iterable) into an in-memory file, e.g. for st.download_button."""
+    import io
+    from itertools import islice
+    buf = io.StringIO() if fmt == "csv" else io.BytesIO()
+    sink = open_sink(buf, columns, types, fmt, totals)
+    it = iter(rows)
+    while chunk := list(islice(it, chunk_size)):
+        sink.write(chunk)
+    sink.close(total_row)
+    data = buf.getvalue()
+    return data.encode("utf-8") if fmt == "csv" else data
@@ -0,0 +1,91 @@
+# holiday_calendar.py
+"""Public holidays for several years and states, loaded from data/holidays.csv.
+
+Each state's holidays are compiled into one boolean array with a slot per
+day from 1 January of the first year to 31 December of the last, so a lookup
+is a subtraction and an index (scalar) or a single fancy-index (a whole date
+column).  Dates outside the covered years are never holidays.
+
+The bundled file has NSW only (2024-2027).  Any other state is accepted
+and treated as holiday-free until its rows are added to the CSV; holidays
+only mark the Holiday column and do not change any rate.
+"""
+import csv
+import hashlib
+import os
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+HOLIDAYS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "holidays.csv")
+DEFAULT_STATE = "NSW"
+
+
+class HolidayCalendar:
+    def __init__(self, holidays):
+        """holidays: iterable of (date, state) pairs."""
+        by_state = {}
+        for d, state in holidays:
+            by_state.setdefault(state, []).append(d)
+
+        self._tables = {}
+        for state, days in by_state.items():
+            first = date(min(days).year, 1, 1)
+            last = date(max(days).year, 12, 31)
+            table = np.zeros(last.toordinal() - first.toordinal() + 1, dtype=bool)
+            table[[d.toordinal() - first.toordinal() for d in days]] = True
+            self._tables[state] = (first.toordinal(), np.datetime64(first, "D"), table)
+        # changes whenever any holiday does (keys cached and checkpointed results)
+        self.fingerprint = hashlib.blake2b(
+            repr(sorted((s, sorted(d.isoformat() for d in days)) for s, days in by_state.items())).encode(),
+            digest_size=8).hexdigest()
+
+    @classmethod
+    def from_csv(cls, path=HOLIDAYS_CSV):
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls((date.fromisoformat(r["date"]), r["state"].strip().upper())
+                       for r in csv.DictReader(f))
+
+    @property
+    def states(self):
+        return sorted(self._tables)
+
+    def years(self, state=DEFAULT_STATE):
+        """Years covered for state (empty for a state with no holidays on file)."""
+        if state not in self._tables:
+            return range(0)
+        base, _, table = self._tables[state]
+        first = date.fromordinal(base).year
+        return range(first, date.fromordinal(base + len(table) - 1).year + 1)
+
+    def is_holiday(self, d, state=DEFAULT_STATE):
+        """d: date or 'YYYY-MM-DD'."""
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        if state not in self._tables:  # no holidays on file for this state
+            return False
+        base, _, table = self._tables[state]
+        i = d.toordinal() - base
+        return 0 <= i < len(table) and bool(table[i])
+
+    def is_holiday_array(self, dates, state=DEFAULT_STATE):
+        """Vectorised is_holiday over a date column (datetime64, date objects or ISO strings)."""
+        if state not in self._tables:
+            return np.zeros(len(dates), dtype=bool)
+        _, base, table = self._tables[state]
+        idx = (np.asarray(dates, dtype="datetime64[D]") - base).astype(np.int64)
+        inside = (idx >= 0) & (idx < len(table))
+        out = np.zeros(idx.shape, dtype=bool)
+        out[inside] = table[idx[inside]]
+        return out
+
+
+@lru_cache(maxsize=None)
+def default_calendar():
+    """The bundled calendar, loaded once per process."""
+    return HolidayCalendar.from_csv()
+
+
+def is_public_holiday(d, state=DEFAULT_STATE):
+    return default_calendar().is_holiday(d, state)
@@ -0,0 +1,149 @@
+# metrics.py
+"""Stage timers and counters for the calculation pipeline.
+
+    m = Metrics(enabled=True)
+    with m.timer("classify"):
+        ...
+    m.count("dirty_days", 3)
+
+A disabled Metrics hands back one shared no-op context manager and returns
+immediately from count(), so instrumented code pays a method call per
+stage (not per row) when timing is off.  Snapshots export as JSON or as
+Prometheus text exposition.
+
+Given buckets (e.g. LATENCY_BUCKETS), every stage also keeps a latency
+histogram, exported as a Prometheus histogram for quantiles.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+_NULL = nullcontext()
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=False, buckets=()):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)  # histogram upper bounds, in seconds; empty for none
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}    # name -> [calls, total seconds, max seconds]
+            self.counters = {}  # name -> int
+            self.histograms = {}  # name -> count per bucket, the last one +Inf
+
+    def timer(self, name):
+        return _Timer(self, name) if self.enabled else _NULL
+
+    def observe(self, name, seconds):
+        with self._lock:
+            s = self.stages.setdefault(name, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+            if self.buckets:
+                h = self.histograms.setdefault(name, [0] * (len(self.buckets) + 1))
+                h[bisect_left(self.buckets, seconds)] += 1
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {k: {"calls": c, "seconds": t, "max_seconds": m} for k, (c, t, m) in self.stages.items()},
+                "counters": dict(self.counters),
+                **({"buckets": list(self.buckets), "histograms": {k: list(h) for k, h in self.histograms.items()}}
+                   if self.buckets else {}),
+            }
+
+    def merge(self, snapshot):
+        """Fold in a snapshot from elsewhere (e.g. a worker process)."""
+        with self._lock:
+            for k, v in snapshot["stages"].items():
+                s = self.stages.setdefault(k, [0, 0.0, 0.0])
+                s[0] += v["calls"]
+                s[1] += v["seconds"]
+                s[2] = max(s[2], v["max_seconds"])
+            for k, v in snapshot["counters"].items():
+                self.counters[k] = self.counters.get(k, 0) + v
+            if self.buckets and tuple(snapshot.get("buckets", ())) == self.buckets:
+                for k, v in snapshot["histograms"].items():
+                    h = self.histograms.setdefault(k, [0] * len(v))
+                    h[:] = [a + b for a, b in zip(h, v)]
+
+    # ---------- export ----------
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="timesheet"):
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Time spent in each pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{k}"}} {v["seconds"]:.6f}' for k, v in snap["stages"].items()]
+        lines += [f"# HELP {prefix}_stage_calls_total Times each pipeline stage ran.",
+                  f"# TYPE {prefix}_stage_calls_total counter"]
+        lines += [f'{prefix}_stage_calls_total{{stage="{k}"}} {v["calls"]}' for k, v in snap["stages"].items()]
+        lines += [f"# HELP {prefix}_stage_seconds_max Slowest single run of each stage.",
+                  f"# TYPE {prefix}_stage_seconds_max gauge"]
+        lines += [f'{prefix}_stage_seconds_max{{stage="{k}"}} {v["max_seconds"]:.6f}' for k, v in snap["stages"].items()]
+        lines += [f"# HELP {prefix}_events_total Pipeline event counters.",
+                  f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{name="{k}"}} {v}' for k, v in snap["counters"].items()]
+        if snap.get("histograms"):
+            lines += [f"# HELP {prefix}_stage_latency_seconds Distribution of single runs of each stage.",
+                      f"# TYPE {prefix}_stage_latency_seconds histogram"]
+            for k, h in snap["histograms"].items():
+                running = 0
+                for le, n in zip([*map(str, self.buckets), "+Inf"], h):
+                    running += n
+                    lines.append(f'{prefix}_stage_latency_seconds_bucket{{stage="{k}",le="{le}"}} {running}')
+                lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{k}"}} {snap["stages"][k]["seconds"]:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{k}"}} {running}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write JSON (.json) or Prometheus text (anything else, e.g. .prom)."""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def count_cache(metrics, fn, since):
+    """Count lru_cache hits/misses on fn (e.g. parse_minutes) since the cache_info() `since`."""
+    if not metrics.enabled:
+        return
+    info = fn.cache_info()
+    metrics.count(f"{fn.__name__}_cache_hits", info.hits - since.hits)
+    metrics.count(f"{fn.__name__}_cache_misses", info.misses - since.misses)
+
+
+# Process-wide default, switched on with TIMESHEET_METRICS=1 (or by the bulk CLI's --metrics)
+METRICS = Metrics(enabled=os.environ.get("TIMESHEET_METRICS") == "1")
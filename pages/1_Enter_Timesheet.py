@@ -1,10 +1,14 @@
 # pages/1_Enter_Timesheet.py
 import streamlit as st
-from datetime import datetime, timedelta
+from records import Fortnight
+from resources import get_store, start_preload
+from utils import validate_entry
 
 st.title("1) Enter Timesheet (One Day Per Page)")
 
 # ---------- session helpers ----------
+# The fortnight lives in session state as a records.Fortnight (minutes and
+# flag bits); each day is read and written as an entry dict at the widgets.
 def ensure_entries(start_date):
     """Create a 14-day empty structure if not present or if start_date changed."""
     start_str = start_date.strftime("%Y-%m-%d")
@@ -14,19 +18,12 @@ def ensure_entries(start_date):
         or st.session_state["entries_start"] != start_str
         or len(st.session_state["entries"]) != 14
     ):
-        entries = []
-        for i in range(14):
-            d = start_date + timedelta(days=i)
-            entries.append({
-                "weekday": d.strftime("%A"),
-                "date_str": d.strftime("%Y-%m-%d"),
-                "rs_on": "", "as_on": "", "rs_off": "", "as_off": "",
-                "worked": "", "extra": "",
-                "sick": False, "off": False, "ado": False,
-            })
-        st.session_state["entries"] = entries
+        st.session_state["entries"] = Fortnight(start_date)
         st.session_state["entries_start"] = start_str
         st.session_state["day_index"] = 0
+    elif not isinstance(st.session_state["entries"], Fortnight):
+        # entry dicts put there some other way (a test, an older session): pack them
+        st.session_state["entries"] = Fortnight(start_date, st.session_state["entries"])
 
 def get_day(i):
     return st.session_state["entries"][i]
@@ -36,11 +33,7 @@ def set_day(i, data):
 
 def progress_count():
     """Rough completion: count rows with any time/flag filled."""
-    cnt = 0
-    for r in st.session_state.get("entries", []):
-        if any([r["rs_on"], r["as_on"], r["rs_off"], r["as_off"], r["worked"], r["extra"], r["sick"], r["off"], r["ado"]]):
-            cnt += 1
-    return cnt
+    return st.session_state["entries"].filled()
 
 # ---------- UI: pick start date ----------
 start_date = st.date_input("Select Start Date", value=st.session_state.get("start_date"))
@@ -52,6 +45,79 @@ if not start_date:
 st.session_state["start_date"] = start_date
 ensure_entries(start_date)
 
+# ---------- saved timesheets (SQLite) ----------
+WIDGET_PREFIXES = ("rs_on_", "as_on_", "rs_off_", "as_off_", "worked_", "extra_", "sick_", "off_", "ado_", "copy_prev_")
+
+def clear_day_widgets():
+    """Drop per-day widget state so the day form shows the current entries."""
+    for k in [k for k in st.session_state if str(k).startswith(WIDGET_PREFIXES)]:
+        del st.session_state[k]
+    st.session_state.pop("grid_editor", None)
+
+with st.expander("💾 Saved timesheets"):
+    employee_id = st.text_input("Employee ID", value=st.session_state.get("employee_id", "")).strip()
+    st.session_state["employee_id"] = employee_id
+    load_col, save_col = st.columns(2)
+    if load_col.button("📂 Load fortnight", use_container_width=True, disabled=not employee_id):
+        st.session_state["entries"] = Fortnight(start_date, get_store().load_fortnight(employee_id, start_date))
+        st.session_state["day_index"] = 0
+        clear_day_widgets()
+        st.rerun()
+    if save_col.button("💾 Save fortnight", use_container_width=True, disabled=not employee_id):
+        get_store().save_fortnight(employee_id, start_date, st.session_state["entries"])
+        st.success(f"Saved fortnight for {employee_id}.")
+
+# ---------- entry mode ----------
+GRID_MODE = "Fortnight grid"
+mode = st.radio("Entry mode", ["One day per page", GRID_MODE], horizontal=True, key="entry_mode")
+
+GRID_COLS = ["weekday", "date_str", "rs_on", "as_on", "rs_off", "as_off", "worked", "extra", "sick", "off", "ado"]
+
+@st.fragment
+def fortnight_grid():
+    """All 14 days in one editable grid; edits rerun only this fragment."""
+    import pandas as pd
+
+    grid = pd.DataFrame(list(st.session_state["entries"]), columns=GRID_COLS)
+    edited = st.data_editor(
+        grid, key="grid_editor", hide_index=True, use_container_width=True,
+        disabled=["weekday", "date_str"], num_rows="fixed",
+        column_config={
+            "weekday": "Weekday", "date_str": "Date",
+            "rs_on": st.column_config.TextColumn("R Sign-on"), "as_on": st.column_config.TextColumn("A Sign-on"),
+            "rs_off": st.column_config.TextColumn("R Sign-off"), "as_off": st.column_config.TextColumn("A Sign-off"),
+            "worked": st.column_config.TextColumn("Worked", help="HH:MM or HHMM (blank → 8h)"),
+            "extra": st.column_config.TextColumn("Extra", help="HH:MM or HHMM"),
+            "sick": st.column_config.CheckboxColumn("Sick"), "off": st.column_config.CheckboxColumn("Off"),
+            "ado": st.column_config.CheckboxColumn("ADO"),
+        },
+    )
+
+    # validate every cell in one pass
+    rows = []
+    for r in edited.to_dict("records"):
+        row = {k: r[k] for k in GRID_COLS}
+        for k in ("rs_on", "as_on", "rs_off", "as_off", "worked", "extra"):
+            row[k] = ("" if row[k] is None or row[k] != row[k] else str(row[k])).strip()
+        for k in ("sick", "off", "ado"):
+            row[k] = bool(row[k])
+        rows.append(row)
+    problems = [(r["weekday"], r["date_str"], reason) for r in rows for _, reason in validate_entry(r)]
+
+    if problems:
+        st.error(f"{len(problems)} problem(s) to fix before saving:")
+        st.table(pd.DataFrame(problems, columns=["Weekday", "Date", "Problem"]))
+    if st.button("Save fortnight ✅", disabled=bool(problems), type="primary"):
+        st.session_state["entries"] = Fortnight(start_date, rows)
+        clear_day_widgets()
+        st.success("Saved all 14 days.")
+
+if mode == GRID_MODE:
+    fortnight_grid()
+    st.markdown("---")
+    st.info("When you finish all days, open **Review Calculations** from the sidebar to see totals and breakdown.")
+    st.stop()
+
 # ---------- navigation header ----------
 total_days = 14
 day_index = st.session_state.get("day_index", 0)
@@ -151,3 +217,6 @@ with nav_right:
 st.markdown("---")
 st.info("When you finish all days, open **Review Calculations** from the sidebar to see totals and breakdown.")
 
+
+# Page is drawn; warm up Review Calculations while the user types
+start_preload()
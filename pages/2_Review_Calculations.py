@@ -1,130 +1,121 @@
 # pages/2_Review_Calculations.py
+# numpy/pandas (via engine and the table) are imported only in the branches
+# that need them, so reruns with nothing changed never touch them.
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta, time
-from utils import parse_time, parse_duration, calculate_row, NSW_PUBLIC_HOLIDAYS, rate_constants
+from datetime import timedelta
+from utils import apply_flags, classify_day, long_fortnight_deduction, parse_minutes
+from resources import get_calendar, get_rates, get_result_cache, get_store
+from records import DayResult
+from result_cache import day_key, day_row, fortnight_key
+from export import MIME, to_bytes
+from metrics import Metrics, count_cache
 
 st.title("2) Review Calculations")
 
+# Optional per-run stage timings (sidebar); a disabled Metrics is a no-op
+debug = st.sidebar.checkbox("🔧 Debug timings", key="debug_timings")
+metrics = Metrics(enabled=debug)
+parse_since = parse_minutes.cache_info() if debug else None
+
 entries = st.session_state.get("entries")
 start_date = st.session_state.get("start_date")
 if not entries or not start_date:
     st.warning("No saved entries found. Please fill **Enter Timesheet** first.")
     st.stop()
 
-rows = []
-any_ado = False
-
-for r in entries:
-    weekday   = r["weekday"]
-    date_str  = r["date_str"]
-    date      = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-    values = [r["rs_on"], r["as_on"], r["rs_off"], r["as_off"], r["worked"], r["extra"]]
-    sick = r["sick"]; off = r["off"]; ado = r["ado"]
-
-    # precedence: ADO > Sick/Off > none
-    effective_values = values.copy()
-    chosen_flag = None
-    if ado:
-        effective_values[0] = "ADO"; chosen_flag = "ADO"
-    elif sick or off:
-        effective_values[0] = "OFF"; chosen_flag = "OFF"
-
-    # Unit calculation
-    unit = 0.0
-    if any(v.upper() in ["OFF","ADO"] for v in effective_values) or sick:
-        unit = 0.0
-    else:
-        RS_ON  = parse_time(effective_values[0])
-        AS_ON  = parse_time(effective_values[1])
-        RS_OFF = parse_time(effective_values[2])
-        AS_OFF = parse_time(effective_values[3])
-        worked_f = parse_duration(effective_values[4])
-        extra_f  = parse_duration(effective_values[5])
-
-        if RS_ON and RS_OFF and AS_ON and AS_OFF:
-            rs_start = datetime.combine(date, RS_ON)
-            rs_end   = datetime.combine(date, RS_OFF)
-            if RS_OFF < RS_ON: rs_end += timedelta(days=1)
-            as_start = datetime.combine(date, AS_ON)
-            as_end   = datetime.combine(date, AS_OFF)
-            if AS_OFF < AS_ON: as_end += timedelta(days=1)
-
-            built_up = 0
-            if as_start < rs_start:
-                delta = (rs_end - as_end).total_seconds() / 3600
-            elif as_end > rs_end:
-                delta = abs((as_start - rs_start).total_seconds() / 3600)
-            elif as_start >= rs_start and as_end <= rs_end and (as_end - as_start) < (rs_end - rs_start):
-                delta = abs((rs_end - rs_start).total_seconds() / 3600) - 8
-                built_up = 1
-            else:
-                delta = 0.0
-
-            worked_use = worked_f if worked_f and built_up == 0 else 8
-            unit = delta + (worked_use - 8) + (extra_f or 0)
-
-    unit = round(unit, 2)
-
-    # Penalty
-    penalty = "No"
-    AS_ON  = parse_time(effective_values[1])
-    AS_OFF = parse_time(effective_values[3])
-    if not any(v.upper() in ["OFF","ADO"] for v in effective_values) and not sick and AS_ON and AS_OFF and weekday not in ["Saturday","Sunday"]:
-        m1 = AS_ON.hour * 60 + AS_ON.minute
-        m2 = AS_OFF.hour * 60 + AS_OFF.minute
-        if m2 < m1: m2 += 1440
-        if 1080 <= m1 % 1440 <= 1439 or 0 <= m1 % 1440 <= 239:
-            penalty = "Night"
-        elif 240 <= m1 % 1440 <= 330:
-            penalty = "Morning"
-        elif m1 <= 1080 <= m2:
-            penalty = "Afternoon"
-
-    # Special
-    special = "No"
-    if not any(v.upper() in ["OFF","ADO"] for v in effective_values) and not sick and weekday not in ["Saturday","Sunday"]:
-        if (AS_ON and time(1,1) <= AS_ON <= time(3,59)) or (AS_OFF and time(1,1) <= AS_OFF <= time(3,59)):
-            special = "Yes"
-
-    ot, prate, sload, srate, drate, lrate, dcount = calculate_row(
-        weekday, effective_values, sick, penalty, special, unit
-    )
-
-    if any(v.upper() == "ADO" for v in effective_values):
-        any_ado = True
-
-    is_holiday = "Yes" if date_str in NSW_PUBLIC_HOLIDAYS else "No"
-    display_rs_on = chosen_flag if chosen_flag else values[0]
-
-    rows.append([
-        weekday, date_str, display_rs_on, values[1], values[2], values[3], values[4], values[5],
-        "Yes" if sick else "No", f"{unit:.2f}", penalty, special, is_holiday,
-        f"{ot:.2f}", f"{prate:.2f}", f"{sload:.2f}", f"{srate:.2f}",
-        f"{lrate:.2f}", f"{drate:.2f}", f"{dcount:.2f}"
+# ---------- Result cache ----------
+# Days and whole fortnights are cached process-wide, keyed by their entries
+# after flag precedence plus the rate schedule's fingerprint, so a rerun (or
+# another user with the same roster) skips straight to the table and only
+# days never seen before are classified and rated.
+results = get_result_cache()
+keys = [day_key(r, get_rates().fingerprint) for r in entries]
+fkey = fortnight_key(keys)
+view = st.session_state.get("review_view")
+fortnight = None
+if view is None or view["key"] != fkey:
+    fortnight = results.get(fkey)
+    metrics.count("fortnight_cache_hits" if fortnight else "fortnight_cache_misses")
+
+if (view is None or view["key"] != fkey) and fortnight is None:
+    days = {k: results.get(k) for k in keys}
+    dirty = [i for i, k in enumerate(keys) if days[k] is None]
+    metrics.count("days", len(keys))
+    metrics.count("dirty_days", len(dirty))
+
+    if dirty:
+        from engine import calculate_batch, quantities
+        calendar = get_calendar()
+        holidays = {}
+        batch = {"day": [], "flag": [], "sick": [], "penalty": [], "special": [], "unit": [], "worked": [], "any_ado": []}
+        with metrics.timer("classify"):
+            for i in dirty:
+                r = entries[i]
+                weekday   = r["weekday"]
+                date_str  = r["date_str"]
+
+                values = [r["rs_on"], r["as_on"], r["rs_off"], r["as_off"], r["worked"], r["extra"]]
+                sick = r["sick"]
+
+                # precedence: ADO > Sick/Off > none
+                effective_values, chosen_flag = apply_flags(values, sick, r["off"], r["ado"])
+
+                day = classify_day(weekday, effective_values, sick)
+                for k, v in zip(batch, (weekday, effective_values[0], sick, day.penalty, day.special,
+                                        day.unit, day.worked, day.any_ado)):
+                    batch[k].append(v)
+
+                holidays[i] = calendar.is_holiday(date_str)
+
+        # Rates for the dirty days in one pass (same results as calculate_row),
+        # each day at the rate table in force on its date
+        with metrics.timer("rate"):
+            rates = calculate_batch(**batch, rates=get_rates().columns([entries[i]["date_str"] for i in dirty]))
+            # rating quantities, stored with the results so a rate change can re-rate them
+            q = quantities(**batch)
+        # one compact record per day (cents and codes); the text columns come from its key
+        for n, i in enumerate(dirty):
+            ot, prate, sload, srate, drate, lrate, dcount = (rates[k][n] for k in rates)
+            amounts = (round(float(x), 2) for x in (ot, prate, sload, srate, lrate, drate, dcount))
+            qty = (int(q["day"][n]), int(q["flag"][n]), int(q["sick"][n]), int(q["any_ado"][n]),
+                   float(q["penalty_hours"][n]))
+            days[keys[i]] = DayResult(batch["unit"][n], amounts, int(q["penalty"][n]), bool(q["special"][n]),
+                                      holidays[i], qty)
+            results.put(keys[i], days[keys[i]])
+
+    # Typed frame (shared read-only by every session) and its totals in one sum
+    with metrics.timer("table"):
+        import result_frame
+        rows = tuple(days[k] for k in keys)
+        df = result_frame.build(day_row(k, r) for k, r in zip(keys, rows))
+    with metrics.timer("totals"):
+        totals = tuple(result_frame.totals(df))
+    fortnight = (rows, df, totals, any(r.any_ado for r in rows))
+    results.put(fkey, fortnight)
+
+if fortnight is not None:
+    rows, df, totals, any_ado = fortnight
+    view = {"key": fkey, "rows": rows, "df": df, "totals": totals, "any_ado": any_ado, "styled": None}
+    st.session_state["review_view"] = view
+
+df, totals_float, any_ado = view["df"], list(view["totals"]), view["any_ado"]
+
+# Persist computed rows for the employee picked on the Enter page (once per change)
+employee_id = st.session_state.get("employee_id")
+if employee_id and view.get("saved_for") != employee_id:
+    get_store().save_results(employee_id, start_date, [
+        (k[0], r.unit, r.penalty, "Yes" if r.special else "No", "Yes" if r.holiday else "No", *r.amounts,
+         *r.quantities)
+        for k, r in zip(keys, view["rows"])
     ])
-
-cols = [
-    "Weekday","Date","R Sign-on","A Sign-on","R Sign-off","A Sign-off","Worked","Extra","Sick",
-    "Unit","Penalty","Special","Holiday",
-    "OT Rate","Penalty Rate","Special Ldg","Sick Rate","Loading","Daily Rate","Daily Count"
-]
-df = pd.DataFrame(rows, columns=cols)
-
-# Totals
-totals_float = [pd.to_numeric(df[c], errors="coerce").fillna(0).sum() for c in cols[13:]]
+    view["saved_for"] = employee_id
 
 # Long fortnight deduction
 if not any_ado:
-    deduction = 0.5 * rate_constants["Ordinary Hours"] * 8
+    deduction = long_fortnight_deduction(get_rates().for_date(start_date))
     totals_float[-1] -= deduction
     st.warning(f"Applied long-fortnight deduction: -{deduction:.2f}")
 
-# TOTAL row
-totals_fmt = [f"{t:.2f}" for t in totals_float]
-df.loc[len(df)] = ["TOTAL","","","","","","","","","", "", "", ""] + totals_fmt
-
 # ----- 🎉 Summary message -----
 start_str = start_date.strftime("%Y-%m-%d")
 end_str = (start_date + timedelta(days=13)).strftime("%Y-%m-%d")
@@ -136,10 +127,55 @@ st.success(
     f"💰 **${total_amount:,.2f} AUD** before tax!"
 )
 
+# ----- 📅 Year to date -----
+# Prefix sums over the stored fortnight totals (only changed fortnights are refetched)
+if employee_id:
+    from rollup import financial_year_start
+    from resources import get_rollup
+    rollup = get_rollup()
+    with metrics.timer("ytd"):
+        rollup.refresh(get_store())
+        fy_start = financial_year_start(start_date)
+        _, fortnights, sums = rollup.totals(fy_start, start_date, [employee_id])
+    st.info(f"📅 Financial year to date ({fy_start:%Y-%m-%d} → {end_str}): "
+            f"**${sums[0][-1] / 100:,.2f} AUD** over {int(fortnights[0])} saved fortnight(s)")
+
 st.markdown("---")
 st.subheader("Here is the detailed breakdown of earnings")
 
-def highlight_total(row):
-    return ['background-color: #d0ffd0' if row.name == len(df)-1 else '' for _ in row]
-
-st.dataframe(df.style.apply(highlight_total, axis=1), use_container_width=True)
+# Formatting (2dp, Yes/No) and the TOTAL row happen only here, on a display copy
+if view["styled"] is None:
+    import result_frame
+    with metrics.timer("style"):
+        view["styled"] = result_frame.render(df, totals_float)
+with metrics.timer("render"):
+    st.dataframe(view["styled"], use_container_width=True)
+
+# ----- ⬇️ Downloads -----
+# Each file is generated only when its button is clicked, straight from the
+# typed rows (never the styled table); Excel ends with the TOTAL row above.
+def export_file(fmt, keys=keys, rows=view["rows"], totals_row=tuple(totals_float)):
+    def make():
+        import result_frame
+        total = ["TOTAL"] + [""] * (len(result_frame.COLUMNS) - 1 - len(totals_row)) + list(totals_row)
+        return to_bytes((day_row(k, r) for k, r in zip(keys, rows)), result_frame.COLUMNS,
+                        result_frame.EXPORT_TYPES, fmt, total_row=total)
+    return make
+
+for col, (label, fmt) in zip(st.columns(3), [("CSV", "csv"), ("Parquet", "parquet"), ("Excel", "xlsx")]):
+    col.download_button(f"⬇️ {label}", export_file(fmt), file_name=f"payroll_{start_str}.{fmt}", mime=MIME[fmt],
+                        on_click="ignore", key=f"export_{fmt}")
+
+# ----- 🔧 Debug panel -----
+if debug:
+    import pandas as pd
+    count_cache(metrics, parse_minutes, parse_since)
+    snap = metrics.snapshot()
+    st.sidebar.markdown("**Stage timings (this run)**")
+    st.sidebar.table(pd.DataFrame(
+        [(k, f"{v['seconds'] * 1000:.2f}") for k, v in snap["stages"].items()], columns=["Stage", "ms"]))
+    st.sidebar.markdown("**Counters**")
+    st.sidebar.table(pd.DataFrame(list(snap["counters"].items()), columns=["Counter", "Value"]))
+    st.sidebar.markdown("**Result cache (all sessions)**")
+    st.sidebar.table(pd.DataFrame([(k, str(v)) for k, v in results.stats().items()], columns=["Stat", "Value"]))
+    st.sidebar.download_button("Export JSON", metrics.to_json(), file_name="timings.json", mime="application/json")
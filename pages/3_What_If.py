@@ -0,0 +1,76 @@
+# pages/3_What_If.py
+# Pay under alternative shift times and ADO placements for the entered fortnight;
+# every variant is computed in one vectorised pass (simulate.py).
+import streamlit as st
+
+st.title("3) What-If Roster")
+
+entries = st.session_state.get("entries")
+start_date = st.session_state.get("start_date")
+if not entries or not start_date:
+    st.warning("No saved entries found. Please fill **Enter Timesheet** first.")
+    st.stop()
+
+labels = [f"{e['weekday'][:3]} {e['date_str']}" for e in entries]
+
+# ---------- Variants ----------
+mode = st.radio("Variants", ["Grid", "Random sample"], horizontal=True)
+times = st.radio("Move", ["Rostered and actual times (roster change)", "Actual times only"], horizontal=True)
+col1, col2 = st.columns(2)
+if mode == "Grid":
+    days = col1.multiselect("Days to move", range(14), format_func=labels.__getitem__, max_selections=4)
+    lo, hi = col2.slider("Move by (minutes)", -240, 240, (-60, 60), step=15)
+    step = col1.select_slider("Step (minutes)", [5, 10, 15, 30, 60], value=15)
+    stretch = col2.checkbox("Move sign-on only (stretch/shrink the shift)")
+    ado_days = col1.multiselect("ADO placements to try", range(14), format_func=labels.__getitem__)
+else:
+    samples = col1.number_input("Variants", 100, 200_000, 10_000, step=1_000)
+    max_move = col2.slider("Move up to (minutes)", 15, 240, 120, step=15)
+    p_move = col1.slider("Chance each shift moves", 0.0, 1.0, 0.3)
+    p_ado = col2.slider("Chance the ADO moves", 0.0, 1.0, 0.5)
+    seed = col1.number_input("Seed", 0, 10_000, 0)
+min_rest = col1.number_input("Minimum rest between shifts (hours)", 0.0, 24.0, 10.0, step=0.5)
+max_length = col2.number_input("Longest shift (hours)", 1.0, 24.0, 12.0, step=0.5)
+
+if not st.button("▶️ Simulate", type="primary"):
+    st.stop()
+
+import pandas as pd
+import simulate
+
+if mode == "Grid":
+    v = simulate.grid(entries, {d: range(lo, hi + 1, step) for d in days},
+                      ado_days=[None, *ado_days], stretch=stretch)
+else:
+    v = simulate.sample(entries, int(samples), max_move, 15, p_move, p_ado, int(seed))
+if len(v["ado"]) > 500_000:
+    st.error(f"{len(v['ado']):,} variants is too many; narrow the grid.")
+    st.stop()
+with st.spinner(f"Simulating {len(v['ado']):,} variants…"):
+    base = simulate.simulate(entries, start_date, simulate.variants([[0] * len(entries)]))
+    result = simulate.simulate(entries, start_date, v, "roster" if times.startswith("Rostered") else "actual",
+                               min_rest=int(min_rest * 60), max_length=int(max_length * 60))
+
+# ---------- Results ----------
+s = simulate.summary(result)
+base_total = base["total"][0] / 100
+st.success(f"{s['variants']:,} variants, {s['feasible']:,} feasible. As entered: **${base_total:,.2f}**")
+if not s["feasible"]:
+    st.stop()
+c = st.columns(5)
+for col, key in zip(c, ["min", "p10", "median", "p90", "max"]):
+    col.metric(key.title() if key in ("min", "median", "max") else key, f"${s[key]:,.2f}",
+               f"{s[key] - base_total:+,.2f}", delta_color="inverse")
+
+counts, edges = s["histogram"]
+st.markdown("**Pay distribution (feasible variants)**")
+st.bar_chart(pd.DataFrame({"variants": counts}, index=[f"{a:,.0f}" for a in edges[:-1]]))
+
+st.markdown("**Cheapest feasible variants**")
+best = simulate.cheapest(result, 10)
+st.dataframe(pd.DataFrame(
+    [(simulate.describe(entries, result, i), result["total"][i] / 100, result["total"][i] / 100 - base_total,
+      result["deduction"][i] / 100) for i in best],
+    columns=["Changes", "Total", "vs entered", "Deduction"]).style.format("{:,.2f}", subset=["Total", "vs entered",
+                                                                                              "Deduction"]),
+    use_container_width=True, hide_index=True)
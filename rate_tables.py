@@ -0,0 +1,98 @@
+# rate_tables.py
+"""Versioned rate tables with effective-from dates, loaded from data/rates.csv.
+
+Each version lists the amounts that changed on its effective date; anything
+it leaves out carries forward from the version before.  The versions form a
+sorted interval index: a date is rated by the last version that started on
+or before it (bisect for one date, searchsorted for a date column).  The
+first version also covers any earlier date.
+
+    schedule = default_schedule()
+    rates = schedule.for_date("2025-04-14")       # dict, resolve once per period
+    cols = schedule.columns(date_column)          # {name: array}, one table per day
+"""
+import csv
+import hashlib
+import os
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+
+RATES_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rates.csv")
+
+
+class RateSchedule:
+    def __init__(self, versions):
+        """versions: iterable of (effective_from date, {name: amount}) pairs, any order."""
+        merged = {}
+        for start, rates in versions:
+            merged.setdefault(start, {}).update(rates)
+        if not merged:
+            raise ValueError("a rate schedule needs at least one version")
+
+        self.starts = sorted(merged)
+        self.tables = []
+        for start in self.starts:
+            table = dict(self.tables[-1]) if self.tables else {}
+            if self.tables and set(merged[start]) - set(table):
+                raise ValueError(f"rates {sorted(set(merged[start]) - set(table))} first appear on {start}; "
+                                 f"every rate must be in the first version")
+            table.update(merged[start])
+            self.tables.append(table)
+        self.names = list(self.tables[0])
+        # changes whenever any amount or effective date does (keys cached results)
+        self.fingerprint = hashlib.blake2b(
+            repr([(d.isoformat(), sorted(t.items())) for d, t in zip(self.starts, self.tables)]).encode(),
+            digest_size=8).hexdigest()
+        self._ordinals = [d.toordinal() for d in self.starts]
+        self._matrix = None
+
+    @classmethod
+    def from_csv(cls, path=RATES_CSV):
+        versions = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                versions.setdefault(date.fromisoformat(r["effective_from"]), {})[r["name"].strip()] = float(r["amount"])
+        return cls(versions.items())
+
+    def index(self, d):
+        """Position of the version in force on d (date or 'YYYY-MM-DD')."""
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        return max(bisect_right(self._ordinals, d.toordinal()) - 1, 0)
+
+    def for_date(self, d):
+        """The full rate table in force on d, as a dict of name -> amount."""
+        return self.tables[self.index(d)]
+
+    def version(self, d):
+        """Effective-from date (ISO) of the table in force on d; identifies the rates used."""
+        return self.starts[self.index(d)].isoformat()
+
+    def index_array(self, dates):
+        """Vectorised index over a date column (datetime64, date objects or ISO strings)."""
+        import numpy as np  # the scalar lookups above must not pull in numpy
+        starts = np.array(self.starts, dtype="datetime64[D]")
+        idx = np.searchsorted(starts, np.asarray(dates, dtype="datetime64[D]"), side="right") - 1
+        return np.maximum(idx, 0)
+
+    @property
+    def matrix(self):
+        """Versions x names array of amounts (for engine.rerate)."""
+        if self._matrix is None:
+            import numpy as np
+            self._matrix = np.array([[t[n] for n in self.names] for t in self.tables], dtype=np.float64)
+        return self._matrix
+
+    def columns(self, dates):
+        """{name: array of the amount in force on each date}, for engine.calculate_batch(rates=...)."""
+        if len(self.tables) == 1:
+            return dict(zip(self.names, self.matrix[0].tolist()))
+        rows = self.matrix[self.index_array(dates)]
+        return {n: rows[:, j] for j, n in enumerate(self.names)}
+
+
+@lru_cache(maxsize=None)
+def default_schedule():
+    """The bundled schedule, loaded once per process."""
+    return RateSchedule.from_csv()
@@ -0,0 +1,317 @@
+# records.py
+"""Compact entry and result records: times as minutes, flags as bits.
+
+A day's entry is six small integers and one bit word instead of a dict of
+eleven strings and bools:
+
+    codes   one per field (rs_on, as_on, rs_off, as_off, worked, extra): the
+            minutes it reads as, BLANK, or TEXT for anything that would not
+            come back unchanged (OFF/ADO typed into a field, a typo, "7.30"),
+            which is kept verbatim in a small side dict
+    bits    SICK | OFF | ADO, plus two bits per field recording how the time
+            was written (0730, 07:30, 730 or 7:30) so the text round-trips
+
+Fortnight holds the pages' 14 days (session_state["entries"]) in two
+arrays; indexing or iterating it gives the familiar entry dicts, built on
+demand at the UI boundary.  EntryBlock is the same layout for a chunk of
+bulk input rows, with employee, date and state codes alongside; bulk.py
+classifies straight from it and ships it to its workers.  DayResult is one
+computed Review page day: unit, amounts and classification codes in one
+small int array.
+
+Everything here is stdlib (array), so the Enter page stays free of NumPy.
+"""
+import sys
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+
+from utils import parse_duration, parse_minutes
+
+FIELDS = ["rs_on", "as_on", "rs_off", "as_off", "worked", "extra"]
+N_TIMES = 4  # the first four FIELDS are times of day, the rest durations
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+PENALTIES = ["No", "Afternoon", "Night", "Morning"]  # by engine PEN_* code
+DAYS = 14
+
+SICK, OFF, ADO = 1, 2, 4
+STYLE_SHIFT = 3  # field k's style: bits STYLE_SHIFT + 2k and the one above
+BLANK, TEXT = -1, -2
+MAX_MINUTES = 32767  # durations past ~546h are kept as TEXT
+DATE = len(FIELDS)   # EntryBlock.text key for a date not written YYYY-MM-DD
+
+_STYLES = ("{:02d}{:02d}", "{:02d}:{:02d}", "{}{:02d}", "{}:{:02d}")
+TRUE_TEXT = {"1", "true", "yes", "y", "t"}
+
+
+# ---------- Fields ----------
+@lru_cache(maxsize=8192)
+def encode(text, duration=False):
+    """(code, style) of one field's text; code is TEXT when the text would not round-trip."""
+    if not text:
+        return BLANK, 0
+    h, sep, m = text.partition(":")
+    if not sep:
+        h, m = text[:-2], text[-2:]
+    style = (1 if sep else 0) + (2 if len(h) < 2 else 0)
+    try:
+        h, m = int(h), int(m)
+    except ValueError:
+        return TEXT, 0
+    code = h * 60 + m
+    if h < 0 or not 0 <= m < 60 or _STYLES[style].format(h, m) != text:
+        return TEXT, 0
+    if duration:
+        ok = code <= MAX_MINUTES and parse_duration(text) == h + m / 60
+    else:
+        ok = h < 24 and parse_minutes(text) == code
+    return (code, style) if ok else (TEXT, 0)
+
+
+@lru_cache(maxsize=8192)
+def decode(code, style):
+    """Text of a non-TEXT field code."""
+    return "" if code == BLANK else _STYLES[style].format(*divmod(code, 60))
+
+
+def pack(values, sick=False, off=False, ado=False):
+    """(codes, bits, odd) for one day's six field texts; odd maps field index -> TEXT text."""
+    codes, bits, odd = [], SICK * bool(sick) | OFF * bool(off) | ADO * bool(ado), None
+    for k, text in enumerate(values):
+        code, style = encode(text, k >= N_TIMES)
+        if code == TEXT:
+            odd = odd or {}
+            odd[k] = text
+        codes.append(code)
+        bits |= style << (STYLE_SHIFT + 2 * k)
+    return codes, bits, odd
+
+
+def unpack(codes, bits, odd=None):
+    """The six field texts back from pack()."""
+    return [odd[k] if code == TEXT else decode(code, bits >> (STYLE_SHIFT + 2 * k) & 3)
+            for k, code in enumerate(codes)]
+
+
+@lru_cache(maxsize=8192)
+def _read_field(v, duration):
+    """encode() of a bulk input cell as bulk reads it (stripped), plus that text."""
+    text = v.strip()
+    return (*encode(text, duration), text)
+
+
+@lru_cache(maxsize=256)
+def _read_flag_text(v):
+    """A bulk input flag written as text (yes/true/1/...)."""
+    return v.strip().lower() in TRUE_TEXT
+
+
+@lru_cache(maxsize=4096)
+def _read_date(v):
+    """(ordinal, text when it is not written YYYY-MM-DD) of a bulk input date."""
+    text = str(v).strip()
+    d = date.fromisoformat(text)
+    return d.toordinal(), None if d.isoformat() == text else text
+
+
+@lru_cache(maxsize=4096)
+def _iso(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+@lru_cache(maxsize=256)
+def _read_state(v, default):
+    return str(v or default).strip().upper()
+
+
+def _deep_size(*objs):
+    return sum(sys.getsizeof(o) for o in objs)
+
+
+# ---------- Session entries ----------
+class Fortnight:
+    """The 14 days from start, list-like: f[i] is day i's entry dict, f[i] = entry stores one."""
+
+    __slots__ = ("start", "codes", "bits", "text")
+
+    def __init__(self, start, entries=()):
+        self.start = start
+        self.codes = array("h", [BLANK]) * (DAYS * len(FIELDS))
+        self.bits = array("H", bytes(2 * DAYS))
+        self.text = None  # {(day, field index): text} for TEXT fields
+        for i, e in enumerate(entries):
+            self[i] = e
+
+    def __len__(self):
+        return DAYS
+
+    def __iter__(self):
+        return (self[i] for i in range(DAYS))
+
+    def _index(self, i):
+        if not -DAYS <= i < DAYS:
+            raise IndexError("fortnight day out of range")
+        return i % DAYS
+
+    def __getitem__(self, i):
+        i = self._index(i)
+        d = self.start + timedelta(days=i)
+        k = i * len(FIELDS)
+        bits = self.bits[i]
+        odd = {f: t for (day, f), t in self.text.items() if day == i} if self.text else None
+        e = {"weekday": WEEKDAYS[d.weekday()], "date_str": d.isoformat()}
+        e.update(zip(FIELDS, unpack(self.codes[k:k + len(FIELDS)], bits, odd)))
+        e.update(sick=bool(bits & SICK), off=bool(bits & OFF), ado=bool(bits & ADO))
+        return e
+
+    def __setitem__(self, i, entry):
+        i = self._index(i)
+        codes, bits, odd = pack([entry[f] for f in FIELDS], entry["sick"], entry["off"], entry["ado"])
+        k = i * len(FIELDS)
+        self.codes[k:k + len(FIELDS)] = array("h", codes)
+        self.bits[i] = bits
+        if self.text:
+            self.text = {key: t for key, t in self.text.items() if key[0] != i} or None
+        if odd:
+            self.text = {**(self.text or {}), **{(i, f): t for f, t in odd.items()}}
+
+    def filled(self):
+        """Days with any time or flag entered."""
+        n = len(FIELDS)
+        return sum(1 for i in range(DAYS)
+                   if self.bits[i] & (SICK | OFF | ADO) or any(c != BLANK for c in self.codes[i * n:(i + 1) * n]))
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + _deep_size(self.start, self.codes, self.bits) + (
+            sys.getsizeof(self.text) + sum(sys.getsizeof(t) for t in self.text.values()) if self.text else 0)
+
+
+# ---------- Bulk input ----------
+class EntryBlock:
+    """A chunk of bulk input rows in Fortnight's layout plus employee, date and state per row.
+
+    Built from the input dicts with from_rows (values read and stripped the
+    way bulk.compute_chunk always has); employee and state are codes into
+    the distinct names seen, dates are ordinals.
+    """
+
+    __slots__ = ("employees", "employee", "dates", "states", "state", "codes", "bits", "text")
+
+    def __init__(self):
+        self.employees, self.states = [], []
+        self.employee, self.dates, self.state = array("i"), array("i"), array("B")
+        self.codes, self.bits = array("h"), array("H")
+        self.text = {}  # {(row, field index or DATE): text}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_rows(cls, rows, default_state="NSW"):
+        """Column at a time; cells repeat heavily, so each distinct one is read once (memoised)."""
+        rows = rows if isinstance(rows, list) else list(rows)
+        b, employees, states = cls(), {}, {}
+        b.employee.extend([employees.setdefault(str(r["employee"]), len(employees)) for r in rows])
+        for i, (ordinal, odd) in enumerate(map(_read_date, [r["date"] for r in rows])):
+            b.dates.append(ordinal)
+            if odd:
+                b.text[i, DATE] = odd
+        b.state.extend([states.setdefault(_read_state(r.get("state"), default_state), len(states)) for r in rows])
+        b.employees, b.states = list(employees), list(states)
+        bits = [SICK * s | OFF * o | ADO * a for s, o, a in zip(*([
+            v if v is True or v is False else _read_flag_text(str(v or "")) for v in (r.get(f) for r in rows)]
+            for f in ("sick", "off", "ado")))]
+        columns = []
+        for k, f in enumerate(FIELDS):
+            cells = [_read_field(v if v.__class__ is str else str(v or ""), k >= N_TIMES)
+                     for v in (r.get(f) for r in rows)]
+            columns.append([c for c, _, _ in cells])
+            shift = STYLE_SHIFT + 2 * k
+            bits = [bit | style << shift for bit, (_, style, _) in zip(bits, cells)]
+            if TEXT in columns[-1]:
+                b.text.update(((i, k), t) for i, (c, _, t) in enumerate(cells) if c == TEXT)
+        b.codes.extend([c for day in zip(*columns) for c in day])
+        b.bits.extend(bits)
+        return b
+
+    def date_strs(self):
+        """Every row's date as written."""
+        out = [_iso(o) for o in self.dates]
+        for (i, k), t in self.text.items():
+            if k == DATE:
+                out[i] = t
+        return out
+
+    def values(self, i):
+        """Row i's six field texts."""
+        n = len(FIELDS)
+        return unpack(self.codes[i * n:(i + 1) * n], self.bits[i],
+                      {k: self.text[i, k] for k in range(n) if (i, k) in self.text})
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + _deep_size(
+            self.employees, self.employee, self.dates, self.states, self.state, self.codes, self.bits, self.text) + sum(
+            sys.getsizeof(s) for s in self.employees) + sum(sys.getsizeof(t) for t in self.text.values())
+
+
+# ---------- Results ----------
+class DayResult:
+    """One computed Review page day: unit and amounts in cents, then its classification codes.
+
+    The text columns are not stored: they are the day's (effective) entry,
+    which the caller already holds (the result-cache key), so row() takes them.
+    """
+
+    __slots__ = ("values",)
+    # values: unit, AMOUNT cents (7, in result_frame.AMOUNT_COLS order), penalty hours, codes
+    _PENALTY, _SPECIAL, _HOLIDAY, _ANY_ADO, _SICK = 0, 2, 3, 4, 5
+    _FLAG, _DAY = 6, 8  # engine FLAG_* and day-class codes, two bits each
+
+    def __init__(self, unit, amounts, penalty, special, holiday, quantities):
+        """unit and amounts as dollars at 2dp; penalty a PEN_* code; quantities as
+        (day class, flag, sick, any_ado, penalty hours) from engine.quantities."""
+        day, flag, sick, any_ado, hours = quantities
+        codes = (penalty << self._PENALTY | bool(special) << self._SPECIAL | bool(holiday) << self._HOLIDAY
+                 | bool(any_ado) << self._ANY_ADO | bool(sick) << self._SICK | flag << self._FLAG | day << self._DAY)
+        self.values = array("i", [round(unit * 100), *(round(a * 100) for a in amounts), int(hours), codes])
+
+    def _code(self, shift, width=1):
+        return self.values[-1] >> shift & ((1 << width) - 1)
+
+    @property
+    def unit(self):
+        return self.values[0] / 100
+
+    @property
+    def amounts(self):
+        return tuple(c / 100 for c in self.values[1:8])
+
+    @property
+    def penalty(self):
+        return PENALTIES[self._code(self._PENALTY, 2)]
+
+    @property
+    def special(self):
+        return bool(self._code(self._SPECIAL))
+
+    @property
+    def holiday(self):
+        return bool(self._code(self._HOLIDAY))
+
+    @property
+    def any_ado(self):
+        return bool(self._code(self._ANY_ADO))
+
+    @property
+    def quantities(self):
+        """(day class, flag, sick, any_ado, penalty hours), as store.QUANTITY_COLS."""
+        return (self._code(self._DAY, 2), self._code(self._FLAG, 2), self._code(self._SICK),
+                self._code(self._ANY_ADO), float(self.values[8]))
+
+    def row(self, date_str, values, sick):
+        """The result_frame.COLUMNS row, given the day's date and effective field texts."""
+        return (WEEKDAYS[date.fromisoformat(date_str).weekday()], date_str, *values, bool(sick),
+                self.unit, self.penalty, self.special, self.holiday, *self.amounts)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.values)
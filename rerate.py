@@ -0,0 +1,77 @@
+# rerate.py
+"""Re-rate stored days from their rating quantities, without reparsing any entry.
+
+    python rerate.py 2025-01-01 2025-12-31                     # rewrite the dollars in the store
+    python rerate.py 2025-01-01 2025-12-31 --dry-run           # report what would change
+    python rerate.py 2025-07-01 2026-06-30 --rates new_rates.csv --db payroll.db
+
+Every stored day (saved by the Review page or `bulk.py --store`) keeps its
+unit hours, penalty class and hours, special, day class and flags.  Each
+block of days is re-rated with engine.rerate (one small matrix product
+against the rate tables plus a gather), every day at the table in force on
+its date, and only days whose dollars changed are written back (which
+also re-aggregates their fortnights' totals for rollup.py).
+"""
+import argparse
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from engine import PENALTY_LABELS, PEN_NO, rerate, round_cents
+from rate_tables import RATES_CSV, RateSchedule
+from store import AMOUNT_COLS, DB_PATH, TimesheetStore
+
+
+# TimesheetStore.iter_quantities rows, parsed in one pass into a structured array
+ROW_DTYPE = np.dtype([("employee_id", "O"), ("date", "U10"), ("period_start", "U10"), ("unit", "f8"),
+                      ("penalty", "O"), ("special", "O"), ("day_class", "i1"), ("flag", "i1"), ("sick", "?"),
+                      ("any_ado", "?"), ("penalty_hours", "f8")]
+                     + [(c, "f8") for c in AMOUNT_COLS])
+
+
+def rerate_rows(rows, schedule):
+    """rows from TimesheetStore.iter_quantities -> (new, old) amounts, both (n, 7) in AMOUNT_COLS order."""
+    a = np.array(rows, dtype=ROW_DTYPE)
+    penalty = np.full(len(a), PEN_NO, dtype=np.int8)
+    for label, code in PENALTY_LABELS.items():
+        penalty[a["penalty"] == label] = code
+    q = {"day": a["day_class"], "flag": a["flag"], "sick": a["sick"], "penalty": penalty,
+         "special": a["special"] == "Yes", "unit": a["unit"], "penalty_hours": a["penalty_hours"],
+         "any_ado": a["any_ado"]}
+
+    out = rerate(q, schedule.names, schedule.matrix, schedule.index_array(a["date"]))
+    new = np.column_stack([out[c] for c in AMOUNT_COLS])
+    old = np.column_stack([a[c] for c in AMOUNT_COLS])
+    return new, old
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Re-rate stored days from their saved quantities.")
+    p.add_argument("first", type=date.fromisoformat, help="first date (YYYY-MM-DD)")
+    p.add_argument("last", type=date.fromisoformat, help="last date (YYYY-MM-DD)")
+    p.add_argument("--db", default=DB_PATH, help="SQLite store (default: TIMESHEET_DB or timesheet.db)")
+    p.add_argument("--rates", default=RATES_CSV, help="rate tables CSV (default: data/rates.csv)")
+    p.add_argument("--dry-run", action="store_true", help="report changes without writing them")
+    args = p.parse_args(argv)
+
+    schedule = RateSchedule.from_csv(args.rates)
+    store = TimesheetStore(args.db)
+    t0 = time.perf_counter()
+    n_days = n_changed = 0
+    delta = 0  # cents, so the reported change is exact over any number of days
+    for rows in store.iter_quantities(args.first, args.last):
+        new, old = rerate_rows(rows, schedule)
+        changed = np.flatnonzero((new != old).any(axis=1))
+        n_days += len(rows)
+        n_changed += len(changed)
+        delta += int(round_cents(new[:, -1]).sum() - round_cents(old[:, -1]).sum())
+        if len(changed) and not args.dry_run:
+            store.update_amounts([(*new[i].tolist(), *rows[i][:3]) for i in changed], schedule)
+    print(f"{n_days} days re-rated, {n_changed} changed, daily count {delta / 100:+,.2f} "
+          f"({time.perf_counter() - t0:.2f}s{', dry run' if args.dry_run else ''})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
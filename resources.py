@@ -0,0 +1,65 @@
+# resources.py
+"""Process-wide resources shared by every Streamlit session (built once, cached).
+
+Pages import this module instead of the heavy libraries themselves, so a
+rerun never rebuilds a table or reloads a file, and a page that renders no
+table never pays for pandas.
+"""
+import threading
+
+import streamlit as st
+
+from store import TimesheetStore
+
+
+@st.cache_resource
+def get_store():
+    return TimesheetStore()
+
+
+@st.cache_resource
+def get_rates():
+    """The effective-dated rate schedule (data/rates.csv)."""
+    from rate_tables import default_schedule
+    return default_schedule()
+
+
+@st.cache_resource
+def get_result_cache():
+    """Computed days/fortnights shared across sessions (LRU, TIMESHEET_RESULT_CACHE_MB cap)."""
+    from result_cache import ResultCache
+    return ResultCache()
+
+
+@st.cache_resource
+def get_rollup():
+    """Per-employee fortnight totals for YTD figures (refresh() it against get_store() before use)."""
+    from rollup import Rollup
+    return Rollup()
+
+
+@st.cache_resource
+def get_calendar():
+    """The bundled public-holiday calendar (compiled once per process)."""
+    from holiday_calendar import default_calendar
+    return default_calendar()
+
+
+def _preload():
+    import pandas  # noqa: F401  (the bulk of the Review page's first run)
+    import pandas.io.formats.style  # noqa: F401
+    import engine  # noqa: F401
+    from holiday_calendar import default_calendar
+    default_calendar()
+
+
+@st.cache_resource
+def start_preload():
+    """Import the Review page's dependencies on a background thread, once per process.
+
+    Called from the lighter pages: after a cold start the user is still
+    typing entries by the time they open Review Calculations.
+    """
+    t = threading.Thread(target=_preload, name="preload", daemon=True)
+    t.start()
+    return t
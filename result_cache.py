@@ -0,0 +1,93 @@
+# result_cache.py
+"""Process-wide LRU cache of computed days and fortnights, shared by every session.
+
+Keys are built from entries normalised the way the calculation sees them
+(ADO > Sick/Off precedence applied, the overridden first field and the
+off toggle dropped), plus the rate schedule's fingerprint, so two users with
+the same roster hit the same entry and a rate change never serves stale
+dollars.  Entries are evicted least-recently-used first once their
+estimated size passes the memory cap (TIMESHEET_RESULT_CACHE_MB, default 64).
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from utils import apply_flags
+
+DEFAULT_MAX_MB = float(os.environ.get("TIMESHEET_RESULT_CACHE_MB", "64"))
+
+
+def day_key(entry, rates_version):
+    """Normalised key of one day's entry dict: equal keys always compute to equal rows."""
+    values = [entry["rs_on"], entry["as_on"], entry["rs_off"], entry["as_off"], entry["worked"], entry["extra"]]
+    effective_values, _ = apply_flags(values, entry["sick"], entry["off"], entry["ado"])
+    return (entry["date_str"], *effective_values, bool(entry["sick"]), rates_version)
+
+
+def day_row(key, result):
+    """result_frame.COLUMNS row of a day's records.DayResult, its text columns read back from its key."""
+    return result.row(key[0], key[1:7], key[7])
+
+
+def fortnight_key(day_keys):
+    """Hash of a fortnight's day keys (in order)."""
+    return hashlib.blake2b(repr(day_keys).encode(), digest_size=16).hexdigest()
+
+
+def sizeof(obj):
+    """Rough deep size in bytes of nested tuples/lists/dicts of scalars, strings and records."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(sizeof(v) for v in obj)
+    return size
+
+
+class ResultCache:
+    def __init__(self, max_mb=DEFAULT_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        """Store value (treat it as read-only afterwards: every session shares it)."""
+        size = sizeof(key) + sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._items), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
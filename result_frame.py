@@ -0,0 +1,48 @@
+# result_frame.py
+"""Typed per-day result frame, shared by the Review page and timesheet_app.py.
+
+Amounts and Unit are float64, Sick/Special/Holiday are bool, Weekday and
+Penalty are categoricals; nothing is formatted until render(), which lays
+the TOTAL row over a display copy and formats through the Styler.  Totals
+are one vectorised sum over the amount block.
+"""
+import pandas as pd
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+PENALTIES = ["No", "Afternoon", "Night", "Morning"]
+
+TEXT_COLS = ["Date", "R Sign-on", "A Sign-on", "R Sign-off", "A Sign-off", "Worked", "Extra"]
+FLAG_COLS = ["Sick", "Special", "Holiday"]
+AMOUNT_COLS = ["OT Rate", "Penalty Rate", "Special Ldg", "Sick Rate", "Loading", "Daily Rate", "Daily Count"]
+COLUMNS = ["Weekday", *TEXT_COLS, "Sick", "Unit", "Penalty", "Special", "Holiday", *AMOUNT_COLS]
+
+DTYPES = {"Weekday": pd.CategoricalDtype(WEEKDAYS), "Penalty": pd.CategoricalDtype(PENALTIES),
+          "Unit": "float64", **{c: "bool" for c in FLAG_COLS}, **{c: "float64" for c in AMOUNT_COLS}}
+# the same typing for export.open_sink
+EXPORT_TYPES = {"Unit": "float", **{c: "bool" for c in FLAG_COLS}, **{c: "float" for c in AMOUNT_COLS}}
+
+
+def build(rows):
+    """rows: one sequence per day in COLUMNS order (floats, bools and labels, not formatted text)."""
+    return pd.DataFrame.from_records(list(rows), columns=COLUMNS).astype(DTYPES)
+
+
+def totals(df):
+    """Column totals of the amounts, in AMOUNT_COLS order."""
+    return df[AMOUNT_COLS].sum().tolist()
+
+
+def _yes_no(v):
+    return "Yes" if v else "No"
+
+
+def render(df, totals_row):
+    """Styler for display: df plus a highlighted TOTAL row (totals_row in AMOUNT_COLS order)."""
+    total = pd.DataFrame([["TOTAL", *totals_row]], columns=["Weekday", *AMOUNT_COLS], index=[len(df)])
+    shown = pd.concat([df.astype({"Weekday": object, "Penalty": object}), total])
+    last = shown.index[-1]
+    return (shown.style
+            .format("{:.2f}", subset=["Unit", *AMOUNT_COLS], na_rep="")
+            .format(_yes_no, subset=FLAG_COLS, na_rep="")
+            .format(na_rep="", subset=["Weekday", *TEXT_COLS, "Penalty"])
+            .apply(lambda row: ["background-color: #d0ffd0" if row.name == last else "" for _ in row], axis=1))
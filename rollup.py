@@ -0,0 +1,178 @@
+# rollup.py
+"""Year-to-date and any-range payroll totals from per-fortnight aggregates.
+
+    python rollup.py                                         # financial year to date, every employee
+    python rollup.py --ytd 2025-03-31 -o ytd.xlsx
+    python rollup.py --from 2025-01-01 --to 2025-03-31 --employee E1 --employee E2
+
+The store keeps one row of integer-cent totals per employee-fortnight
+(store.fortnight_totals, re-aggregated whenever that fortnight's days are
+written).  A Rollup loads them in (employee, period) order into a Fenwick
+tree, so the total over any run of fortnights is the difference of two
+prefix sums, taken for every employee at once with a handful of vectorised
+passes.  refresh() fetches only fortnights whose seq moved since the last
+call: a changed fortnight is a point update of its own slot, and only a
+fortnight never seen before re-lays the arrays.  A fortnight whose days
+all moved elsewhere comes back as a zero row and stops counting.
+
+A range covers the fortnights that start inside it; the financial year runs
+from 1 July.
+"""
+import argparse
+import sys
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from export import open_sink
+from store import DB_PATH, TOTAL_COLS, TimesheetStore
+
+OUTPUT_COLS = ["Employee", "From", "To", "Fortnights", "Days", "OT Rate", "Penalty Rate", "Special Ldg",
+               "Sick Rate", "Loading", "Daily Rate", "Daily Count", "Deduction", "Total"]
+OUTPUT_TYPES = {"Fortnights": "int", "Days": "int", **{c: "float" for c in OUTPUT_COLS[5:]}}
+SPAN = 1 << 22  # > any date ordinal: key = employee code * SPAN + period ordinal
+WIDTH = len(TOTAL_COLS) + 1  # the totals plus a 0/1 column counting fortnights with any days
+
+
+def financial_year_start(d, month=7):
+    return date(d.year if d.month >= month else d.year - 1, month, 1)
+
+
+class Rollup:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seq = 0
+        self.employees = []                      # sorted; an employee's code is its index
+        self._codes = {}
+        self._emp = np.empty(0, dtype=np.int64)  # per slot, in (employee, period) order
+        self._period = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._values = np.zeros((0, WIDTH), dtype=np.int64)
+        self._tree = np.zeros((1, WIDTH), dtype=np.int64)  # 1-based Fenwick tree over _values
+
+    def __len__(self):
+        return len(self._keys)
+
+    # ---------- loading ----------
+    def refresh(self, store):
+        """Apply every fortnight the store re-aggregated since the last refresh; returns how many."""
+        with self._lock:
+            n = 0
+            for rows in store.iter_fortnight_totals(self.seq):
+                self._apply(rows)
+                self.seq = max(self.seq, rows[-1][2])
+                n += len(rows)
+            return n
+
+    def _apply(self, rows):
+        values = np.array([r[3:] for r in rows], dtype=np.int64).reshape(-1, len(TOTAL_COLS))
+        values = np.column_stack([values, values[:, 0] > 0])
+        periods = np.array([date.fromisoformat(r[1]).toordinal() for r in rows], dtype=np.int64)
+        codes = np.array([self._codes.get(r[0], -1) for r in rows], dtype=np.int64)
+        slot = np.full(len(rows), -1, dtype=np.int64)
+        known = codes >= 0
+        if known.any():
+            keys = codes[known] * SPAN + periods[known]
+            pos = np.minimum(np.searchsorted(self._keys, keys), max(len(self._keys) - 1, 0))
+            slot[known] = np.where(self._keys[pos] == keys, pos, -1) if len(self._keys) else -1
+        # a refetched fortnight: add its change along its own Fenwick path
+        for i in np.flatnonzero(slot >= 0).tolist():
+            self._add(int(slot[i]), values[i] - self._values[slot[i]])
+        new = slot < 0
+        if new.any():
+            self._insert([r[0] for r, is_new in zip(rows, new.tolist()) if is_new], periods[new], values[new])
+
+    def _add(self, pos, delta):
+        self._values[pos] += delta
+        i, n = pos + 1, len(self._keys)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _insert(self, employees, periods, values):
+        """Add fortnights not seen before (latest wins within the batch) and re-lay the arrays."""
+        names = self.employees + sorted(set(employees) - set(self._codes))
+        order = sorted(range(len(names)), key=names.__getitem__)
+        recode = np.empty(len(names), dtype=np.int64)
+        recode[order] = np.arange(len(names))
+        self.employees = [names[i] for i in order]
+        self._codes = {e: i for i, e in enumerate(self.employees)}
+        codes = np.array([self._codes[e] for e in employees], dtype=np.int64)
+        emp = np.concatenate([recode[self._emp], codes]) if len(self._emp) else codes
+        period = np.concatenate([self._period, periods])
+        keys = emp * SPAN + period
+        values = np.concatenate([self._values, values])
+        idx = np.arange(len(keys))[::-1]
+        _, last = np.unique(keys[idx], return_index=True)  # the last row for each key
+        keep = np.sort(idx[last])
+        keep = keep[np.argsort(keys[keep], kind="stable")]
+        self._emp, self._period, self._keys, self._values = emp[keep], period[keep], keys[keep], values[keep]
+        # Fenwick tree from prefix sums: tree[i] = P[i] - P[i - lowbit(i)]
+        prefix = np.zeros((len(keep) + 1, WIDTH), dtype=np.int64)
+        np.cumsum(self._values, axis=0, out=prefix[1:])
+        i = np.arange(1, len(keep) + 1)
+        self._tree = np.zeros_like(prefix)
+        self._tree[1:] = prefix[i] - prefix[i - (i & -i)]
+
+    # ---------- queries ----------
+    def _prefix(self, idx):
+        """Sums of _values[:k] for each k in idx."""
+        out = np.zeros((len(idx), WIDTH), dtype=np.int64)
+        i = np.array(idx, dtype=np.int64)
+        while (live := i > 0).any():
+            out[live] += self._tree[i[live]]
+            i[live] -= i[live] & -i[live]
+        return out
+
+    def totals(self, first, last, employees=None):
+        """(employees, fortnights, sums) for fortnights starting first..last.
+
+        employees defaults to everyone; unknown ones get zeros.  fortnights
+        is an int array (those with any days) and sums an int64
+        (employees, TOTAL_COLS) array of day counts and cents.
+        """
+        with self._lock:
+            employees = list(self.employees if employees is None else employees)
+            codes = np.array([self._codes.get(e, -1) for e in employees], dtype=np.int64)
+            lo = np.searchsorted(self._keys, codes * SPAN + first.toordinal(), side="left")
+            hi = np.searchsorted(self._keys, codes * SPAN + last.toordinal(), side="right")
+            lo[codes < 0] = hi[codes < 0] = 0
+            sums = self._prefix(hi) - self._prefix(lo)
+            return employees, sums[:, -1], sums[:, :-1]
+
+    def rows(self, first, last, employees=None):
+        """totals() as OUTPUT_COLS rows (dollars)."""
+        employees, fortnights, sums = self.totals(first, last, employees)
+        return [[e, first.isoformat(), last.isoformat(), int(n), int(s[0]), *(s[1:] / 100).tolist()]
+                for e, n, s in zip(employees, fortnights.tolist(), sums)]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Year-to-date and date-range payroll totals per employee.")
+    p.add_argument("--ytd", type=date.fromisoformat, metavar="DATE",
+                   help="financial year to date up to DATE (default: today)")
+    p.add_argument("--from", dest="first", type=date.fromisoformat, help="first date (YYYY-MM-DD)")
+    p.add_argument("--to", dest="last", type=date.fromisoformat, help="last date (default: today)")
+    p.add_argument("--employee", action="append", help="only these employees (repeatable)")
+    p.add_argument("--db", default=DB_PATH, help="SQLite store (default: TIMESHEET_DB or timesheet.db)")
+    p.add_argument("-o", "--output", default="-", help=".csv (default: stdout), .parquet, .arrow or .xlsx")
+    args = p.parse_args(argv)
+
+    last = args.last or args.ytd or date.today()
+    first = args.first or financial_year_start(last)
+    t0 = time.perf_counter()
+    rollup = Rollup()
+    rollup.refresh(TimesheetStore(args.db))
+    loaded = time.perf_counter()
+    rows = rollup.rows(first, last, args.employee)
+    queried = time.perf_counter()
+    with open_sink(args.output, OUTPUT_COLS, OUTPUT_TYPES, totals=OUTPUT_COLS[5:]) as sink:
+        sink.write(rows)
+    print(f"{len(rows)} employees, {len(rollup)} fortnights loaded in {loaded - t0:.2f}s, "
+          f"totals for {first} → {last} in {(queried - loaded) * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# runs.py
+"""Checkpointed, resumable sharded bulk runs (bulk.py --run-dir).
+
+    python bulk.py history.csv --run-dir runs/2025 --anchor 2024-12-30
+    python bulk.py history.csv --run-dir runs/2025 --anchor 2024-12-30 --workers 8   # after a crash: the rest
+    python bulk.py history.csv --run-dir runs/2025 --anchor 2024-12-30 --shard-format parquet
+
+The grouped input is cut into blocks of whole employees, and each block
+into periods of --period-fortnights fortnights from the anchor; one block
+and period is a shard.  A block ends after an employee whose name hashes to
+0 mod --shard-employees, so cut points depend on names only, not positions,
+and adding or editing an employee leaves the other shards alone.  A block is
+held in memory while it is split, so --shard-employees bounds memory on
+average: blocks average that many employees, and one over k times as many
+turns up with probability about e**-k.
+
+    manifest.json             run settings, fingerprints and every shard in input order
+    shards/<id>.days.<fmt>    computed day rows (bulk.DAY_COLS)
+    shards/<id>.totals.<fmt>  employee-fortnight totals (bulk.TOTAL_COLS)
+    shards/<id>.errors.<fmt>  validation error index (header only when the shard is clean)
+    shards/<id>.json          the shard's record, written last: a shard with a record is complete
+
+Every file is written under a temporary name, synced and renamed into
+place, so a crash never leaves a half-written shard that looks done.  On a
+rerun a shard is skipped when its record has the same content hash of its
+input rows, the same rate schedule and holiday calendar fingerprints and
+the same run settings, and its files are still there at the recorded sizes;
+anything else is recomputed.  Shards from earlier runs that the input no
+longer produces are removed once a run completes.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from bulk import (DAY_COLS, DAY_TYPES, INPUT_COLS, RATE_COLS, TOTAL_COLS, TOTAL_TYPES, Rejects, fortnight_start,
+                  run, validated)
+from export import open_sink
+from holiday_calendar import default_calendar
+from rate_tables import default_schedule
+from validation import ERROR_COLS
+
+SCHEMA = 1  # bump when the shard layout or computation changes, to recompute every shard
+KINDS = {"days": (DAY_COLS, DAY_TYPES), "totals": (TOTAL_COLS, TOTAL_TYPES), "errors": (ERROR_COLS, None)}
+
+
+def _digest(*parts, size=8):
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=size).hexdigest()
+
+
+def _sync(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def write_json(path, obj):
+    """Write obj as JSON atomically (temporary file, fsync, rename)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ---------- Sharding ----------
+def iter_blocks(entries, shard_employees):
+    """Group the (grouped) entry stream into lists of whole employees (see the module docstring)."""
+    block, current = [], None
+    for r in entries:
+        employee = str(r.get("employee") or "")
+        if employee != current:
+            if current is not None and int(_digest(current), 16) % shard_employees == 0:
+                yield block
+                block = []
+            current = employee
+        block.append(r)
+    if block:
+        yield block
+
+
+def iter_shards(entries, anchor, period_fortnights=26, shard_employees=200):
+    """Yield (shard id, period start, rows) in input order.
+
+    A row with an unreadable date stays with the row before it (validation
+    rejects it later), so its shard is still a pure function of the input.
+    """
+    days = 14 * period_fortnights
+    for block in iter_blocks(entries, shard_employees):
+        periods, start = {}, anchor
+        for r in block:
+            try:
+                fortnight = fortnight_start(str(r.get("date") or "").strip(), anchor)
+                start = anchor + timedelta(days=(fortnight - anchor).days // days * days)
+            except ValueError:
+                pass
+            periods.setdefault(start, []).append(r)
+        first, last = str(block[0].get("employee") or ""), str(block[-1].get("employee") or "")
+        for start, rows in sorted(periods.items()):
+            yield f"{start.isoformat()}_{_digest(first, last)}", start, rows
+
+
+def input_hash(rows):
+    """Content hash of a shard's input rows, as read."""
+    h = hashlib.blake2b(digest_size=16)
+    for r in rows:
+        h.update(json.dumps([r.get(c) for c in INPUT_COLS], default=str).encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+# ---------- Computing a shard ----------
+def compute_shard(shard_dir, shard_id, rows, anchor, fmt="csv", chunk_size=10_000, keep_invalid=False):
+    """Validate, compute and write one shard's files; returns the record fields they produce."""
+    paths = {k: os.path.join(shard_dir, f"{shard_id}.{k}.{fmt}") for k in KINDS}
+    sinks = {k: open_sink(p + ".tmp", *KINDS[k], fmt=fmt,
+                          totals=RATE_COLS if k == "days" else TOTAL_COLS[4:] if k == "totals" else ())
+             for k, p in paths.items()}
+    rejects = Rejects(sinks["errors"])
+    try:
+        n_days, n_fortnights = run(validated(rows, rejects, chunk_size, keep_invalid),
+                                   sinks["days"], sinks["totals"], anchor, chunk_size)
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    files = {}
+    for k, path in paths.items():
+        _sync(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        files[k] = {"name": os.path.basename(path), "bytes": os.path.getsize(path)}
+    return {"days": n_days, "fortnights": n_fortnights, "invalid_rows": rejects.rows, "files": files}
+
+
+def _work(args):
+    t0 = time.perf_counter()
+    return compute_shard(*args), time.perf_counter() - t0
+
+
+def _intact(record, shard_dir):
+    return all(os.path.exists(p := os.path.join(shard_dir, f["name"])) and os.path.getsize(p) == f["bytes"]
+               for f in record["files"].values())
+
+
+# ---------- Running ----------
+def run_sharded(entries, run_dir, anchor, period_fortnights=26, shard_employees=200, fmt="csv", workers=1,
+                chunk_size=10_000, keep_invalid=False, log=sys.stderr):
+    """Compute every shard not already complete in run_dir; returns the manifest."""
+    shard_dir = os.path.join(run_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    settings = {"schema": SCHEMA, "anchor": anchor.isoformat(), "period_fortnights": period_fortnights,
+                "shard_employees": shard_employees, "format": fmt, "keep_invalid": keep_invalid}
+    fingerprints = {"rates": default_schedule().fingerprint, "holidays": default_calendar().fingerprint}
+    key = _digest(json.dumps(settings, sort_keys=True), json.dumps(fingerprints, sort_keys=True), size=16)
+
+    records = {}
+    for name in os.listdir(shard_dir):
+        if name.endswith(".json"):
+            with open(os.path.join(shard_dir, name), encoding="utf-8") as f:
+                records[name[:-5]] = json.load(f)
+
+    shards, seen = [], set()
+    counts = {"computed": 0, "skipped": 0}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending = deque()
+
+    def finish(record, result, elapsed):
+        record.update(result, seconds=round(elapsed, 3))
+        write_json(os.path.join(shard_dir, record["id"] + ".json"), record)
+        counts["computed"] += 1
+        log.write(f"shard {record['id']}: {record['days']} days in {elapsed:.2f}s\n")
+
+    try:
+        for shard_id, start, rows in iter_shards(entries, anchor, period_fortnights, shard_employees):
+            if shard_id in seen:
+                raise ValueError(f"shard {shard_id} came up twice: the input must be grouped by employee")
+            seen.add(shard_id)
+            record = {"id": shard_id, "period_start": start.isoformat(),
+                      "period_end": (start + timedelta(days=14 * period_fortnights - 1)).isoformat(),
+                      "first_employee": str(rows[0].get("employee") or ""),
+                      "last_employee": str(rows[-1].get("employee") or ""),
+                      "rows": len(rows), "input_hash": input_hash(rows), "key": key}
+            shards.append(record)
+            done = records.get(shard_id)
+            if done and all(done.get(k) == record[k] for k in ("input_hash", "key")) and _intact(done, shard_dir):
+                record.update(done)
+                counts["skipped"] += 1
+                continue
+            if done:  # stale: its files are about to be replaced
+                os.remove(os.path.join(shard_dir, shard_id + ".json"))
+            args = (shard_dir, shard_id, rows, anchor, fmt, chunk_size, keep_invalid)
+            if pool is None:
+                finish(record, *_work(args))
+                continue
+            pending.append((record, pool.submit(_work, args)))
+            while len(pending) >= 2 * workers or (pending and pending[0][1].done()):
+                record_done, fut = pending.popleft()
+                finish(record_done, *fut.result())
+        while pending:
+            record_done, fut = pending.popleft()
+            finish(record_done, *fut.result())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    # the run is complete: drop shards the input no longer produces, then record it all
+    current = {r["id"] for r in shards}
+    for name in os.listdir(shard_dir):
+        if name.endswith(".tmp") or name.split(".", 1)[0] not in current:
+            os.remove(os.path.join(shard_dir, name))
+    manifest = {"settings": settings, "fingerprints": fingerprints, "completed": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                **counts, **{k: sum(r[k] for r in shards) for k in ("rows", "days", "fortnights", "invalid_rows")},
+                "shards": shards}
+    write_json(os.path.join(run_dir, "manifest.json"), manifest)
+    return manifest
@@ -0,0 +1,431 @@
+# service.py
+"""Asyncio HTTP calculation service: fortnights and bulk rows in, computed payroll out, as JSON.
+
+    python service.py --port 8765 --workers 4
+    curl -s localhost:8765/fortnight -d '{"start_date": "2025-04-14", "entries": [...14 days...]}'
+    curl -s localhost:8765/bulk -d '{"anchor": "2025-04-14", "rows": [...bulk.py input rows...]}'
+    curl -s localhost:8765/metrics
+    python benchmarks/bench_service.py --clients 64 --requests 100     # load test on this machine
+
+    POST /fortnight  {"start_date", "entries": the pages' session_state["entries"] (date_str optional),
+                      "employee" and "state" optional}
+                     -> {"columns", "days", "totals"}; 422 with {"errors"} if any day is invalid,
+                        422 if the state is not a 2-3 letter code
+    POST /bulk       {"rows": bulk.py input dicts, "anchor" optional}
+                     -> {"columns", "days", "rejected", "errors"} plus per employee-fortnight
+                        {"totals_columns", "totals"} when an anchor is given
+    GET  /metrics    Prometheus text (?format=json for the JSON snapshot)
+    GET  /health
+
+Day rows are bulk.py's DAY_COLS and totals its TOTAL_COLS (with the
+long-fortnight deduction), so a response matches what the CLI writes.
+
+Rows from concurrent requests are queued and coalesced into batches of up
+to --batch-rows: a batch goes as soon as it is full, or --batch-ms after
+its oldest request arrived, and while every worker is busy the queue simply
+grows into bigger batches.  Each batch is validated (validation.py) and
+computed (bulk.compute_chunk) in one call on a pool of --workers
+processes, and at most --workers batches are in flight, so the event loop
+only parses, routes and splits results.  A bulk request larger than a batch
+is split across several, so big requests use every worker.  If a batch
+fails outright, its requests are rerun one at a time so the error reaches
+only the request that caused it.
+
+Backpressure: at most --max-pending rows may be queued or computing.  A
+request that does not fit is answered 503 with Retry-After at once rather
+than queued; one with more rows than that, or a body over --max-body
+bytes, gets 413.  Per-request latency (request_fortnight, request_bulk),
+queue wait, batch and worker times are kept as histograms and served at
+/metrics.  Everything is standard library plus the app's own modules, so
+it runs offline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+from bulk import DAY_COLS, FIELDS, TOTAL_COLS, FortnightTotals, compute_chunk
+from holiday_calendar import DEFAULT_STATE
+from metrics import LATENCY_BUCKETS, Metrics
+from validation import STATE_ERROR, state_ok, validate_rows
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=()):
+        super().__init__(message)
+        self.status, self.headers = status, list(headers)
+
+
+# ---------- Worker side ----------
+def _work(rows, collect_metrics=True):
+    """Validate and compute one batch in a worker process.
+
+    Returns (seconds, bad, errors, days, metrics snapshot): bad flags each
+    input row, errors is validate_rows' [(row, field, reason)] and days the
+    computed rows of the valid ones, in order (with bulk's trailing any_ado).
+    """
+    t0 = time.perf_counter()
+    metrics = Metrics(enabled=collect_metrics)
+    with metrics.timer("validate"):
+        bad, errors = validate_rows(rows)
+    if errors:
+        metrics.count("invalid_rows", int(bad.sum()))
+        rows = [r for r, b in zip(rows, bad.tolist()) if not b]
+    days = compute_chunk(rows, metrics)
+    return time.perf_counter() - t0, bad.tolist(), errors, days, metrics.snapshot()
+
+
+# ---------- Batching ----------
+class Batcher:
+    """Coalesces queued rows from concurrent requests into batches for the process pool."""
+
+    def __init__(self, pool, workers, metrics, batch_rows=2_000, batch_ms=2.0, max_pending=100_000):
+        self.pool, self.metrics = pool, metrics
+        self.batch_rows, self.batch_s, self.max_pending = batch_rows, batch_ms / 1000, max_pending
+        self.slots = asyncio.Semaphore(workers)
+        self.queue = deque()  # (rows, future, enqueued at)
+        self.queued = 0   # rows waiting in the queue
+        self.pending = 0  # rows queued or computing
+        self.busy = 0     # batches computing
+        self._wakeup, self._full = asyncio.Event(), asyncio.Event()
+        self._tasks = set()
+
+    async def compute(self, rows):
+        """(errors, days) for rows, as _work returns them; raises HTTPError 503/413 when they do not fit."""
+        n = len(rows)
+        if n > self.max_pending:
+            raise HTTPError(413, f"{n} rows is more than the {self.max_pending} this service takes at once; "
+                                 f"split the request")
+        if self.pending and self.pending + n > self.max_pending:
+            self.metrics.count("rejected_busy")
+            raise HTTPError(503, "busy, retry shortly", [("Retry-After", "1")])
+        if not n:
+            return [], []
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        parts = []
+        for i in range(0, n, self.batch_rows):
+            fut = loop.create_future()
+            self.queue.append((rows[i:i + self.batch_rows], fut, now))
+            parts.append((i, fut))
+        self.pending += n
+        self.queued += n
+        self._wakeup.set()
+        if self.queued >= self.batch_rows:
+            self._full.set()
+        errors, days = [], []
+        for (i, _), (part_errors, part_days) in zip(parts, await asyncio.gather(*(f for _, f in parts))):
+            errors.extend((r + i, field, reason) for r, field, reason in part_errors)
+            days.extend(part_days)
+        return errors, days
+
+    async def run(self):
+        while True:
+            while not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await self.slots.acquire()
+            # a part-filled batch lingers until batch_ms after its oldest request, or until it fills
+            wait = self.queue[0][2] + self.batch_s - time.perf_counter() if self.queue else 0
+            if wait > 0 and self.queued < self.batch_rows:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            items = self._take()
+            if not items:
+                self.slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _take(self):
+        items, size = [], 0
+        while self.queue and (not items or size + len(self.queue[0][0]) <= self.batch_rows):
+            rows, fut, t = self.queue.popleft()
+            self.queued -= len(rows)
+            items.append((rows, fut, t))
+            size += len(rows)
+        return items
+
+    async def _run_batch(self, items):
+        t0 = time.perf_counter()
+        rows = [r for part, _, _ in items for r in part]
+        for _, _, t in items:
+            self.metrics.observe("queue_wait", t0 - t)
+        self.busy += 1
+        try:
+            try:
+                seconds, bad, errors, days, snapshot = await asyncio.get_running_loop().run_in_executor(
+                    self.pool, _work, rows)
+            except Exception as exc:  # a worker died or the batch could not be computed
+                if len(items) > 1:
+                    await self._isolate(items)
+                elif not items[0][1].done():
+                    items[0][1].set_exception(exc)
+                return
+        finally:
+            self.busy -= 1
+            self.pending -= len(rows)
+            self.slots.release()
+        self.metrics.merge(snapshot)
+        self.metrics.observe("worker", seconds)
+        self.metrics.observe("batch", time.perf_counter() - t0)
+        self.metrics.count("batches")
+        self.metrics.count("batched_requests", len(items))
+        self._split(items, bad, errors, days)
+
+    async def _isolate(self, items):
+        """Rerun each request of a failed batch on its own, so only the one that fails gets the error."""
+        self.metrics.count("isolated_batches")
+        loop = asyncio.get_running_loop()
+        for item in items:
+            fut = item[1]
+            if fut.done():
+                continue
+            try:
+                _, bad, errors, days, snapshot = await loop.run_in_executor(self.pool, _work, item[0])
+            except Exception as exc:
+                if not fut.done():
+                    fut.set_exception(exc)
+                continue
+            self.metrics.merge(snapshot)
+            self._split([item], bad, errors, days)
+
+    @staticmethod
+    def _split(items, bad, errors, days):
+        """Hand each request its rows of a batch result: rows offset..offset+len(part)."""
+        error_rows = [e[0] for e in errors]
+        offset = done = 0
+        for part, fut, _ in items:
+            end = offset + len(part)
+            good = len(part) - sum(bad[offset:end])
+            if not fut.done():
+                lo, hi = bisect_left(error_rows, offset), bisect_left(error_rows, end)
+                fut.set_result(([(r - offset, field, reason) for r, field, reason in errors[lo:hi]],
+                                days[done:done + good]))
+            offset, done = end, done + good
+
+
+# ---------- Requests ----------
+def _body(raw):
+    try:
+        body = json.loads(raw or b"null")
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise HTTPError(400, f"body is not JSON: {exc}")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return body
+
+
+def _date(value, what):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise HTTPError(400, f"{what} must be a date (YYYY-MM-DD)")
+
+
+def fortnight_rows(body):
+    """(start, bulk input rows) for a /fortnight body."""
+    start = _date(body.get("start_date"), "start_date")
+    entries = body.get("entries")
+    if not isinstance(entries, list) or len(entries) != 14 or not all(isinstance(e, dict) for e in entries):
+        raise HTTPError(400, "entries must be a list of the fortnight's 14 day objects")
+    employee, state = str(body.get("employee") or "-"), str(body.get("state") or DEFAULT_STATE).strip().upper()
+    if not state_ok(state):
+        raise HTTPError(422, STATE_ERROR.format(value=state))
+    rows = []
+    for i, e in enumerate(entries):
+        day = (start + timedelta(days=i)).isoformat()
+        if e.get("date_str", day) != day:
+            raise HTTPError(400, f"entries[{i}] is dated {e['date_str']}, expected {day}")
+        rows.append({"employee": employee, "date": day, "state": state, **{f: e.get(f) for f in FIELDS},
+                     "sick": e.get("sick"), "off": e.get("off"), "ado": e.get("ado")})
+    return start, rows
+
+
+def fortnight_totals(days, anchor):
+    """TOTAL_COLS rows per employee-fortnight of computed days (in any order)."""
+    totals, out = FortnightTotals(anchor), []
+    for row in sorted(days, key=lambda r: (r[0], r[1])):
+        done = totals.add(row)
+        if done:
+            out.append(done)
+    done = totals.flush()
+    return out + [done] if done else out
+
+
+class Service:
+    def __init__(self, workers=os.cpu_count() or 1, max_body=8 << 20, **batching):
+        self.workers, self.max_body = workers, max_body
+        self.metrics = Metrics(enabled=True, buckets=LATENCY_BUCKETS)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.batcher = Batcher(self.pool, workers, self.metrics, **batching)
+        self.started = time.time()
+
+    async def warm_up(self):
+        """Start the workers and pay their imports and first-call costs before serving."""
+        _, rows = fortnight_rows({"start_date": "2025-04-14", "entries": [{}] * 14})
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _work, rows, False) for _ in range(self.workers)))
+
+    async def fortnight(self, body):
+        start, rows = fortnight_rows(body)
+        errors, days = await self.batcher.compute(rows)
+        if errors:
+            return 422, {"errors": [{"day": r, "date": rows[r]["date"], "field": field, "reason": reason}
+                                    for r, field, reason in errors]}
+        return 200, {"columns": DAY_COLS, "days": [d[:-1] for d in days],
+                     "totals": dict(zip(TOTAL_COLS, fortnight_totals(days, start)[0]))}
+
+    async def bulk(self, body):
+        rows = body.get("rows")
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise HTTPError(400, "rows must be a list of objects (bulk.py input rows)")
+        anchor = _date(body["anchor"], "anchor") if body.get("anchor") else None
+        errors, days = await self.batcher.compute(rows)
+        out = {"columns": DAY_COLS, "days": [d[:-1] for d in days], "rejected": len({e[0] for e in errors}),
+               "errors": [[r, field, reason] for r, field, reason in errors]}
+        if anchor:
+            out.update(totals_columns=TOTAL_COLS, totals=fortnight_totals(days, anchor))
+        return 200, out
+
+    def status(self):
+        b = self.batcher
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started, 1), "workers": self.workers,
+                "busy_workers": b.busy, "queued_requests": len(b.queue), "queued_rows": b.queued,
+                "pending_rows": b.pending, "max_pending_rows": b.max_pending}
+
+    def prometheus(self):
+        s = self.status()
+        lines = [self.metrics.to_prometheus().rstrip("\n")]
+        for name in ("busy_workers", "queued_requests", "queued_rows", "pending_rows"):
+            lines += [f"# TYPE timesheet_service_{name} gauge", f"timesheet_service_{name} {s[name]}"]
+        return "\n".join(lines) + "\n"
+
+    async def route(self, method, target, raw):
+        """(status, content type, body bytes, extra headers) for one request."""
+        url = urlsplit(target)
+        if url.path in ("/fortnight", "/bulk"):
+            if method != "POST":
+                raise HTTPError(405, "use POST", [("Allow", "POST")])
+            status, out = await getattr(self, url.path[1:])(_body(raw))
+            return status, "application/json", json.dumps(out).encode(), []
+        if url.path in ("/metrics", "/health"):
+            if method != "GET":
+                raise HTTPError(405, "use GET", [("Allow", "GET")])
+            if url.path == "/health":
+                return 200, "application/json", json.dumps(self.status()).encode(), []
+            if parse_qs(url.query).get("format") == ["json"]:
+                return 200, "application/json", json.dumps({**self.metrics.snapshot(), **self.status()}).encode(), []
+            return 200, "text/plain; version=0.0.4", self.prometheus().encode(), []
+        raise HTTPError(404, f"no route {url.path}")
+
+    # ---------- HTTP/1.1 ----------
+    async def handle(self, reader, writer):
+        """One connection: requests are served in turn while the client keeps it alive."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                t0 = time.perf_counter()
+                headers, keep_alive, name = [], False, "request_other"
+                try:
+                    try:
+                        method, target, version = line.decode("latin-1").split()
+                        fields = {}
+                        while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                            k, _, v = h.decode("latin-1").partition(":")
+                            fields[k.strip().lower()] = v.strip()
+                        length = int(fields.get("content-length") or 0)
+                        if length < 0:
+                            raise ValueError(length)
+                    except ValueError:
+                        raise HTTPError(400, "malformed request")
+                    connection = fields.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                    if "chunked" in fields.get("transfer-encoding", "").lower():
+                        keep_alive = False
+                        raise HTTPError(411, "send a Content-Length")
+                    if length > self.max_body:
+                        keep_alive = False  # the body is left unread
+                        raise HTTPError(413, f"body is over {self.max_body} bytes")
+                    raw = await reader.readexactly(length) if length else b""
+                    if urlsplit(target).path in ("/fortnight", "/bulk"):
+                        name = "request" + urlsplit(target).path.replace("/", "_")
+                    status, ctype, payload, headers = await self.route(method, target, raw)
+                except HTTPError as exc:
+                    status, ctype, headers = exc.status, "application/json", exc.headers
+                    payload = json.dumps({"error": str(exc)}).encode()
+                except Exception as exc:  # keep serving; the client gets a 500
+                    status, ctype = 500, "application/json"
+                    payload = json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode()
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {ctype}",
+                        f"Content-Length: {len(payload)}", f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                        *(f"{k}: {v}" for k, v in headers)]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                self.metrics.observe(name, time.perf_counter() - t0)
+                self.metrics.count(f"responses_{status}")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass  # the client hung up (or sent a header line longer than the stream limit)
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, ready=None, **options):
+    """Run the service until SIGINT/SIGTERM; ready(port) is called once it is listening."""
+    service = Service(**options)
+    try:
+        await service.warm_up()
+        batcher = asyncio.create_task(service.batcher.run())
+        server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        if ready:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await stop.wait()
+        batcher.cancel()
+    finally:
+        service.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="HTTP payroll calculation service (fortnight and bulk JSON).")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765, help="0 picks a free port (printed on startup)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="calculation processes")
+    p.add_argument("--batch-rows", type=int, default=2_000, help="most rows computed in one batch")
+    p.add_argument("--batch-ms", type=float, default=2.0,
+                   help="how long a part-filled batch waits for more requests (milliseconds)")
+    p.add_argument("--max-pending", type=int, default=100_000,
+                   help="rows queued or computing before requests get 503 (backpressure)")
+    p.add_argument("--max-body", type=int, default=8 << 20, help="largest request body in bytes (413 beyond)")
+    args = p.parse_args(argv)
+    asyncio.run(serve(args.host, args.port,
+                      ready=lambda port: print(f"listening on http://{args.host}:{port}", flush=True),
+                      workers=args.workers, max_body=args.max_body, batch_rows=args.batch_rows,
+                      batch_ms=args.batch_ms, max_pending=args.max_pending))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# simulate.py
+"""What-if roster simulation: pay for thousands of variants of one fortnight at once.
+
+    entries = st.session_state["entries"]                      # the base fortnight
+    v = grid(entries, {2: range(-60, 61, 15), 3: [0, 30]}, ado_days=[None, 4, 9])
+    v = sample(entries, 5000, max_move=120, seed=1)            # or random perturbations
+    result = simulate(entries, start_date, v)
+    summary(result), cheapest(result, 10)
+
+    python simulate.py --samples 10000                         # on a synthetic fortnight
+
+A variant moves shifts and/or the ADO:
+
+    on, off   (V, 14) minutes added to each day's sign-on / sign-off
+              (equal values move a shift, unequal ones stretch it)
+    ado       (V,) day index the fortnight's ADO is placed on, -1 to keep
+              the base's.  If the base has an ADO elsewhere the two days
+              swap rosters; otherwise that day's shift is given up for it.
+
+times="roster" moves rostered and actual times together (a roster change:
+penalty, special and weekend classes move, units stay), "actual" only the
+actual ones (lift-up/lay-back units change too).  Every variant-day is
+classified (engine.classify_batch) and rated (engine.calculate_batch) in
+one pass, at the rate table in force on each date, so results equal
+classify_day + calculate_row to the cent, with the long-fortnight
+deduction for variants without an ADO.
+
+A variant is feasible when every shift is 1 minute to max_length long,
+consecutive shifts are at least min_rest apart and the ADO is on a weekday.
+"""
+import argparse
+import itertools
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from engine import COMPONENTS, FLAG_ADO, FLAG_NONE, FLAG_OFF, calculate_batch, classify_batch, round_cents
+from rate_tables import default_schedule
+from utils import apply_flags, long_fortnight_deduction, parse_duration, parse_minutes
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TIME_KEYS = ["rs_on", "as_on", "rs_off", "as_off"]
+SHIFT_KEYS = [*TIME_KEYS, "worked", "extra"]
+
+
+# ---------- Base fortnight ----------
+def _ado_day(entries):
+    """Index of the base fortnight's ADO (toggle or typed), or -1."""
+    for i, e in enumerate(entries):
+        if e["ado"] or any(str(e[k]).strip().upper() == "ADO" for k in SHIFT_KEYS):
+            return i
+    return -1
+
+
+def _days(entries, ado):
+    """Per-day arrays for the base with its ADO placed on day ado (-1: as entered)."""
+    base = _ado_day(entries)
+    entries = [dict(e) for e in entries]
+    if ado >= 0 and ado != base:
+        if base >= 0:  # swap rosters: the old ADO day works the new ADO day's shift
+            entries[base].update({k: entries[ado][k] for k in SHIFT_KEYS}, ado=False)
+        entries[ado].update(dict.fromkeys(SHIFT_KEYS, ""), ado=True)
+
+    out = {k: [] for k in ("minutes", "worked", "extra", "flag", "any_ado", "blocked", "sick")}
+    for e in entries:
+        values, _ = apply_flags([str(e[k]) for k in SHIFT_KEYS], e["sick"], e["off"], e["ado"])
+        upper = [v.strip().upper() for v in values]
+        out["minutes"].append([-1 if (m := parse_minutes(v)) is None else m for v in values[:4]])
+        out["worked"].append(parse_duration(values[4]) or 0)
+        out["extra"].append(parse_duration(values[5]) or 0)
+        out["flag"].append(FLAG_ADO if upper[0] == "ADO" else FLAG_OFF if upper[0] == "OFF" else FLAG_NONE)
+        out["any_ado"].append("ADO" in upper)
+        out["blocked"].append("ADO" in upper or "OFF" in upper or bool(e["sick"]))
+        out["sick"].append(bool(e["sick"]))
+    return {k: np.array(v) for k, v in out.items()}
+
+
+# ---------- Variants ----------
+def variants(on, off=None, ado=None):
+    on = np.atleast_2d(np.asarray(on, dtype=np.int64))
+    off = on if off is None else np.atleast_2d(np.asarray(off, dtype=np.int64))
+    ado = np.full(len(on), -1, dtype=np.int64) if ado is None else np.asarray(ado, dtype=np.int64)
+    return {"on": on, "off": off, "ado": ado}
+
+
+def grid(entries, moves, ado_days=(None,), stretch=False):
+    """Every combination of per-day moves and ADO placements.
+
+    moves maps a day index to the minutes to try (e.g. {2: range(-60, 61, 15)});
+    with stretch only sign-ons move (sign-offs stay put).
+    """
+    days = sorted(moves)
+    combos = list(itertools.product(*(list(moves[d]) for d in days), [-1 if a is None else a for a in ado_days]))
+    on = np.zeros((len(combos), len(entries)), dtype=np.int64)
+    grid_ = np.array(combos, dtype=np.int64).reshape(len(combos), len(days) + 1)
+    on[:, days] = grid_[:, :-1]
+    return variants(on, np.zeros_like(on) if stretch else on, grid_[:, -1])
+
+
+def sample(entries, n, max_move=120, step=15, p_move=0.3, p_ado=0.5, seed=0):
+    """n random variants: each rostered day moves by a multiple of step up to ±max_move with
+    probability p_move, and the ADO goes to a random weekday with probability p_ado.
+    (The first variant is always the base.)"""
+    rng = np.random.default_rng(seed)
+    base = _days(entries, -1)
+    working = np.flatnonzero((base["minutes"] >= 0).any(axis=1) & ~base["blocked"])
+    k = max_move // step
+    on = np.zeros((n, len(entries)), dtype=np.int64)
+    moved = rng.random((n, len(working))) < p_move
+    on[:, working] = np.where(moved, rng.integers(-k, k + 1, (n, len(working))) * step, 0)
+    weekdays = [i for i, e in enumerate(entries) if e["weekday"] not in ("Saturday", "Sunday")]
+    ado = np.where(rng.random(n) < p_ado, rng.choice(weekdays, n), -1) if weekdays else np.full(n, -1)
+    on[0], ado[0] = 0, -1
+    return variants(on, on, ado)
+
+
+# ---------- Simulation ----------
+def simulate(entries, start, v, times="roster", rates=None, min_rest=600, max_length=720):
+    """Pay of every variant: a dict of (V,) arrays.
+
+    total (cents, after any deduction), components (V, 7 COMPONENTS in
+    cents), deduction, feasible, plus the variant arrays themselves.
+    rates defaults to the bundled schedule (a RateSchedule).
+    """
+    schedule = rates or default_schedule()
+    n_days = len(entries)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(n_days)]
+    on, off, ado = v["on"], v["off"], v["ado"]
+    n = len(ado)
+
+    # one table of base days per ADO placement in use, gathered per variant
+    choices, pick = np.unique(ado, return_inverse=True)
+    tables = [_days(entries, int(c)) for c in choices]
+    day = {k: np.stack([t[k] for t in tables])[pick] for k in tables[0]}  # (V, 14, ...)
+
+    minutes = day["minutes"].copy()
+    shifted = (minutes >= 0) & ~day["blocked"][..., None]
+    moves = np.stack([on, on, off, off], axis=-1) if times == "roster" else \
+        np.stack([np.zeros_like(on), on, np.zeros_like(off), off], axis=-1)
+    absolute = np.where(shifted, minutes + moves, -1)  # may leave 0..1439: the shift crosses midnight
+    minutes = np.where(shifted, absolute % 1440, minutes)
+
+    weekday = np.array([WEEKDAYS.index(e["weekday"]) for e in entries])
+    day_codes = np.broadcast_to(np.where(weekday == 5, 1, np.where(weekday == 6, 2, 0)), (n, n_days))
+    flat = lambda a: a.reshape(n * n_days)  # noqa: E731
+    unit, penalty, special = classify_batch(flat(day_codes), *(flat(minutes[..., j]) for j in range(4)),
+                                            flat(day["worked"]), flat(day["extra"]), flat(day["blocked"]))
+    rated = calculate_batch(flat(day_codes), flat(day["flag"]), flat(day["sick"]), penalty, special, unit,
+                            flat(day["worked"]), flat(day["any_ado"]),
+                            rates={k: np.tile(a, n) if np.ndim(a) else a for k, a in schedule.columns(dates).items()})
+    components = np.stack([round_cents(rated[c]).reshape(n, n_days).sum(axis=1) for c in COMPONENTS], axis=1)
+
+    ded = round(long_fortnight_deduction(schedule.for_date(start)) * 100)
+    deduction = np.where(day["any_ado"].any(axis=1), 0, ded)
+
+    # feasibility on the actual times, laid out on one fortnight-long clock
+    a_on, a_off = absolute[..., 1], absolute[..., 3]
+    worked_day = (a_on >= 0) & (a_off >= 0)
+    length = np.where(a_off % 1440 < a_on % 1440, a_off % 1440 + 1440, a_off % 1440) - a_on % 1440
+    length = np.where(a_on % 1440 == a_off % 1440, 0, length)
+    start_at = np.arange(n_days) * 1440 + a_on
+    end_at = start_at + length
+    ok_length = ~worked_day | ((length > 0) & (length <= max_length))
+    rest = np.full((n, n_days), np.iinfo(np.int64).max)
+    last_end = np.full(n, np.iinfo(np.int64).min // 2)
+    for d in range(n_days):  # gap to the previous worked shift, walking the fortnight
+        rest[:, d] = np.where(worked_day[:, d], start_at[:, d] - last_end, rest[:, d])
+        last_end = np.where(worked_day[:, d], end_at[:, d], last_end)
+    placed = np.where(ado >= 0, weekday[np.maximum(ado, 0)] < 5, True)
+    feasible = ok_length.all(axis=1) & (rest >= min_rest).all(axis=1) & placed
+
+    # report only the moves that took effect (not those on ADO, OFF, sick or blank days)
+    moved = shifted.any(axis=-1)
+    return {"total": components[:, -1] - deduction, "components": components, "deduction": deduction,
+            "feasible": feasible, "on": np.where(moved, on, 0), "off": np.where(moved, off, 0), "ado": ado}
+
+
+def summary(result, bins=20):
+    """Distribution of feasible variants' totals (dollars): stats plus a histogram."""
+    totals = result["total"][result["feasible"]] / 100
+    if not len(totals):
+        return {"variants": len(result["total"]), "feasible": 0}
+    counts, edges = np.histogram(totals, bins=bins)
+    return {"variants": len(result["total"]), "feasible": len(totals), "min": totals.min(),
+            "p10": np.percentile(totals, 10), "median": np.median(totals), "p90": np.percentile(totals, 90),
+            "max": totals.max(), "mean": totals.mean(), "histogram": (counts, edges)}
+
+
+def cheapest(result, k=10):
+    """Indices of the k cheapest distinct feasible variants, cheapest (then fewest changes) first."""
+    idx = np.flatnonzero(result["feasible"])
+    changes = (result["on"][idx] != 0).sum(axis=1) + (result["off"][idx] != 0).sum(axis=1) + (result["ado"][idx] >= 0)
+    idx = idx[np.lexsort((changes, result["total"][idx]))]
+    out, seen = [], set()
+    for i in idx.tolist():
+        key = (result["on"][i].tobytes(), result["off"][i].tobytes(), int(result["ado"][i]))
+        if key not in seen:
+            seen.add(key)
+            out.append(i)
+            if len(out) == k:
+                break
+    return out
+
+
+def describe(entries, result, i):
+    """'Tue 15/04 +30m, ADO Fri 18/04' for variant i."""
+    parts = []
+    for d, (a, b) in enumerate(zip(result["on"][i].tolist(), result["off"][i].tolist())):
+        if a or b:
+            label = f"{entries[d]['weekday'][:3]} {entries[d]['date_str'][8:10]}/{entries[d]['date_str'][5:7]}"
+            parts.append(f"{label} {a:+d}m" if a == b else f"{label} on {a:+d}m off {b:+d}m")
+    if result["ado"][i] >= 0:
+        e = entries[int(result["ado"][i])]
+        parts.append(f"ADO {e['weekday'][:3]} {e['date_str'][8:10]}/{e['date_str'][5:7]}")
+    return ", ".join(parts) or "as entered"
+
+
+def main(argv=None):
+    import synthetic
+    p = argparse.ArgumentParser(description="What-if pay over random variants of a synthetic fortnight.")
+    p.add_argument("--samples", type=int, default=10_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--employee", type=int, default=0, help="synthetic employee number")
+    p.add_argument("--times", choices=["roster", "actual"], default="roster")
+    args = p.parse_args(argv)
+
+    entries = synthetic.fortnight_entries(args.seed, args.employee)
+    t0 = time.perf_counter()
+    result = simulate(entries, synthetic.DEFAULT_START, sample(entries, args.samples, seed=args.seed), args.times)
+    elapsed = time.perf_counter() - t0
+    s = summary(result)
+    print(f"{s['variants']} variants ({s['feasible']} feasible) in {elapsed * 1000:.0f}ms; "
+          f"base ${result['total'][0] / 100:,.2f}")
+    if s["feasible"]:
+        print(f"min ${s['min']:,.2f}  p10 ${s['p10']:,.2f}  median ${s['median']:,.2f}  "
+              f"p90 ${s['p90']:,.2f}  max ${s['max']:,.2f}")
+    for i in cheapest(result, 5):
+        print(f"  ${result['total'][i] / 100:>10,.2f}  {describe(entries, result, i)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# store.py
+"""SQLite-backed timesheet store: employees, day entries and computed results.
+
+One TimesheetStore (and its connection pool) is meant to be shared by every
+Streamlit session in the process; the pages get it through st.cache_resource.
+A fortnight is saved in one transaction and loaded in one query.
+
+Result rows keep the day's rating quantities next to its dollars (unit,
+penalty class and hours, special, day class, OFF/ADO flag, sick, any ADO),
+so a rate change is applied with rerate.py without reparsing any entry.
+
+Every write of day results also re-aggregates the employee-fortnights it
+touched (and only those) into fortnight_totals, in integer cents with the
+long-fortnight deduction, stamped with a rising seq so rollup.py can pick
+up just the fortnights that changed.  Those include the fortnights a
+re-saved day was filed under before; one left with no days keeps a zero
+row (days 0), so a running rollup sees it go.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from utils import long_fortnight_deduction
+
+DB_PATH = os.environ.get("TIMESHEET_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "timesheet.db"))
+
+ENTRY_COLS = ["rs_on", "as_on", "rs_off", "as_off", "worked", "extra", "sick", "off", "ado"]
+AMOUNT_COLS = ["ot_rate", "penalty_rate", "special_loading", "sick_rate", "loading", "daily_rate", "daily_count"]
+# engine.quantities() codes: day class, OFF/ADO flag, sick, any ADO, floor(worked or 8h)
+QUANTITY_COLS = ["day_class", "flag", "sick", "any_ado", "penalty_hours"]
+RESULT_COLS = ["unit", "penalty", "special", "holiday"] + AMOUNT_COLS + QUANTITY_COLS
+# per employee-fortnight: day count, then AMOUNT_COLS sums, deduction and total, all in cents
+TOTAL_COLS = ["days"] + AMOUNT_COLS + ["deduction", "total"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id TEXT PRIMARY KEY,
+    name        TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS day_entries (
+    employee_id  TEXT NOT NULL REFERENCES employees(employee_id),
+    date         TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    rs_on TEXT NOT NULL DEFAULT '', as_on TEXT NOT NULL DEFAULT '',
+    rs_off TEXT NOT NULL DEFAULT '', as_off TEXT NOT NULL DEFAULT '',
+    worked TEXT NOT NULL DEFAULT '', extra TEXT NOT NULL DEFAULT '',
+    sick INTEGER NOT NULL DEFAULT 0, off INTEGER NOT NULL DEFAULT 0, ado INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (employee_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_day_entries_period ON day_entries (period_start);
+CREATE TABLE IF NOT EXISTS day_results (
+    employee_id  TEXT NOT NULL REFERENCES employees(employee_id),
+    date         TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    unit REAL, penalty TEXT, special TEXT, holiday TEXT,
+    ot_rate REAL, penalty_rate REAL, special_loading REAL, sick_rate REAL,
+    loading REAL, daily_rate REAL, daily_count REAL,
+    day_class INTEGER, flag INTEGER, sick INTEGER, any_ado INTEGER, penalty_hours REAL,
+    PRIMARY KEY (employee_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_day_results_period ON day_results (period_start);
+CREATE TABLE IF NOT EXISTS fortnight_totals (
+    employee_id  TEXT NOT NULL REFERENCES employees(employee_id),
+    period_start TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    any_ado      INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    ot_rate INTEGER, penalty_rate INTEGER, special_loading INTEGER, sick_rate INTEGER,
+    loading INTEGER, daily_rate INTEGER, daily_count INTEGER,
+    deduction INTEGER, total INTEGER,
+    PRIMARY KEY (employee_id, period_start)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_fortnight_totals_seq ON fortnight_totals (seq);
+"""
+# columns added after the first release, for databases created before them
+MIGRATIONS = {"day_results": [("day_class", "INTEGER"), ("flag", "INTEGER"), ("sick", "INTEGER"),
+                              ("any_ado", "INTEGER"), ("penalty_hours", "REAL")]}
+
+
+# ---------- Connections ----------
+class ConnectionPool:
+    """Small thread-safe pool of SQLite connections (WAL mode, shared across sessions)."""
+
+    def __init__(self, path=DB_PATH, size=4):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ---------- Store ----------
+def fortnight_dates(start):
+    return [start + timedelta(days=i) for i in range(14)]
+
+
+class TimesheetStore:
+    def __init__(self, path=DB_PATH, pool_size=4):
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            for table, cols in MIGRATIONS.items():
+                have = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+                for name, kind in cols:
+                    if name not in have:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+            backfill = (conn.execute("SELECT 1 FROM day_results LIMIT 1").fetchone()
+                        and not conn.execute("SELECT 1 FROM fortnight_totals LIMIT 1").fetchone())
+        if backfill:  # a store from before fortnight_totals existed
+            self.rebuild_totals()
+
+    @contextmanager
+    def transaction(self):
+        with self.pool.connection() as conn:
+            with conn:
+                yield conn
+
+    def save_fortnight(self, employee_id, start, entries, name=""):
+        """Upsert 14 entry dicts (the session_state["entries"] shape) in one transaction."""
+        period = start.isoformat()
+        rows = [(employee_id, e["date_str"], period, *(e[c] for c in ENTRY_COLS)) for e in entries]
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO employees (employee_id, name) VALUES (?, ?) "
+                         "ON CONFLICT(employee_id) DO NOTHING", (employee_id, name))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO day_entries (employee_id, date, period_start, {', '.join(ENTRY_COLS)}) "
+                f"VALUES ({', '.join('?' * (len(ENTRY_COLS) + 3))})", rows)
+
+    def load_fortnight(self, employee_id, start):
+        """Entry dicts for the 14 days from start (blank days where nothing is stored)."""
+        days = fortnight_dates(start)
+        with self.pool.connection() as conn:
+            found = {r[0]: r[1:] for r in conn.execute(
+                f"SELECT date, {', '.join(ENTRY_COLS)} FROM day_entries "
+                "WHERE employee_id = ? AND date BETWEEN ? AND ?",
+                (employee_id, days[0].isoformat(), days[-1].isoformat()))}
+        entries = []
+        for d in days:
+            date_str = d.isoformat()
+            stored = found.get(date_str, ("",) * 6 + (0, 0, 0))
+            e = {"weekday": d.strftime("%A"), "date_str": date_str}
+            e.update(zip(ENTRY_COLS[:6], stored[:6]))
+            e.update(zip(ENTRY_COLS[6:], map(bool, stored[6:])))
+            entries.append(e)
+        return entries
+
+    def save_results(self, employee_id, start, rows):
+        """rows: (date_str, *RESULT_COLS) for one employee-fortnight."""
+        period = start.isoformat()
+        self.save_day_results([(employee_id, r[0], period, *r[1:]) for r in rows])
+
+    def save_day_results(self, rows):
+        """rows: (employee_id, date_str, period_start_str, *RESULT_COLS), any employees, one transaction."""
+        spans = {}
+        for r in rows:
+            first, last = spans.get(r[0], (r[1], r[1]))
+            spans[r[0]] = (min(first, r[1]), max(last, r[1]))
+        keys = {(r[0], r[2]) for r in rows}
+        with self.transaction() as conn:
+            # the fortnights the replaced days were filed under (a different period_start if re-saved)
+            for employee_id, (first, last) in spans.items():
+                keys.update(conn.execute("SELECT DISTINCT employee_id, period_start FROM day_results "
+                                         "WHERE employee_id = ? AND date BETWEEN ? AND ?",
+                                         (employee_id, first, last)))
+            conn.executemany("INSERT INTO employees (employee_id) VALUES (?) "
+                             "ON CONFLICT(employee_id) DO NOTHING", {(r[0],) for r in rows})
+            conn.executemany(
+                f"INSERT OR REPLACE INTO day_results (employee_id, date, period_start, {', '.join(RESULT_COLS)}) "
+                f"VALUES ({', '.join('?' * (len(RESULT_COLS) + 3))})", rows)
+            self._refresh_totals(conn, keys)
+
+    def iter_quantities(self, first, last, size=100_000):
+        """Stored days for dates first..last, as lists of
+        (employee_id, date, period_start, unit, penalty, special, *QUANTITY_COLS, *AMOUNT_COLS) rows,
+        size at a time.
+
+        Rows saved before the quantities were recorded are skipped.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.execute(
+                f"SELECT employee_id, date, period_start, unit, penalty, special, "
+                f"{', '.join(QUANTITY_COLS + AMOUNT_COLS)} FROM day_results "
+                "WHERE date BETWEEN ? AND ? AND penalty_hours IS NOT NULL ORDER BY employee_id, date",
+                (first.isoformat(), last.isoformat()))
+            while True:
+                rows = cur.fetchmany(size)
+                if not rows:
+                    return
+                yield rows
+
+    def update_amounts(self, rows, schedule=None):
+        """rows: (*AMOUNT_COLS, employee_id, date_str, period_start_str); rewrites the dollars of stored days.
+
+        schedule (a RateSchedule, default the bundled one) prices the
+        deduction of the re-aggregated fortnights.
+        """
+        with self.transaction() as conn:
+            conn.executemany(
+                f"UPDATE day_results SET {', '.join(c + ' = ?' for c in AMOUNT_COLS)} "
+                "WHERE employee_id = ? AND date = ?", [r[:-1] for r in rows])
+            self._refresh_totals(conn, {(r[-3], r[-1]) for r in rows}, schedule)
+
+    def _refresh_totals(self, conn, keys, schedule=None):
+        """Re-aggregate the (employee_id, period_start) fortnights in keys from day_results.
+
+        A fortnight with no days left gets an all-zero row rather than none,
+        so a rollup refreshing by seq applies the change.
+        """
+        if not keys:
+            return
+        if schedule is None:
+            from rate_tables import default_schedule
+            schedule = default_schedule()
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM fortnight_totals").fetchone()[0]
+        sums = ", ".join(f"CAST(COALESCE(SUM(ROUND({c} * 100)), 0) AS INTEGER)" for c in AMOUNT_COLS)
+        rows = []
+        for employee_id, period in sorted(keys):
+            any_ado, *totals = conn.execute(
+                f"SELECT COALESCE(MAX(any_ado), 0), COUNT(*), {sums} FROM day_results "
+                "WHERE employee_id = ? AND period_start = ?", (employee_id, period)).fetchone()
+            deduction = 0 if any_ado or not totals[0] else round(
+                long_fortnight_deduction(schedule.for_date(date.fromisoformat(period))) * 100)
+            rows.append((employee_id, period, seq, any_ado, *totals, deduction, totals[-1] - deduction))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO fortnight_totals (employee_id, period_start, seq, any_ado, {', '.join(TOTAL_COLS)}) "
+            f"VALUES ({', '.join('?' * (len(TOTAL_COLS) + 4))})", rows)
+
+    def rebuild_totals(self, schedule=None):
+        """Re-aggregate every stored fortnight (e.g. after editing day_results by hand)."""
+        with self.transaction() as conn:
+            keys = set(conn.execute("SELECT employee_id, period_start FROM day_results "
+                                    "UNION SELECT employee_id, period_start FROM fortnight_totals"))
+            self._refresh_totals(conn, keys, schedule)
+
+    def iter_fortnight_totals(self, since=0, size=100_000):
+        """Lists of (employee_id, period_start, seq, *TOTAL_COLS) for fortnights re-aggregated after seq since."""
+        with self.pool.connection() as conn:
+            cur = conn.execute(f"SELECT employee_id, period_start, seq, {', '.join(TOTAL_COLS)} "
+                               "FROM fortnight_totals WHERE seq > ? ORDER BY seq", (since,))
+            while True:
+                rows = cur.fetchmany(size)
+                if not rows:
+                    return
+                yield rows
+
+    def period_results(self, period_start):
+        """All stored result rows for one fortnight, every employee (uses the period index)."""
+        with self.pool.connection() as conn:
+            return conn.execute(
+                f"SELECT employee_id, date, {', '.join(RESULT_COLS)} FROM day_results "
+                "WHERE period_start = ? ORDER BY employee_id, date", (period_start.isoformat(),)).fetchall()
+
+    def employees(self):
+        with self.pool.connection() as conn:
+            return [r[0] for r in conn.execute("SELECT employee_id FROM employees ORDER BY employee_id")]
@@ -0,0 +1,233 @@
+# synthetic.py
+"""Seeded synthetic rosters for load testing: bulk.py input or Review page entries.
+
+    python synthetic.py --rows 1000000 -o roster.csv
+    python synthetic.py --employees 50000 --fortnights 26 -o roster.jsonl
+    python synthetic.py --rows 300000000 --shard 3/8 -o part3.csv        # 8 independent parts
+    python synthetic.py --rows 1000000 | python bulk.py - -o results.parquet --anchor 2024-12-30
+
+Each employee works consecutive fortnights from --start on one shift band
+(day, early morning, afternoon, night or the 01:01-03:59 special window),
+with rest days, weekends, public holidays, an ADO in some fortnights and
+the odd sick day or OFF.  Worked days are rostered as-is or varied into a
+lift-up, lay-back or built-up shift, roster times are written HHMM, HH:MM
+or 3-digit HMM, and Worked/Extra durations are filled in now and then.
+The output is a pure function of (seed, employee), so shards generate
+disjoint employees in parallel and rerun byte-for-byte; rows stream out
+one fortnight at a time, so size is bounded only by disk.
+
+fortnight_entries() returns one fortnight in the Enter/Review pages'
+session_state["entries"] shape.
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import date, timedelta
+
+FIELDS = ["rs_on", "as_on", "rs_off", "as_off", "worked", "extra"]
+COLUMNS = ["employee", "date", "state", *FIELDS, "sick", "off", "ado"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_START = date(2024, 12, 30)  # a Monday; the first fortnight spans New Year's Day
+
+
+def _table(weighted):
+    """(weight, value) pairs -> (values, cumulative weights) for _pick."""
+    cum, total = [], 0
+    for w, _ in weighted:
+        total += w
+        cum.append(total)
+    return [v for _, v in weighted], cum
+
+
+# Shift bands: (weight, earliest start, latest start) in minutes after midnight.
+# "ends_special" starts late enough that the shift ends between 01:01 and 03:59.
+BANDS = {
+    "day": (45, 360, 600),
+    "morning": (10, 240, 330),
+    "afternoon": (20, 630, 1065),
+    "night": (15, 1080, 1425),
+    "special": (5, 61, 239),
+    "ends_special": (5, 1020, 1160),
+}
+# What happens to a rostered working day: (weight, kind)
+VARIATIONS = _table([(62, "as_rostered"), (10, "lift_up"), (10, "lay_back"), (6, "built_up"),
+                     (4, "sick"), (3, "off"), (3, "off_text"), (2, "blank")])
+SHIFT_LENGTHS = _table([(80, 480), (8, 450), (6, 510), (6, 540)])  # rostered minutes
+STYLES = _table([(45, "hhmm"), (35, "hh:mm"), (15, "mixed"), (5, "hmm")])  # per employee
+BAND_CHOICE = _table([(w, name) for name, (w, _, _) in BANDS.items()])
+EDGES = [61, 239, 240, 330, 1080]  # classification boundaries, hit on purpose now and then
+
+_HHMM = [f"{m // 60:02d}{m % 60:02d}" for m in range(1440)]
+_HH_MM = [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)]
+_HMM = [f"{m // 60}{m % 60:02d}" for m in range(1440)]  # 730 for 07:30
+
+
+def _pick(rng, table):
+    values, cum = table
+    return values[bisect(cum, rng.random() * cum[-1])]
+
+
+def _step(rng, lo, hi, step):
+    """rng.randrange(lo, hi + 1, step) without its argument checking."""
+    return lo + step * int(rng.random() * ((hi - lo) // step + 1))
+
+
+def _clock(rng, style, m):
+    m %= 1440
+    if style == "mixed":
+        style = rng.choice(("hhmm", "hh:mm"))
+    if style == "hmm" and m < 600:
+        return _HMM[m]
+    return _HH_MM[m] if style == "hh:mm" else _HHMM[m]
+
+
+def _duration(rng, minutes):
+    h, m = divmod(minutes, 60)
+    return f"{h:02d}:{m:02d}" if rng.random() < 0.5 else f"{h:02d}{m:02d}"
+
+
+def employee_days(seed, employee, start=DEFAULT_START, fortnights=1, state="NSW"):
+    """Yield (date, fields dict, sick, off, ado) for one employee's consecutive fortnights."""
+    rng = random.Random(seed * 1_000_003 + employee)
+    style = _pick(rng, STYLES)
+    band = _pick(rng, BAND_CHOICE)
+    _, lo, hi = BANDS[band]
+    rest = rng.choice(([5, 6], [5, 6], [0, 1], [2, 3], [6, 0]))  # weekday numbers off each week
+    for f in range(fortnights):
+        first = start + timedelta(days=14 * f)
+        ado_day = rng.randrange(14) if rng.random() < 0.5 else None
+        for i in range(14):
+            d = first + timedelta(days=i)
+            e = dict.fromkeys(FIELDS, "")
+            sick = off = ado = False
+            if i == ado_day:
+                if rng.random() < 0.8:
+                    ado = True
+                else:
+                    e["rs_on"] = "ADO"
+                yield d, e, sick, off, ado
+                continue
+            if d.weekday() in rest:
+                if rng.random() < 0.85:
+                    yield d, e, sick, off, ado
+                    continue  # rest day; the rest are rostered weekend/overtime days
+
+            kind = _pick(rng, VARIATIONS)
+            if kind == "blank":
+                yield d, e, sick, off, ado
+                continue
+            on = rng.choice(EDGES) if rng.random() < 0.03 else _step(rng, lo, hi, 5 if rng.random() < 0.9 else 1)
+            length = _pick(rng, SHIFT_LENGTHS)
+            if band == "ends_special":
+                length = max(length, 1501 - on + _step(rng, 0, 135, 15))  # ends 01:01-03:29 next day
+            off_at = on + length
+            a_on, a_off = on, off_at
+            if kind == "lift_up":
+                a_on -= _step(rng, 15, 120, 15)
+                a_off -= rng.choice((0, 0, 15, 30))
+            elif kind == "lay_back":
+                shift = _step(rng, 15, 120, 15)
+                a_on, a_off = on + shift, off_at + shift
+            elif kind == "built_up":
+                a_on += rng.choice((0, 15, 30))
+                a_off -= _step(rng, 15, 90, 15)
+            e.update(rs_on=_clock(rng, style, on), rs_off=_clock(rng, style, off_at),
+                     as_on=_clock(rng, style, a_on), as_off=_clock(rng, style, a_off))
+            if rng.random() < 0.15:
+                e["worked"] = _duration(rng, rng.choice((450, 465, 480, 495, 510, 540)))
+            if rng.random() < 0.08:
+                e["extra"] = _duration(rng, rng.choice((15, 30, 45, 60)))
+            if kind == "sick":
+                sick = True
+            elif kind == "off":
+                off = True
+            elif kind == "off_text":
+                e["rs_on"] = "OFF"
+            yield d, e, sick, off, ado
+
+
+def fortnight_entries(seed=0, employee=0, start=DEFAULT_START):
+    """One synthetic fortnight as the pages' session_state["entries"] list."""
+    return [{"weekday": WEEKDAYS[d.weekday()], "date_str": d.isoformat(), **e, "sick": sick, "off": off, "ado": ado}
+            for d, e, sick, off, ado in employee_days(seed, employee, start)]
+
+
+def iter_rows(rows, fortnights=26, seed=0, start=DEFAULT_START, shard=(0, 1), state="NSW"):
+    """Yield bulk.py input rows (lists in COLUMNS order), grouped by employee and in date order.
+
+    rows is the total across all shards; shard (k, n) yields the k-th of n
+    disjoint employee ranges.
+    """
+    per_employee = 14 * fortnights
+    employees = -(-rows // per_employee)
+    k, n = shard
+    first, last = employees * k // n, employees * (k + 1) // n
+    for emp in range(first, last):
+        left = min(per_employee, rows - emp * per_employee)
+        name = f"E{emp:09d}"
+        for j, (d, e, sick, off, ado) in enumerate(employee_days(seed, emp, start, fortnights, state)):
+            if j == left:
+                break
+            yield [name, d.isoformat(), state, *(e[f] for f in FIELDS), sick, off, ado]
+
+
+def write(rows_iter, out, fmt="csv", chunk=10_000):
+    """Stream rows to out (text file) as CSV or JSON lines; returns the row count."""
+    n, buf = 0, []
+    writer = csv.writer(out) if fmt == "csv" else None
+    if writer:
+        writer.writerow(COLUMNS)
+    for row in rows_iter:
+        buf.append(row)
+        if len(buf) >= chunk:
+            n += _flush(buf, out, writer)
+            buf = []
+    if buf:
+        n += _flush(buf, out, writer)
+    return n
+
+
+def _flush(buf, out, writer):
+    if writer:
+        writer.writerows([*r[:9], int(r[9]), int(r[10]), int(r[11])] for r in buf)
+    else:
+        out.write("".join(json.dumps(dict(zip(COLUMNS, r))) + "\n" for r in buf))
+    return len(buf)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Generate seeded synthetic fortnight rosters (bulk.py input).")
+    size = p.add_mutually_exclusive_group(required=True)
+    size.add_argument("--rows", type=int, help="total day rows (across all shards)")
+    size.add_argument("--employees", type=int, help="employees, each with --fortnights fortnights")
+    p.add_argument("--fortnights", type=int, default=26, help="consecutive fortnights per employee (default 26)")
+    p.add_argument("--start", type=date.fromisoformat, default=DEFAULT_START,
+                   help=f"first fortnight start (default {DEFAULT_START})")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--shard", default="0/1", help="K/N: write only the K-th of N disjoint employee ranges")
+    p.add_argument("--format", choices=["csv", "jsonl"], help="default: by extension, else csv")
+    p.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    args = p.parse_args(argv)
+
+    k, n = map(int, args.shard.split("/"))
+    if not 0 <= k < n:
+        p.error("--shard must be K/N with 0 <= K < N")
+    rows = args.rows if args.rows is not None else args.employees * args.fortnights * 14
+    fmt = args.format or ("jsonl" if args.output.endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    t0 = time.perf_counter()
+    try:
+        written = write(iter_rows(rows, args.fortnights, args.seed, args.start, (k, n)), out, fmt)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"{written} rows ({written / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,61 @@
 # utils.py
 import math
-from datetime import datetime, timedelta, time
-
-NSW_PUBLIC_HOLIDAYS = {
-    "2025-01-01", "2025-01-27", "2025-04-18", "2025-04-19", "2025-04-20", "2025-04-21",
-    "2025-04-25", "2025-06-09", "2025-10-06", "2025-12-25", "2025-12-26"
-}
-rate_constants = {
-    "Afternoon Shift": 4.84, "Night Shift": 5.69, "Early Morning": 4.84,
-    "Special Loading": 5.69, "OT 150%": 74.72763, "OT 200%": 99.63684,
-    "ADO Adjustment": 49.81842, "Sat Loading 50%": 24.90921, "Sun Loading 100%": 49.81842,
-    "Public Holiday": 49.81842, "PH Loading 50%": 24.90921, "PH Loading 100%": 49.81842,
-    "Sick With MC": 49.81842, "Ordinary Hours": 49.81842
-}
+from collections import namedtuple
+from functools import lru_cache
+from datetime import date, datetime, timedelta, time
 
-def parse_time(text: str):
-    text = (text or "").strip()
-    if not text: return None
+from rate_tables import default_schedule
+
+
+def current_rates(d=None):
+    """The rate table (data/rates.csv) in force on d, default today, looked up on each call.
+
+    Callers rating a dated period pass rates=default_schedule().for_date(...)
+    instead, resolved once per period.
+    """
+    return default_schedule().for_date(d or date.today())
+
+
+# ---------- Parsing ----------
+# Rosters reuse a small set of strings ("0730", "15:42", ...), so the parsers
+# are memoised; the ASCII fast paths avoid strptime and exceptions entirely.
+_TIMES = [time(m // 60, m % 60) for m in range(1440)]
+
+def _parse_time_slow(text):
     try:
         if ":" in text:
-            return datetime.strptime(text, "%H:%M").time()
+            t = datetime.strptime(text, "%H:%M").time()
+            return t.hour * 60 + t.minute
         if text.isdigit() and len(text) in [3,4]:
             h, m = int(text[:-2]), int(text[-2:])
-            return time(h, m)
+            return time(h, m).hour * 60 + m
     except:  # noqa: E722
         return None
     return None
 
+@lru_cache(maxsize=4096)
+def parse_minutes(text: str):
+    """Time of day (HH:MM, H:MM, HHMM, HMM) as minutes since midnight, or None."""
+    text = (text or "").strip()
+    if not text: return None
+    if not text.isascii():
+        return _parse_time_slow(text)
+    if ":" in text:
+        h, _, m = text.partition(":")
+        if not (0 < len(h) <= 2 and 0 < len(m) <= 2 and h.isdigit() and m.isdigit()):
+            return None
+    elif text.isdigit() and len(text) in (3, 4):
+        h, m = text[:-2], text[-2:]
+    else:
+        return None
+    h, m = int(h), int(m)
+    return h * 60 + m if h < 24 and m < 60 else None
+
+def parse_time(text: str):
+    m = parse_minutes(text)
+    return None if m is None else _TIMES[m]
+
+@lru_cache(maxsize=4096)
 def parse_duration(text: str) -> float:
     text = (text or "").strip()
     if not text: return 0
@@ -41,45 +70,155 @@ def parse_duration(text: str) -> float:
         return 0
     return 0
 
-def calculate_row(day, values, sick, penalty_value, special_value, unit_val):
-    # values: [rs_on, as_on, rs_off, as_off, worked, extra]
+ENTRY_FIELDS = ["date_str", "rs_on", "as_on", "rs_off", "as_off", "worked", "extra", "sick", "off", "ado"]
+
+def entry_key(entry):
+    """Content key of one day's entry dict; equal keys always compute to equal rows."""
+    return tuple(entry[f] for f in ENTRY_FIELDS)
+
+TIME_FIELDS = {"rs_on": "R Sign-on", "as_on": "A Sign-on", "rs_off": "R Sign-off", "as_off": "A Sign-off"}
+DURATION_FIELDS = {"worked": "Worked", "extra": "Extra"}
+TIME_PAIRS = (("rs_on", "rs_off"), ("as_on", "as_off"))
+# reasons, shared with the column-at-a-time checks in validation.py
+TIME_ERROR = "{label} '{value}' is not a time (HH:MM or HHMM, hours < 24, minutes < 60)"
+DURATION_ERROR = "{label} '{value}' is not a duration (HH:MM or HHMM, minutes < 60)"
+PAIR_ERROR = "{on} and {off} must be entered together"
+
+def validate_entry(entry):
+    """Problems with one day's entry dict as (field, reason) pairs; [] when it is usable."""
+    errors = []
+    for f, label in TIME_FIELDS.items():
+        v = entry[f].strip()
+        if v and v.upper() not in ("OFF", "ADO") and parse_minutes(v) is None:
+            errors.append((f, TIME_ERROR.format(label=label, value=v)))
+    for f, label in DURATION_FIELDS.items():
+        v = entry[f].strip()
+        if not v:
+            continue
+        h, sep, m = v.partition(":")
+        if not sep:
+            h, m = v[:-2], v[-2:]
+        if not (v.isascii() and h.isdigit() and len(m) == 2 and m.isdigit() and int(m) < 60):
+            errors.append((f, DURATION_ERROR.format(label=label, value=v)))
+    for on, off in TIME_PAIRS:
+        if {entry[on].strip().upper(), entry[off].strip().upper()} & {"OFF", "ADO"}:
+            continue
+        if bool(entry[on].strip()) != bool(entry[off].strip()):
+            errors.append((on if not entry[on].strip() else off,
+                           PAIR_ERROR.format(on=TIME_FIELDS[on], off=TIME_FIELDS[off])))
+    return errors
+
+def apply_flags(values, sick, off, ado):
+    """Precedence ADO > Sick/Off > none; returns (effective_values, chosen_flag)."""
+    effective_values = list(values)
+    chosen_flag = None
+    if ado:
+        effective_values[0] = "ADO"; chosen_flag = "ADO"
+    elif sick or off:
+        effective_values[0] = "OFF"; chosen_flag = "OFF"
+    return effective_values, chosen_flag
+
+def long_fortnight_deduction(rates=None):
+    """Half a daily rate, taken off fortnights with no ADO."""
+    return 0.5 * (rates or current_rates())["Ordinary Hours"] * 8
+
+# ---------- Day classification (Unit / Penalty / Special) ----------
+DayClass = namedtuple("DayClass", "unit penalty special worked any_ado")
+
+def classify_day(weekday, values, sick):
+    # values: [rs_on, as_on, rs_off, as_off, worked, extra] (after ADO/OFF precedence)
+    upper = [v.upper() for v in values]
+    any_ado = "ADO" in upper
+    blocked = any_ado or "OFF" in upper or sick
+    weekend = weekday in ("Saturday", "Sunday")
+    worked_f = parse_duration(values[4])
+
+    as_on, as_off = parse_minutes(values[1]), parse_minutes(values[3])
+
+    # Unit: lift-up / lay-back / built-up against the rostered shift
+    unit = 0.0
+    if not blocked:
+        rs_on, rs_off = parse_minutes(values[0]), parse_minutes(values[2])
+        extra_f = parse_duration(values[5])
+        if None not in (rs_on, rs_off, as_on, as_off):
+            rs_end = rs_off + 1440 if rs_off < rs_on else rs_off
+            as_end = as_off + 1440 if as_off < as_on else as_off
+
+            built_up = 0
+            if as_on < rs_on:                   # lift-up
+                delta = (rs_end - as_end) / 60
+            elif as_end > rs_end:               # lay-back
+                delta = abs((as_on - rs_on) / 60)
+            elif as_end - as_on < rs_end - rs_on:  # built-up
+                delta = abs((rs_end - rs_on) / 60) - 8
+                built_up = 1
+            else:
+                delta = 0.0
+
+            worked_use = worked_f if worked_f and built_up == 0 else 8
+            unit = delta + (worked_use - 8) + (extra_f or 0)
+    unit = round(unit, 2)
+
+    # Penalty: by actual sign-on minute (weekdays only)
+    penalty = "No"
+    if not blocked and not weekend and as_on is not None and as_off is not None:
+        m1 = as_on
+        m2 = as_off + 1440 if as_off < as_on else as_off
+        if 1080 <= m1 <= 1439 or 0 <= m1 <= 239:
+            penalty = "Night"
+        elif 240 <= m1 <= 330:
+            penalty = "Morning"
+        elif m1 <= 1080 <= m2:
+            penalty = "Afternoon"
+
+    # Special: actual sign-on or sign-off between 01:01 and 03:59 (weekdays only)
+    special = "No"
+    if not blocked and not weekend:
+        if (as_on is not None and 61 <= as_on <= 239) or (as_off is not None and 61 <= as_off <= 239):
+            special = "Yes"
+
+    return DayClass(unit, penalty, special, worked_f, any_ado)
+
+def calculate_row(day, values, sick, penalty_value, special_value, unit_val, rates=None):
+    # values: [rs_on, as_on, rs_off, as_off, worked, extra]; rates: table for the day (default: today's)
+    rc = rates or current_rates()
     ot_rate = 0
     if values[0].upper() == "ADO" and unit_val >= 0:
-        ot_rate = round(unit_val * rate_constants["ADO Adjustment"], 2)
+        ot_rate = round(unit_val * rc["ADO Adjustment"], 2)
     elif values[0].upper() not in ["OFF", "ADO"] and unit_val >= 0:
-        ot_rate = round(unit_val * (rate_constants["OT 200%"] if day in ["Saturday","Sunday"] else rate_constants["OT 150%"]), 2)
+        ot_rate = round(unit_val * (rc["OT 200%"] if day in ["Saturday","Sunday"] else rc["OT 150%"]), 2)
     else:
         if day == "Saturday":
-            ot_rate = round(unit_val * (rate_constants["Sat Loading 50%"] + rate_constants["Ordinary Hours"]), 2)
+            ot_rate = round(unit_val * (rc["Sat Loading 50%"] + rc["Ordinary Hours"]), 2)
         elif day == "Sunday":
-            ot_rate = round(unit_val * (rate_constants["Sun Loading 100%"] + rate_constants["Ordinary Hours"]), 2)
+            ot_rate = round(unit_val * (rc["Sun Loading 100%"] + rc["Ordinary Hours"]), 2)
         else:
             if penalty_value in ["Afternoon","Morning"]:
-                ot_rate = round(unit_val * (rate_constants["Afternoon Shift"] + rate_constants["Ordinary Hours"]), 2)
+                ot_rate = round(unit_val * (rc["Afternoon Shift"] + rc["Ordinary Hours"]), 2)
             elif penalty_value == "Night":
-                ot_rate = round(unit_val * (rate_constants["Night Shift"] + rate_constants["Ordinary Hours"]), 2)
+                ot_rate = round(unit_val * (rc["Night Shift"] + rc["Ordinary Hours"]), 2)
             else:
-                ot_rate = round(unit_val * rate_constants["Ordinary Hours"], 2)
+                ot_rate = round(unit_val * rc["Ordinary Hours"], 2)
 
     worked_hours = parse_duration(values[4]) or 8
     penalty_hours = math.floor(worked_hours)
 
     penalty_rate = 0
-    if penalty_value == "Afternoon": penalty_rate = round(penalty_hours * rate_constants["Afternoon Shift"], 2)
-    elif penalty_value == "Night":   penalty_rate = round(penalty_hours * rate_constants["Night Shift"], 2)
-    elif penalty_value == "Morning": penalty_rate = round(penalty_hours * rate_constants["Early Morning"], 2)
+    if penalty_value == "Afternoon": penalty_rate = round(penalty_hours * rc["Afternoon Shift"], 2)
+    elif penalty_value == "Night":   penalty_rate = round(penalty_hours * rc["Night Shift"], 2)
+    elif penalty_value == "Morning": penalty_rate = round(penalty_hours * rc["Early Morning"], 2)
 
-    special_loading = round(rate_constants["Special Loading"], 2) if special_value == "Yes" else 0
-    sick_rate = round(8 * rate_constants["Sick With MC"], 2) if sick else 0
-    daily_rate = 0 if values[0].upper() in ["OFF","ADO"] else round(8 * rate_constants["Ordinary Hours"], 2)
+    special_loading = round(rc["Special Loading"], 2) if special_value == "Yes" else 0
+    sick_rate = round(8 * rc["Sick With MC"], 2) if sick else 0
+    daily_rate = 0 if values[0].upper() in ["OFF","ADO"] else round(8 * rc["Ordinary Hours"], 2)
 
     if any(v.upper() == "ADO" for v in values):
-        daily_rate += round(4 * rate_constants["Ordinary Hours"], 2)
+        daily_rate += round(4 * rc["Ordinary Hours"], 2)
 
     loading = 0
     if values[0].upper() not in ["OFF","ADO"]:
-        if day == "Saturday": loading = round(8 * rate_constants["Sat Loading 50%"], 2)
-        elif day == "Sunday": loading = round(8 * rate_constants["Sun Loading 100%"], 2)
+        if day == "Saturday": loading = round(8 * rc["Sat Loading 50%"], 2)
+        elif day == "Sunday": loading = round(8 * rc["Sun Loading 100%"], 2)
 
     daily_count = ot_rate + penalty_rate + special_loading + sick_rate + daily_rate + loading
     return ot_rate, penalty_rate, special_loading, sick_rate, daily_rate, loading, daily_count
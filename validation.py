@@ -0,0 +1,150 @@
+# validation.py
+"""Column-at-a-time validation of bulk entry rows, before anything is computed.
+
+The same rules as utils.validate_entry (and the same reasons), checked a
+whole column at a time with Arrow regex kernels and NumPy range checks
+instead of per-row try/except, plus the Employee and Date keys bulk.py needs:
+
+    times      HH:MM, H:MM, HHMM or HMM with hours < 24 and minutes < 60
+               (or OFF/ADO); the rare non-ASCII cell goes through parse_minutes
+    durations  HH:MM or HHMM with minutes < 60
+    pairs      a sign-on needs its sign-off and vice versa
+    date       a real YYYY-MM-DD date; employee not blank
+    state      blank (the default) or a 2-3 letter code, any case (a state
+               with no holiday calendar is fine: it has no holidays)
+
+validate_rows returns a mask of bad rows and a compact error index of
+(row, field, reason) sorted by row, in validate_entry's field order.
+"""
+import re
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils import (DURATION_ERROR, DURATION_FIELDS, PAIR_ERROR, TIME_ERROR, TIME_FIELDS, TIME_PAIRS,
+                   parse_minutes)
+
+FIELDS = [*TIME_FIELDS, *DURATION_FIELDS]
+ERROR_COLS = ["employee", "date", "field", "value", "reason"]
+DATE_ERROR = "Date '{value}' is not a date (YYYY-MM-DD)"
+EMPLOYEE_ERROR = "Employee is missing"
+STATE_ERROR = "State '{value}' is not a state code (2-3 letters)"
+
+# blank, OFF/ADO, or H:MM/HH:MM/HMM/HHMM with hours < 24 and minutes < 60, in one pattern
+_HOUR = r"(?:[01]?[0-9]|2[0-3])"
+_TIME = rf"^(?:{_HOUR}:[0-5]?[0-9]|{_HOUR}[0-5][0-9]|(?i:off|ado))?$"
+_FLAG = r"^(?i:off|ado)$"
+_DURATION = r"^[0-9]+:?[0-5][0-9]$"
+_STATE = r"^(?:[A-Za-z]{2,3})?$"
+_DATE = r"^(?P<y>[0-9]{4})-(?P<m>[0-9]{2})-(?P<d>[0-9]{2})$"
+
+
+def _ints(struct, name):
+    return _np(pc.fill_null(pc.cast(pc.struct_field(struct, name), pa.int32()), -1))
+
+
+def _non_ascii(v):
+    return np.flatnonzero(~_np(pc.string_is_ascii(v)))
+
+
+def _np(a):
+    return a.to_numpy(zero_copy_only=False)
+
+
+def flags(v):
+    """Bool array: each stripped cell (of a string Array) reads OFF or ADO (any case)."""
+    out = _np(pc.match_substring_regex(v, _FLAG))
+    for i in _non_ascii(v):  # str.upper maps a few non-ASCII letters onto ASCII ones
+        out[i] = v[i].as_py().upper() in ("OFF", "ADO")
+    return out
+
+
+def times_ok(v):
+    """Bool array: each cell is blank, OFF/ADO or a valid time of day."""
+    ok = _np(pc.match_substring_regex(v, _TIME))
+    # parse_minutes also reads some non-ASCII digits (via strptime); ask it directly
+    for i in _non_ascii(v):
+        text = v[i].as_py()
+        ok[i] = text.upper() in ("OFF", "ADO") or parse_minutes(text) is not None
+    return ok
+
+
+def durations_ok(v):
+    """Bool array: each cell is blank or a valid duration."""
+    return _np(pc.or_(pc.equal(v, ""), pc.match_substring_regex(v, _DURATION)))
+
+
+def dates_ok(v):
+    """Bool array: each cell is a real calendar date written YYYY-MM-DD."""
+    parts = pc.extract_regex(v, _DATE)
+    y, m, d = _ints(parts, "y"), _ints(parts, "m"), _ints(parts, "d")
+    ok = (y >= 1) & (m >= 1) & (m <= 12) & (d >= 1)
+    month = np.where(ok, (y - 1970) * 12 + m - 1, 0).astype("datetime64[M]")
+    days_in_month = ((month + 1).astype("datetime64[D]") - month.astype("datetime64[D]")).astype(np.int64)
+    return ok & (d <= days_in_month)
+
+
+def state_ok(text):
+    """One stripped state cell: blank or a 2-3 letter code (validate_columns' rule)."""
+    return re.fullmatch(_STATE, text) is not None
+
+
+def validate_columns(cols):
+    """cols: {"employee", "date", *FIELDS and optionally "state": stripped strings (lists or Arrow arrays)},
+    all the same length.
+
+    Returns (bad, errors): a bool array over rows and [(row, field, reason)].
+    """
+    cols = {k: pa.array(v, type=pa.string()) for k, v in cols.items()}
+    n = len(cols["date"])
+    found = []  # (row, order, field, reason)
+    blank = {k: _np(pc.equal(v, "")) for k, v in cols.items() if k in ("employee", *TIME_FIELDS)}
+
+    def report(mask, field, order, reason):
+        for i in np.flatnonzero(mask):
+            found.append((int(i), order, field, reason(i)))
+
+    report(blank["employee"], "employee", 0, lambda i: EMPLOYEE_ERROR)
+    report(~dates_ok(cols["date"]), "date", 1, lambda i: DATE_ERROR.format(value=cols["date"][i].as_py()))
+    if "state" in cols:
+        state = cols["state"]
+        report(~_np(pc.match_substring_regex(state, _STATE)), "state", 2,
+               lambda i: STATE_ERROR.format(value=state[i].as_py()))
+    # one kernel call per rule over the fields stacked end to end (regexes compile per call)
+    times = pa.concat_arrays([cols[f] for f in TIME_FIELDS])
+    time_ok, flagged = times_ok(times).reshape(-1, n), flags(times).reshape(-1, n)
+    duration_ok = durations_ok(pa.concat_arrays([cols[f] for f in DURATION_FIELDS])).reshape(-1, n)
+    for k, (f, label) in enumerate(TIME_FIELDS.items()):
+        report(~time_ok[k], f, 3 + k,
+               lambda i, f=f, label=label: TIME_ERROR.format(label=label, value=cols[f][i].as_py()))
+    for k, (f, label) in enumerate(DURATION_FIELDS.items()):
+        report(~duration_ok[k], f, 7 + k,
+               lambda i, f=f, label=label: DURATION_ERROR.format(label=label, value=cols[f][i].as_py()))
+    flagged = dict(zip(TIME_FIELDS, flagged))
+    for k, (on, off) in enumerate(TIME_PAIRS):
+        a_blank, b_blank = blank[on], blank[off]
+        mismatch = (a_blank != b_blank) & ~flagged[on] & ~flagged[off]
+        reason = PAIR_ERROR.format(on=TIME_FIELDS[on], off=TIME_FIELDS[off])
+        report(mismatch & a_blank, on, 9 + k, lambda i: reason)
+        report(mismatch & b_blank, off, 9 + k, lambda i: reason)
+
+    found.sort()
+    bad = np.zeros(n, dtype=bool)
+    bad[[r for r, *_ in found]] = True
+    return bad, [(r, f, reason) for r, _, f, reason in found]
+
+
+def _column(rows, key):
+    """One input field as a stripped string Array (missing/None -> "")."""
+    values = [r.get(key) for r in rows]
+    try:
+        arr = pa.array(values, type=pa.string())
+    except (pa.ArrowTypeError, pa.ArrowInvalid):  # JSON numbers/bools: read them the way bulk does
+        arr = pa.array([str(v or "") for v in values], type=pa.string())
+    return pc.utf8_trim_whitespace(pc.fill_null(arr, ""))
+
+
+def validate_rows(rows):
+    """validate_columns over bulk input dicts (one Arrow column per field)."""
+    return validate_columns({k: _column(rows, k) for k in ("employee", "date", "state", *FIELDS)})